@@ -1,89 +1,407 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
-from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Query
+from fastapi.responses import Response, StreamingResponse, PlainTextResponse
+from contextlib import asynccontextmanager, aclosing
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from datetime import datetime, timezone
+import os
+import json
+import time
+import uuid
+import hashlib
 
-from backend.core.schemas import AnalysisRequest, AnalysisResult
+from backend.core.exceptions import ComponentUnavailable, Overloaded
+from backend.core.schemas import AnalysisRequest, AnalysisResult, BatchAnalysisRequest, BatchAnalysisResult, JobStatus
 from backend.services.orchestrator import Orchestrator
-from backend.utils.file_parser import parse_file
-from backend.utils.report_generator import generate_pdf
-from backend.utils.logger import logger
+from backend.utils.file_parser import parse_file, spool_upload, SUPPORTED_EXTENSIONS
+from backend.utils.query_parser import parse_time_window
+from backend.utils.logger import logger, configure_logging
+from backend.utils import executors, metrics
 
 load_dotenv()
+configure_logging(os.getenv("LOG_FORMAT", "text"))
 
 tools = {}
 
 # Data Models
 class SearchQuery(BaseModel):
     query: str
+    n_results: int = Field(default=3, ge=1, le=50)
+    # Optional metadata filters, applied inside Chroma
+    sentiment: Optional[str] = None
+    intent: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
 
 class ChatRequest(BaseModel):  # <--- NEW
     question: str
 
+class BulkReportRequest(BaseModel):
+    # Either explicit analyses, or a memory search whose results are reported on
+    analyses: list[AnalysisResult] = Field(default_factory=list)
+    search: Optional[SearchQuery] = None
+    format: Literal["pdf", "zip"] = "pdf"  # one consolidated PDF, or a zip with one PDF per analysis
+    title: Optional[str] = None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("🧠 Initializing Hybrid Brain...")
     tools["orchestrator"] = Orchestrator()
+    # background (default): serve immediately, components report readiness on "/"
+    await tools["orchestrator"].start(wait=os.getenv("STARTUP_MODE", "background") == "blocking")
     yield
     logger.info("💤 Shutting down...")
+    await tools["orchestrator"].close()
+    executors.shutdown()
 
 app = FastAPI(title="Smart Text Analyzer", lifespan=lifespan)
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Request id + per-stage timings for every request, exported as headers, logs and metrics."""
+    trace = metrics.start_trace(request.headers.get("x-request-id") or uuid.uuid4().hex[:16])
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    # Route template, not the raw path, keeps label cardinality bounded (/jobs/{job_id})
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    metrics.HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    metrics.HTTP_LATENCY.observe(elapsed, method=request.method, route=route)
+    response.headers["X-Request-ID"] = trace["request_id"]
+    if trace["stages"]:
+        response.headers["Server-Timing"] = metrics.server_timing(trace)
+        logger.info(
+            f"⏱️ {request.method} {route} {response.status_code} in {elapsed * 1000:.1f} ms | "
+            + ", ".join(f"{name} {seconds * 1000:.1f}" for name, (_, seconds) in trace["stages"].items()),
+            extra={
+                "method": request.method, "route": route, "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 1),
+                "stages": {name: round(seconds * 1000, 1) for name, (_, seconds) in trace["stages"].items()},
+                "attrs": trace["attrs"],
+            },
+        )
+    return response
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def health_check():
-    return {"status": "ready"}
+    return tools["orchestrator"].health()
+
+def _memory():
+    memory = tools["orchestrator"].memory
+    if memory is None:
+        raise HTTPException(status_code=503, detail="Memory store is still warming up.")
+    return memory
+
+def _busy(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
-@app.post("/analyze", response_model=AnalysisResult)
+async def _admitted(priority: str, key, fn, *args):
+    """
+    Runs `fn` once its priority class gets a slot (Overloaded if it can't
+    in time). Concurrent calls with the same `key` share that one run:
+    re-sent requests don't start another generation.
+    """
+    orchestrator = tools["orchestrator"]
+
+    async def run():
+        return await orchestrator.admission.run(priority, fn, *args)
+
+    if key is None:
+        return await run()
+    return await orchestrator.inflight.do(key, run, label=key[0])
+
+@app.post("/analyze", response_model=AnalysisResult, response_model_exclude_none=True)
 async def analyze_text(request: AnalysisRequest):
+    orchestrator = tools["orchestrator"]
+    key = ("/analyze", orchestrator.cache_key(request.text), tuple(sorted(request.modules or ["all"])))
     try:
-        return await tools["orchestrator"].run_hybrid_analysis(request.text)
+        return await _admitted("analyze", key, orchestrator.run_hybrid_analysis, request.text, request.modules)
+    except ComponentUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Overloaded as e:
+        raise _busy(e)
     except Exception as e:
         logger.error(f"Analysis Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze/batch", response_model=BatchAnalysisResult)
+async def analyze_batch(request: BatchAnalysisRequest):
+    orchestrator = tools["orchestrator"]
+    body = json.dumps([request.texts, sorted(request.modules or ["all"])]).encode("utf-8")
+    key = ("/analyze/batch", hashlib.sha256(body).hexdigest())
+    try:
+        return await _admitted("bulk", key, orchestrator.run_batch_analysis, request.texts, request.modules)
+    except ComponentUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Overloaded as e:
+        raise _busy(e)
+    except Exception as e:
+        logger.error(f"Batch Error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/analyze/file", response_model=AnalysisResult)
 async def analyze_file(file: UploadFile = File(...)):
     text = await parse_file(file)
     if len(text) < 10: raise HTTPException(status_code=400, detail="File empty.")
+    orchestrator = tools["orchestrator"]
     try:
-        return await tools["orchestrator"].run_hybrid_analysis(text)
+        return await _admitted("bulk", ("/analyze/file", orchestrator.cache_key(text)), orchestrator.run_document_analysis, text)
+    except ComponentUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Overloaded as e:
+        raise _busy(e)
     except Exception as e:
         logger.error(f"File Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _attachment(content: bytes, media_type: str, filename: str, chunk_size: int = 64 * 1024):
+    # Streamed from memory in chunks: no temp files left behind
+    return StreamingResponse(
+        (content[i:i + chunk_size] for i in range(0, len(content), chunk_size)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Content-Length": str(len(content))},
+    )
+
 @app.post("/report/pdf")
 async def create_report(data: AnalysisResult):
     try:
-        pdf_path = generate_pdf(data.model_dump())
-        return FileResponse(pdf_path, media_type="application/pdf", filename="report.pdf")
+        pdf = await tools["orchestrator"].reports.render(data.model_dump(exclude_none=True))
+        return _attachment(pdf, "application/pdf", "report.pdf")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _search(search: SearchQuery) -> list:
+    results = await tools["orchestrator"].query_memory(
+        search.query,
+        search.n_results,
+        sentiment=search.sentiment,
+        intent=search.intent,
+        since=search.since.timestamp() if search.since else None,
+        until=search.until.timestamp() if search.until else None,
+    )
+    # Simplify structure for frontend
+    simple_res = []
+    if results['documents']:
+        for i in range(len(results['documents'][0])):
+            simple_res.append({
+                "text": results['documents'][0][i],
+                "sentiment": results['metadatas'][0][i].get("sentiment"),
+                "summary": results['metadatas'][0][i].get("summary"),
+                "intent": results['metadatas'][0][i].get("intent"),
+                "timestamp": results['metadatas'][0][i].get("timestamp")
+            })
+    return simple_res
+
+@app.post("/report/bulk")
+async def create_bulk_report(request: BulkReportRequest):
+    if bool(request.analyses) == bool(request.search):
+        raise HTTPException(status_code=422, detail="Provide either 'analyses' or 'search'.")
+    try:
+        if request.search:
+            items = await _search(request.search)
+            if not items:
+                raise HTTPException(status_code=404, detail="The search returned no analyses.")
+        else:
+            items = [a.model_dump(exclude_none=True) for a in request.analyses]
+        content = await tools["orchestrator"].reports.render_bulk(items, request.format, request.title)
+    except HTTPException:
+        raise
+    except ComponentUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if request.format == "zip":
+        return _attachment(content, "application/zip", "reports.zip")
+    return _attachment(content, "application/pdf", "report.pdf")
+
+@app.get("/report/stats")
+def report_stats():
+    return tools["orchestrator"].reports.stats()
+
 @app.post("/memory/search")
 async def search_memory(search: SearchQuery):
     try:
-        results = tools["orchestrator"].query_memory(search.query)
-        # Simplify structure for frontend
-        simple_res = []
-        if results['documents']:
-            for i in range(len(results['documents'][0])):
-                simple_res.append({
-                    "text": results['documents'][0][i],
-                    "sentiment": results['metadatas'][0][i].get("sentiment"),
-                    "summary": results['metadatas'][0][i].get("summary"),
-                    "intent": results['metadatas'][0][i].get("intent")
-                })
-        return simple_res
+        return await _search(search)
+    except ComponentUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # --- NEW CHAT ENDPOINT ---
 @app.post("/memory/chat")
 async def chat_memory(request: ChatRequest):
+    key = ("/memory/chat", " ".join(request.question.lower().split()))
     try:
-        answer = await tools["orchestrator"].chat_with_memory(request.question)
+        answer = await _admitted("interactive", key, tools["orchestrator"].chat_with_memory, request.question)
         return {"answer": answer}
+    except ComponentUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Overloaded as e:
+        raise _busy(e)
     except Exception as e:
         logger.error(f"Chat Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/memory/chat/stream")
+async def chat_memory_stream(request: ChatRequest):
+    """
+    Same as /memory/chat but streams NDJSON lines as tokens arrive:
+    {"token": "..."} ... then {"done": true, "ttft_ms": ..., "total_ms": ...}
+    Not coalesced (each client gets its own stream). A full queue is
+    rejected up front; a deadline missed while queued ends the stream
+    with {"error": ..., "retry_after": ...}.
+    """
+    admission = tools["orchestrator"].admission
+    try:
+        admission.check("interactive")
+    except Overloaded as e:
+        raise _busy(e)
+
+    async def ndjson():
+        started = time.perf_counter()
+        ttft_ms = None
+        try:
+            # Taken inside the stream, so a client that never reads it never holds a slot
+            async with admission.slot("interactive"):
+                tokens = tools["orchestrator"].stream_chat_with_memory(request.question)
+                async with aclosing(tokens):
+                    async for token in tokens:
+                        if ttft_ms is None:
+                            ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                        yield json.dumps({"token": token}) + "\n"
+        except Overloaded as e:
+            yield json.dumps({"error": str(e), "retry_after": e.retry_after}) + "\n"
+            return
+        except Exception as e:
+            logger.error(f"Chat Stream Error: {e!r}")
+            yield json.dumps({"error": str(e) or type(e).__name__}) + "\n"
+            return
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"💬 Streamed answer (first token {ttft_ms} ms, total {total_ms} ms)")
+        yield json.dumps({"done": True, "ttft_ms": ttft_ms, "total_ms": total_ms}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@app.get("/memory/chat/stats")
+def chat_stats():
+    return tools["orchestrator"].chat_report()
+
+@app.get("/admission/stats")
+def admission_stats():
+    orchestrator = tools["orchestrator"]
+    return {"admission": orchestrator.admission.stats(), "coalescing": orchestrator.inflight.stats()}
+
+@app.get("/llm/backends")
+def llm_backends():
+    return tools["orchestrator"].llm.backend_stats()
+
+@app.get("/classifier/stats")
+def classifier_stats():
+    return tools["orchestrator"].fast_report()
+
+@app.get("/memory/buffer")
+def memory_buffer_stats():
+    return _memory().queue_stats()
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+@app.get("/memory/stats")
+def memory_stats(
+    period: Optional[str] = Query(None, description='Time phrase, e.g. "this month" or "last 7 days"'),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bucket: Literal["day", "week", "month"] = "day",
+    sentiment: Optional[str] = None,
+    intent: Optional[str] = None,
+    top: int = Query(10, ge=1, le=100),
+):
+    """
+    Aggregate breakdowns over all stored analyses, from precomputed counts (no LLM call).
+    The counts are bucketed by UTC day, so periods and naive since/until are read in UTC.
+    """
+    start = _utc(since).timestamp() if since else None
+    end = _utc(until).timestamp() if until else None
+    if period:
+        start, end = parse_time_window(period, tz=timezone.utc)
+        if start is None and end is None:
+            raise HTTPException(status_code=422, detail=f"Could not understand the period '{period}'.")
+    with metrics.stage("analytics_query"):
+        return _memory().analytics.summary(start, end, bucket, sentiment, intent, top)
+
+@app.get("/memory/partitions")
+def memory_partitions():
+    return _memory().partition_stats()
+
+@app.get("/clusters")
+def list_clusters(
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    min_size: int = Query(2, ge=1, description="1 also lists texts nothing has duplicated yet"),
+):
+    """Near-duplicate clusters, largest first."""
+    return _memory().dedup.clusters(limit, offset, min_size)
+
+@app.get("/clusters/stats")
+def cluster_stats():
+    return _memory().dedup.stats()
+
+@app.get("/clusters/{cluster_id}")
+def get_cluster(cluster_id: str, limit: int = Query(100, ge=1, le=1000)):
+    cluster = _memory().dedup.cluster(cluster_id, limit)
+    if cluster is None:
+        raise HTTPException(status_code=404, detail="Cluster not found.")
+    return cluster
+
+@app.get("/memory/embeddings")
+def embedding_stats():
+    return _memory().embedding_fn.stats()
+
+@app.get("/cache/stats")
+def cache_stats():
+    return tools["orchestrator"].cache.stats()
+
+
+# --- BACKGROUND JOBS ---
+@app.post("/jobs/analyze", status_code=202)
+async def submit_analysis_job(request: AnalysisRequest):
+    job_id = tools["orchestrator"].jobs.submit("analyze_text", {"text": request.text, "modules": request.modules})
+    return {"job_id": job_id, "status": "queued"}
+
+@app.post("/jobs/analyze/file", status_code=202)
+async def submit_file_job(file: UploadFile = File(...)):
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use PDF, DOCX, or TXT.")
+    jobs = tools["orchestrator"].jobs
+    # Spooled into the jobs directory so the upload survives a restart
+    path = await spool_upload(file, directory=jobs.upload_dir)
+    job_id = jobs.submit("analyze_file", {"path": path, "filename": file.filename})
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/stats")
+def job_stats():
+    return tools["orchestrator"].jobs.stats()
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    job = tools["orchestrator"].jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    jobs = tools["orchestrator"].jobs
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job already finished.")
+    return {"job_id": job_id, "status": "cancelling"}
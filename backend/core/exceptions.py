@@ -0,0 +1,12 @@
+# backend/core/exceptions.py
+
+class ComponentUnavailable(Exception):
+    """A component needed for this request is still warming up or failed to start."""
+
+class Overloaded(Exception):
+    """Not admitted: the queue is full (429) or no capacity freed up in time (503)."""
+
+    def __init__(self, message: str, status_code: int = 429, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
@@ -9,15 +9,60 @@ class Entity(BaseModel):
     label: str
 
 class AnalysisResult(BaseModel):
+    # Every field is present for a full analysis; a request with `modules`
+    # gets only the fields of the stages it selected.
+    sentiment: Optional[Literal["positive", "neutral", "negative"]] = None
+    sentiment_score: Optional[float] = Field(None, description="Score between -1.0 and 1.0")
+    summary: Optional[str] = Field(None, description="Concise summary of the text")
+    topics: Optional[List[str]] = None
+    intent: Optional[str] = None
+    entities: Optional[List[Entity]] = None
+    # Near-duplicate cluster the text belongs to (its analysis was reused when not the representative)
+    cluster_id: Optional[str] = None
+
+class LLMAnalysis(BaseModel):
+    """The part of an analysis the LLM generates (entities come from spaCy)."""
     sentiment: Literal["positive", "neutral", "negative"]
-    sentiment_score: float = Field(..., description="Score between -1.0 and 1.0")
-    summary: str = Field(..., description="Concise summary of the text")
-    topics: List[str]
-    intent: str
-    entities: List[Entity]
+    sentiment_score: float = Field(..., ge=-1.0, le=1.0)
+    summary: str
+    topics: List[str] = Field(..., max_length=5)
+    intent: Literal["informational", "complaint"]
 
 # --- Input Models (What we receive) ---
 
+Module = Literal["all", "fast", "memory", "entities", "sentiment", "intent", "summary", "topics"]
+
 class AnalysisRequest(BaseModel):
     text: str = Field(..., min_length=10, description="The text to analyze")
-    modules: Optional[List[str]] = ["all"] # Optional config for later
\ No newline at end of file
+    modules: Optional[List[Module]] = Field(["all"], description="Stages to run (see README); default: everything")
+
+class BatchAnalysisRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=1000, description="Texts to analyze in one call")
+    modules: Optional[List[Module]] = ["all"]
+
+# --- Batch Output ---
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+
+class BatchAnalysisResult(BaseModel):
+    items: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
+
+# --- Background Jobs ---
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: Literal["queued", "running", "done", "failed", "cancelled"]
+    progress: float = 0.0
+    queue_position: Optional[int] = None
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
@@ -0,0 +1,56 @@
+# backend/maintenance.py
+"""
+Offline memory maintenance. Run with the API stopped (Chroma's local
+store is single-process), from the directory that holds ./data:
+
+    python -m backend.maintenance stats
+    python -m backend.maintenance compact            # retention + rebuild + VACUUM
+    python -m backend.maintenance compact --no-rebuild
+    python -m backend.maintenance retention
+
+Settings come from .env, like the API: switching MEMORY_PARTITION or
+MEMORY_STORE_TEXT and running `compact` migrates existing rows.
+"""
+import json
+import argparse
+from dotenv import load_dotenv
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1e6:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smart Text Analyzer memory maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Partitions, row counts and disk usage")
+    compact = sub.add_parser("compact", help="Apply retention, rebuild indexes, drop orphans, VACUUM")
+    compact.add_argument("--no-rebuild", action="store_true", help="Skip the per-partition index rebuild")
+    sub.add_parser("retention", help="Only delete analyses past MEMORY_RETENTION_DAYS")
+    args = parser.parse_args()
+
+    load_dotenv()
+    # Deferred import: reads its settings from the environment loaded above
+    from backend.services.memory_store import MemoryStore
+    memory = MemoryStore()
+    try:
+        if args.command == "stats":
+            print(json.dumps(memory.partition_stats(), indent=2))
+        elif args.command == "retention":
+            print(f"🗑️ Removed {memory.apply_retention()} analyses.")
+        else:
+            report = memory.compact(rebuild=not args.no_rebuild)
+            for name, moved in report["partitions"].items():
+                print(f"🔧 {name}: {moved['kept']} kept, {moved['moved']} moved to other partitions")
+            print(f"🗑️ Expired: {report['expired']} | orphans removed: {report['orphans']}")
+            for key, before in report["disk_before"].items():
+                print(f"💾 {key}: {_mb(before)} -> {_mb(report['disk_after'][key])}")
+    finally:
+        memory.lexical.close()
+        memory.raw.close()
+        memory.analytics.close()
+        memory.dedup.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# backend/services/admission.py
+import os
+import math
+import time
+import bisect
+import asyncio
+import itertools
+import contextvars
+from collections import Counter
+from contextlib import asynccontextmanager
+from backend.core.exceptions import Overloaded
+from backend.utils.metrics import ADMISSION, COALESCED, stage
+
+# Priority classes, most urgent first
+PRIORITIES = {"interactive": 0, "analyze": 1, "bulk": 2}
+# The current request's class: the LLM pool hands free slots to the most urgent waiters first
+PRIORITY = contextvars.ContextVar("priority", default=PRIORITIES["analyze"])
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller for a key runs
+    it, and everyone arriving while it is in flight awaits the same result
+    (or exception). A caller that goes away does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("REQUEST_COALESCING", "1") == "1"
+        self._calls = {}  # key -> asyncio.Task
+        self.stats_counts = Counter()
+
+    def _done(self, key, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved: no "never retrieved" warning when every caller left
+
+    async def do(self, key, fn, *args, label: str = "other"):
+        if not self.enabled:
+            return await fn(*args)
+        task = self._calls.get(key)
+        if task is None:
+            self.stats_counts["executed"] += 1
+            task = asyncio.ensure_future(fn(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.stats_counts["coalesced"] += 1
+            COALESCED.inc(route=label)
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        calls = self.stats_counts["executed"] + self.stats_counts["coalesced"]
+        return {
+            "enabled": self.enabled,
+            **self.stats_counts,
+            "in_flight": len(self._calls),
+            "coalesced_rate": round(self.stats_counts["coalesced"] / calls, 3) if calls else None,
+        }
+
+
+class AdmissionController:
+    """
+    Bounds the requests running at once, in front of the Orchestrator.
+    Each class may only fill a share of the slots together with the classes
+    below it, so there is always headroom for more urgent work. Requests
+    over the limit wait in a bounded queue ordered by priority class
+    (interactive chat, then single analyses, then bulk), each for at most
+    its class's deadline. A full queue sheds its least urgent waiter
+    for a more urgent newcomer, or rejects the newcomer (429); a request
+    that outlives its deadline in the queue gets 503. Both carry a
+    Retry-After estimated from the queue length and recent service times.
+    """
+
+    def __init__(self, default_limit: int):
+        # 0 = no limit (requests still carry their priority to the LLM pool)
+        self.max_in_flight = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", str(default_limit)))
+        self.max_queue = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+        # Slots a class may hold together with the less urgent ones: analyses and
+        # batches never take all of them
+        shares = {
+            "interactive": 1.0,
+            "analyze": float(os.getenv("ADMISSION_ANALYZE_SHARE", "0.75")),
+            "bulk": float(os.getenv("ADMISSION_BULK_SHARE", "0.5")),
+        }
+        self.class_slots = {cls: max(1, int(self.max_in_flight * share)) for cls, share in shares.items()}
+        # Longest time a request may wait for a slot, per class (seconds):
+        # well below client timeouts, so a client hears "busy" instead of giving up
+        self.deadlines = {
+            "interactive": float(os.getenv("ADMISSION_DEADLINE_INTERACTIVE", "5")),
+            "analyze": float(os.getenv("ADMISSION_DEADLINE_ANALYZE", "15")),
+            "bulk": float(os.getenv("ADMISSION_DEADLINE_BULK", "30")),
+        }
+        self.in_flight = Counter()  # class -> running requests
+        self._queue = []  # sorted (priority, seq, class, future)
+        self._seq = itertools.count()
+        self._service_s = 1.0  # moving average of a request's run time
+        self.stats_counts = Counter()
+        self.wait_stats = {"waited": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+
+    # --- Capacity ---
+
+    def _has_slot(self, cls: str) -> bool:
+        if self.max_in_flight <= 0:
+            return True
+        priority = PRIORITIES[cls]
+        return all(
+            sum(self.in_flight[c] for c, p in PRIORITIES.items() if p >= PRIORITIES[level]) < self.class_slots[level]
+            for level in PRIORITIES if PRIORITIES[level] <= priority
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely drained (what a rejected client should wait)."""
+        return max(1, math.ceil((len(self._queue) + 1) * self._service_s / max(1, self.max_in_flight)))
+
+    def _reject(self, cls: str, outcome: str, message: str, status_code: int):
+        self.stats_counts[outcome] += 1
+        ADMISSION.inc(priority=cls, outcome=outcome)
+        return Overloaded(message, status_code=status_code, retry_after=self.retry_after())
+
+    def _dispatch(self):
+        """Hand free slots to the most urgent waiters that fit (a class at its share doesn't block the others)."""
+        for entry in list(self._queue):
+            _, _, cls, waiter = entry
+            if waiter.done():
+                self._queue.remove(entry)
+            elif self._has_slot(cls):
+                self._queue.remove(entry)
+                self.in_flight[cls] += 1
+                waiter.set_result(True)
+
+    # --- Admission ---
+
+    def _prune(self):
+        """Drops waiters that already gave up (deadline, client gone) but haven't left the queue yet."""
+        if any(entry[3].done() for entry in self._queue):
+            self._queue = [entry for entry in self._queue if not entry[3].done()]
+
+    def _queue_full_for(self, priority: int) -> bool:
+        """The queue is full and holds nothing less urgent to shed for this request."""
+        self._prune()
+        return len(self._queue) >= self.max_queue and (not self._queue or self._queue[-1][0] <= priority)
+
+    def check(self, cls: str):
+        """Fast rejection only (no waiting): raises Overloaded when a request of this class could not even queue."""
+        if not self._has_slot(cls) and self._queue_full_for(PRIORITIES[cls]):
+            raise self._reject(cls, "queue_full", "Server busy: the request queue is full.", 429)
+
+    async def admit(self, cls: str):
+        """Waits for a slot (the caller must release() it); raises Overloaded instead of waiting too long."""
+        priority = PRIORITIES[cls]
+        # Waiters only queue while their class has no slot, so a free one is this request's to take
+        if self._has_slot(cls):
+            self._admitted(cls)
+            return
+        if self._queue_full_for(priority):
+            raise self._reject(cls, "queue_full", "Server busy: the request queue is full.", 429)
+        if len(self._queue) >= self.max_queue:
+            # Shed the least urgent, newest waiter to make room (all still waiting: just pruned)
+            least = self._queue[-1]
+            self._queue.remove(least)
+            least[3].set_exception(self._reject(least[2], "shed", "Server busy: dropped for more urgent requests.", 503))
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), cls, waiter)
+        bisect.insort(self._queue, entry)  # (priority, seq) is unique: the future is never compared
+        started = time.perf_counter()
+        try:
+            with stage("admission_queue"):
+                await asyncio.wait_for(waiter, timeout=self.deadlines[cls])
+        except asyncio.TimeoutError:
+            self._abandon(entry)
+            raise self._reject(cls, "deadline", f"Server busy: no capacity within {self.deadlines[cls]:g}s.", 503)
+        except asyncio.CancelledError:
+            # The client went away
+            self._abandon(entry)
+            raise
+        waited_ms = (time.perf_counter() - started) * 1000
+        self.wait_stats["waited"] += 1
+        self.wait_stats["total_wait_ms"] += waited_ms
+        self.wait_stats["max_wait_ms"] = max(self.wait_stats["max_wait_ms"], waited_ms)
+        self.stats_counts["admitted"] += 1
+        ADMISSION.inc(priority=cls, outcome="admitted")
+
+    def _admitted(self, cls: str):
+        self.in_flight[cls] += 1
+        self.stats_counts["admitted"] += 1
+        ADMISSION.inc(priority=cls, outcome="admitted")
+
+    def _abandon(self, entry: tuple):
+        """A waiter that stopped waiting leaves the queue, or gives back the slot it was handed meanwhile."""
+        waiter = entry[3]
+        if entry in self._queue:
+            self._queue.remove(entry)
+        elif waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+            self.release(entry[2])
+
+    def release(self, cls: str, seconds: float = None):
+        self.in_flight[cls] -= 1
+        if seconds is not None:
+            self._service_s = 0.8 * self._service_s + 0.2 * seconds
+        self._dispatch()
+
+    async def admit_eventually(self, cls: str):
+        """For durable background work: turned away, it backs off for Retry-After and asks again."""
+        while True:
+            try:
+                return await self.admit(cls)
+            except Overloaded as e:
+                await asyncio.sleep(e.retry_after)
+
+    @asynccontextmanager
+    async def slot(self, cls: str, patient: bool = False):
+        await (self.admit_eventually(cls) if patient else self.admit(cls))
+        token = PRIORITY.set(PRIORITIES[cls])
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            PRIORITY.reset(token)
+            self.release(cls, time.perf_counter() - started)
+
+    async def run(self, cls: str, fn, *args, patient: bool = False):
+        async with self.slot(cls, patient):
+            return await fn(*args)
+
+    def stats(self) -> dict:
+        waited = self.wait_stats["waited"]
+        return {
+            "max_in_flight": self.max_in_flight,
+            "class_slots": self.class_slots,
+            "max_queue": self.max_queue,
+            "deadlines_s": self.deadlines,
+            "in_flight": {cls: self.in_flight[cls] for cls in PRIORITIES},
+            "queued": {cls: sum(1 for *_, c, w in self._queue if c == cls and not w.done()) for cls in PRIORITIES},
+            "outcomes": dict(self.stats_counts),
+            "avg_queue_wait_ms": round(self.wait_stats["total_wait_ms"] / waited, 1) if waited else 0.0,
+            "max_queue_wait_ms": round(self.wait_stats["max_wait_ms"], 1),
+            "avg_service_s": round(self._service_s, 3),
+            "retry_after_s": self.retry_after(),
+        }
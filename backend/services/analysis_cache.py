@@ -0,0 +1,134 @@
+# backend/services/analysis_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from backend.utils.logger import logger
+from backend.utils.metrics import CACHE_LOOKUPS
+
+class AnalysisCache:
+    """
+    Two-tier cache of AnalysisResult dicts, keyed by content hash.
+    Tier 1: in-process LRU. Tier 2: SQLite file next to the Chroma DB.
+    """
+
+    def __init__(self):
+        self.path = os.getenv("ANALYSIS_CACHE_PATH", "./data/analysis_cache.sqlite3")
+        self.memory_items = int(os.getenv("ANALYSIS_CACHE_MEMORY_ITEMS", "1024"))
+        self.disk_items = int(os.getenv("ANALYSIS_CACHE_DISK_ITEMS", "100000"))
+        # Seconds before an entry expires (0 = never)
+        self.ttl = float(os.getenv("ANALYSIS_CACHE_TTL", str(30 * 24 * 3600)))
+
+        self._lru = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON analysis_cache(accessed_at)")
+        self.db.commit()
+        logger.info("🗃️ Analysis cache ready.")
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        # Same document modulo unicode form and whitespace = same key
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    @classmethod
+    def make_key(cls, text: str, model: str, prompt_version: str) -> str:
+        payload = f"{model}\x00{prompt_version}\x00{cls.normalize(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl > 0 and now - stored_at > self.ttl
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            # 1. Memory tier
+            entry = self._lru.get(key)
+            if entry and not self._expired(entry[0], now):
+                self._lru.move_to_end(key)
+                self.hits["memory"] += 1
+                CACHE_LOOKUPS.inc(result="hit_memory")
+                return entry[1]
+
+            # 2. Disk tier
+            row = self.db.execute(
+                "SELECT result, stored_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and not self._expired(row[1], now):
+                result = json.loads(row[0])
+                self.db.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                self.db.commit()
+                self._remember(key, row[1], result)
+                self.hits["disk"] += 1
+                CACHE_LOOKUPS.inc(result="hit_disk")
+                return result
+
+            self.misses += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def put(self, key: str, result: dict):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, result)
+            self.db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, result, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now),
+            )
+            self.db.commit()
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= 100:
+                self._prune(now)
+
+    def _remember(self, key: str, stored_at: float, result: dict):
+        self._lru[key] = (stored_at, result)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.memory_items:
+            self._lru.popitem(last=False)
+
+    def _prune(self, now: float):
+        """Drop expired rows, then the least recently used ones above the size cap."""
+        self._puts_since_prune = 0
+        if self.ttl > 0:
+            self.db.execute("DELETE FROM analysis_cache WHERE stored_at < ?", (now - self.ttl,))
+        self.db.execute("""
+            DELETE FROM analysis_cache WHERE key IN (
+                SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.disk_items,))
+        self.db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            disk_size = self.db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            lookups = self.misses + sum(self.hits.values())
+            return {
+                "hits_memory": self.hits["memory"],
+                "hits_disk": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": round(sum(self.hits.values()) / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._lru),
+                "disk_items": disk_size,
+            }
+
+    def close(self):
+        with self._lock:
+            self.db.close()
@@ -0,0 +1,57 @@
+# backend/services/analysis_plan.py
+
+# Selectable stages (AnalysisRequest.modules) and the result fields each one produces.
+# "all" (the default) runs everything and saves to memory; "fast" lets the
+# local classifier answer sentiment/intent and only escalates to the LLM when unsure.
+MODULE_FIELDS = {
+    "entities": ("entities",),
+    "sentiment": ("sentiment", "sentiment_score"),
+    "intent": ("intent",),
+    "summary": ("summary",),
+    "topics": ("topics",),
+}
+LLM_FIELDS = ("sentiment", "sentiment_score", "summary", "topics", "intent")
+MODULES = ("all", "fast", "memory", *MODULE_FIELDS)
+
+
+class AnalysisPlan:
+    """
+    The minimal set of stages one analysis request needs:
+    NER, an LLM call (restricted to the requested fields), the fast
+    classifier, and the memory write.
+    """
+
+    def __init__(self, modules: list = None):
+        modules = set(modules or ["all"])
+        unknown = modules - set(MODULES)
+        if unknown:
+            raise ValueError(f"Unknown module(s): {', '.join(sorted(unknown))}")
+        selected = modules & set(MODULE_FIELDS)
+        # ["fast"] or ["memory", "fast"] alone keep the full result
+        self.full = "all" in modules or not selected
+        self.fast = "fast" in modules
+        self.memory = self.full or "memory" in modules
+        if self.full:
+            self.fields = ("entities", *LLM_FIELDS)
+        else:
+            self.fields = tuple(f for m in MODULE_FIELDS if m in selected for f in MODULE_FIELDS[m])
+        self.llm_fields = tuple(f for f in LLM_FIELDS if f in self.fields)
+        # Summary/topics were asked for explicitly: the fast path can't produce them
+        self.wants_text = bool(selected & {"summary", "topics"})
+
+    @property
+    def needs_llm(self) -> bool:
+        return bool(self.llm_fields)
+
+    @property
+    def partial_llm(self) -> bool:
+        return self.needs_llm and len(self.llm_fields) < len(LLM_FIELDS)
+
+    @property
+    def signature(self) -> str:
+        """Identifies a partial LLM call in cache keys."""
+        return ",".join(self.llm_fields)
+
+    def project(self, result: dict) -> dict:
+        """Only the requested fields of a (possibly fuller) analysis (plus its cluster, if any)."""
+        return {**{f: result.get(f) for f in self.fields}, "cluster_id": result.get("cluster_id")}
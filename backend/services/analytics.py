@@ -0,0 +1,301 @@
+# backend/services/analytics.py
+import os
+import json
+import math
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from backend.services.lexical_index import normalize_entity
+
+DAY = 86400
+FOREVER = 10 ** 7  # epoch day far past any stored analysis
+SCORE_BINS = 20  # sentiment_score in [-1, 1] -> 20 bins of 0.1
+UNKNOWN = "unknown"
+# bucket -> SQL expression over the epoch `day` column (weeks start on Monday; day 0 was a Thursday)
+BUCKETS = {
+    "day": "date(day * 86400, 'unixepoch')",
+    "week": "date((day - (day + 3) % 7) * 86400, 'unixepoch')",
+    "month": "strftime('%Y-%m', day * 86400, 'unixepoch')",
+}
+
+
+def _score_bin(score):
+    if score is None:
+        return None
+    return min(int((max(-1.0, min(1.0, float(score))) + 1) * SCORE_BINS / 2), SCORE_BINS - 1)
+
+
+def _label(value) -> str:
+    return (value or "").strip().lower() or UNKNOWN
+
+
+@lru_cache(maxsize=4096)
+def month_start(day: int) -> int:
+    """Epoch day of the first day of `day`'s UTC month."""
+    return day - datetime.fromtimestamp(day * DAY, timezone.utc).day + 1
+
+
+def next_month_start(day: int) -> int:
+    return month_start(month_start(day) + 31)
+
+
+class AnalyticsStore:
+    """
+    Aggregates over stored analyses, updated as they are saved (no LLM,
+    no scan of Chroma): per UTC day x sentiment x intent counts and score
+    sums, plus score histograms and topic / entity frequencies kept both
+    per day and per month, so long windows read a few monthly rows and
+    only their partial edge months read daily rows. A small per-id table
+    makes re-saves and deletions exact (the old contribution is
+    subtracted first).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # grain: 'd' (period = epoch day) or 'm' (period = epoch day the month starts on)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS analytics_rows (
+                id TEXT PRIMARY KEY,
+                day INTEGER NOT NULL,
+                sentiment TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                score REAL,
+                terms TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS daily (
+                day INTEGER NOT NULL,
+                sentiment TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                scored INTEGER NOT NULL,
+                score_sum REAL NOT NULL,
+                PRIMARY KEY (day, sentiment, intent)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS score_counts (
+                grain TEXT NOT NULL,
+                period INTEGER NOT NULL,
+                sentiment TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                bin INTEGER NOT NULL,
+                n INTEGER NOT NULL,
+                PRIMARY KEY (grain, period, sentiment, intent, bin)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS term_counts (
+                kind TEXT NOT NULL,
+                grain TEXT NOT NULL,
+                period INTEGER NOT NULL,
+                term TEXT NOT NULL,
+                label TEXT NOT NULL,
+                sentiment TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                PRIMARY KEY (kind, grain, period, term, label, sentiment, intent)
+            ) WITHOUT ROWID;
+        """)
+        self.db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM analytics_rows").fetchone()[0]
+
+    def known(self, ids: list) -> set:
+        marks = ", ".join("?" for _ in ids)
+        with self._lock:
+            rows = self.db.execute(f"SELECT id FROM analytics_rows WHERE id IN ({marks})", ids).fetchall()
+        return {r[0] for r in rows}
+
+    def ids(self) -> set:
+        with self._lock:
+            return {r[0] for r in self.db.execute("SELECT id FROM analytics_rows")}
+
+    # --- Writes ---
+
+    def _apply(self, day: int, sentiment: str, intent: str, score, terms: dict, sign: int):
+        self.db.execute("""
+            INSERT INTO daily (day, sentiment, intent, n, scored, score_sum) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (day, sentiment, intent) DO UPDATE SET
+                n = n + excluded.n, scored = scored + excluded.scored, score_sum = score_sum + excluded.score_sum
+        """, (day, sentiment, intent, sign, sign if score is not None else 0, sign * (score or 0.0)))
+        periods = (("d", day), ("m", month_start(day)))
+        if score is not None:
+            self.db.executemany("""
+                INSERT INTO score_counts (grain, period, sentiment, intent, bin, n) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (grain, period, sentiment, intent, bin) DO UPDATE SET n = n + excluded.n
+            """, [(grain, period, sentiment, intent, _score_bin(score), sign) for grain, period in periods])
+        self.db.executemany("""
+            INSERT INTO term_counts (kind, grain, period, term, label, sentiment, intent, n) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (kind, grain, period, term, label, sentiment, intent) DO UPDATE SET n = n + excluded.n
+        """, [
+            (kind, grain, period, term, label, sentiment, intent, sign)
+            for kind, pairs in terms.items() for term, label in pairs for grain, period in periods
+        ])
+
+    def _remove(self, ids: list):
+        marks = ", ".join("?" for _ in ids)
+        rows = self.db.execute(
+            f"SELECT id, day, sentiment, intent, score, terms FROM analytics_rows WHERE id IN ({marks})", ids
+        ).fetchall()
+        for _, day, sentiment, intent, score, terms in rows:
+            self._apply(day, sentiment, intent, score, json.loads(terms), -1)
+        self.db.execute(f"DELETE FROM analytics_rows WHERE id IN ({marks})", ids)
+        return len(rows)
+
+    def upsert(self, ids: list, analyses: list, timestamps: list, entities: list = None):
+        """
+        Count analyses (re-saved ids replace their previous contribution).
+        `entities` holds one list of {"text", "label"} dicts per analysis.
+        """
+        entities = entities or [analysis.get("entities") or [] for analysis in analyses]
+        with self._lock:
+            self._remove(list(ids))
+            for doc_id, analysis, timestamp, ents in zip(ids, analyses, timestamps, entities):
+                day = int(timestamp // DAY)
+                sentiment, intent = _label(analysis.get("sentiment")), _label(analysis.get("intent"))
+                score = analysis.get("sentiment_score")
+                # Each topic / entity counts once per analysis
+                terms = {
+                    "topic": sorted({(t.strip().lower(), "") for t in analysis.get("topics") or [] if t and t.strip()}),
+                    "entity": sorted({(normalize_entity(e["text"]), e.get("label") or "")
+                                      for e in ents if isinstance(e, dict) and normalize_entity(e.get("text") or "")}),
+                }
+                self._apply(day, sentiment, intent, score, terms, 1)
+                self.db.execute(
+                    "INSERT INTO analytics_rows (id, day, sentiment, intent, score, terms) VALUES (?, ?, ?, ?, ?, ?)",
+                    (doc_id, day, sentiment, intent, score, json.dumps(terms)),
+                )
+            self.db.commit()
+
+    def delete(self, ids: list) -> int:
+        if not ids:
+            return 0
+        ids, removed = list(ids), 0
+        with self._lock:
+            # Chunked: a dropped month can hold more ids than SQLite binds at once
+            for start in range(0, len(ids), 500):
+                removed += self._remove(ids[start:start + 500])
+            self.db.commit()
+        return removed
+
+    def compact(self):
+        """Drop aggregate rows that deletions brought down to zero, then VACUUM."""
+        with self._lock:
+            for table in ("daily", "score_counts", "term_counts"):
+                self.db.execute(f"DELETE FROM {table} WHERE n <= 0")
+            self.db.commit()
+            self.db.execute("VACUUM")
+
+    # --- Reads ---
+
+    @staticmethod
+    def _days(since: float, until: float) -> tuple:
+        # [first, end) epoch days; a window ending at midnight excludes that day
+        first = int(since // DAY) if since is not None else 0
+        end = math.ceil(until / DAY) if until is not None else FOREVER
+        return first, end
+
+    @staticmethod
+    def _rollup(first: int, end: int) -> list:
+        """
+        (grain, from, to) ranges covering [first, end): whole months from
+        the monthly rows, the partial months at either edge from the daily
+        rows. Queried as separate primary-key range scans.
+        """
+        m0 = first if month_start(first) == first else next_month_start(first)
+        m1 = end if end >= FOREVER else month_start(end)
+        if m0 >= m1:
+            return [("d", first, end)]
+        ranges = [("m", m0, m1), ("d", first, m0), ("d", m1, end)]
+        return [r for r in ranges if r[1] < r[2]]
+
+    def _rollup_query(self, table: str, columns: str, ranges: list, prefix: str, prefix_params: list,
+                      labels: str, label_params: list) -> tuple:
+        parts, params = [], []
+        for grain, start, stop in ranges:
+            parts.append(f"SELECT {columns} FROM {table} WHERE {prefix}grain = ? AND period >= ? AND period < ?{labels}")
+            params += [*prefix_params, grain, start, stop, *label_params]
+        return " UNION ALL ".join(parts), params
+
+    @staticmethod
+    def _labels(sentiment: str, intent: str) -> tuple:
+        clauses, params = [], []
+        if sentiment:
+            clauses.append("sentiment = ?")
+            params.append(_label(sentiment))
+        if intent:
+            clauses.append("intent = ?")
+            params.append(_label(intent))
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def summary(self, since: float = None, until: float = None, bucket: str = "day",
+                sentiment: str = None, intent: str = None, top: int = 10) -> dict:
+        """
+        Breakdowns for [since, until) (whole UTC days): totals by sentiment
+        and intent, their cross-tab, a timeline, the score distribution and
+        the most frequent topics / entities.
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket '{bucket}'. Use one of {', '.join(BUCKETS)}.")
+        first, end = self._days(since, until)
+        labels, label_params = self._labels(sentiment, intent)
+        daily = f"day >= ? AND day < ?{labels}"
+        daily_params = [first, end, *label_params]
+        ranges = self._rollup(first, end)
+        scores, score_params = self._rollup_query("score_counts", "bin, n", ranges, "", [], labels, label_params)
+        with self._lock:
+            cells = self.db.execute(f"""
+                SELECT sentiment, intent, SUM(n), SUM(scored), SUM(score_sum) FROM daily
+                WHERE {daily} GROUP BY sentiment, intent HAVING SUM(n) > 0
+            """, daily_params).fetchall()
+            timeline = self.db.execute(f"""
+                SELECT {BUCKETS[bucket]} AS b, sentiment, SUM(n) FROM daily
+                WHERE {daily} GROUP BY b, sentiment HAVING SUM(n) > 0 ORDER BY b
+            """, daily_params).fetchall()
+            bins = self.db.execute(f"""
+                SELECT bin, SUM(n) FROM ({scores}) GROUP BY bin HAVING SUM(n) > 0 ORDER BY bin
+            """, score_params).fetchall()
+            terms = {}
+            for kind in ("topic", "entity"):
+                counts, params = self._rollup_query(
+                    "term_counts", "term, label, n", ranges, "kind = ? AND ", [kind], labels, label_params,
+                )
+                terms[kind] = self.db.execute(f"""
+                    SELECT term, label, SUM(n) AS total FROM ({counts})
+                    GROUP BY term, label HAVING total > 0 ORDER BY total DESC, term LIMIT ?
+                """, [*params, top]).fetchall()
+
+        total = sum(c[2] for c in cells)
+        by_sentiment, by_intent, crosstab = {}, {}, {}
+        for s, i, n, _, _ in cells:
+            by_sentiment[s] = by_sentiment.get(s, 0) + n
+            by_intent[i] = by_intent.get(i, 0) + n
+            crosstab.setdefault(i, {})[s] = n
+        scored = sum(c[3] for c in cells)
+        series = {}
+        for b, s, n in timeline:
+            series.setdefault(b, {"bucket": b})[s] = n
+        width = 2 / SCORE_BINS
+        return {
+            "since": since, "until": until, "bucket": bucket,
+            "total": total,
+            "by_sentiment": by_sentiment,
+            "by_intent": by_intent,
+            "intent_by_sentiment": crosstab,
+            "timeline": list(series.values()),
+            "score": {
+                "count": scored,
+                "mean": round(sum(c[4] for c in cells) / scored, 3) if scored else None,
+                "histogram": [{"from": round(-1 + b * width, 2), "to": round(-1 + (b + 1) * width, 2), "count": n}
+                              for b, n in bins],
+            },
+            "top_topics": [{"topic": t, "count": n} for t, _, n in terms["topic"]],
+            "top_entities": [{"entity": t, "label": label or None, "count": n} for t, label, n in terms["entity"]],
+        }
+
+    def close(self):
+        with self._lock:
+            self.db.close()
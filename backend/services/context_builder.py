@@ -0,0 +1,96 @@
+# backend/services/context_builder.py
+import os
+from datetime import datetime
+from backend.services.llm_provider import INVALID_JSON_SUMMARY
+from backend.services.lexical_index import tokenize, STOPWORDS
+from backend.utils.chunker import split_into_chunks, estimate_tokens
+
+
+class ContextBuilder:
+    """
+    Packs retrieved analyses into the chat prompt under a token budget.
+    Documents are split into passages, the passages most relevant to the
+    question are kept, near-duplicates are dropped, and a document that
+    doesn't fit in full is represented by its stored summary.
+    """
+
+    def __init__(self):
+        # Estimated tokens of context per chat prompt (0 = no limit, whole documents)
+        self.token_budget = int(os.getenv("CHAT_CONTEXT_TOKENS", "1200"))
+        self.passage_tokens = int(os.getenv("CHAT_PASSAGE_TOKENS", "200"))
+        # Jaccard similarity of 3-word shingles above which a passage counts as a duplicate
+        self.dedup_threshold = float(os.getenv("CHAT_DEDUP_THRESHOLD", "0.8"))
+
+    @staticmethod
+    def _terms(text: str) -> set:
+        return {t for t in tokenize(text) if t not in STOPWORDS}
+
+    @staticmethod
+    def _shingles(text: str) -> set:
+        words = tokenize(text)
+        return {tuple(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+    @staticmethod
+    def _jaccard(a: set, b: set) -> float:
+        return len(a & b) / len(a | b) if a and b else 0.0
+
+    @staticmethod
+    def _header(metadata: dict) -> str:
+        parts = [metadata.get("sentiment"), metadata.get("intent")]
+        if isinstance(metadata.get("timestamp"), (int, float)):
+            parts.append(datetime.fromtimestamp(metadata["timestamp"]).strftime("%Y-%m-%d"))
+        return ", ".join(p for p in parts if p)
+
+    def build(self, question: str, documents: list, metadatas: list) -> tuple:
+        """
+        `documents`/`metadatas` are retrieval results, best first.
+        Returns (context_text, stats).
+        """
+        if self.token_budget <= 0:
+            context = "\n\n".join(documents)
+            return context, {"documents": len(documents), "passages": len(documents),
+                             "summaries": 0, "context_tokens": estimate_tokens(context) if context else 0}
+
+        # 1. Candidate units: whole short documents, or summary + passages of long ones
+        question_terms = self._terms(question)
+        units = []  # (score, doc_rank, position, kind, text, shingles)
+        for rank, (doc, metadata) in enumerate(zip(documents, metadatas)):
+            rank_prior = 1.0 / (rank + 1)
+            if estimate_tokens(doc) <= self.passage_tokens:
+                passages = [doc]
+            else:
+                passages = split_into_chunks(doc, self.passage_tokens)
+                summary = (metadata or {}).get("summary")
+                if summary and summary != INVALID_JSON_SUMMARY:
+                    # Cheap overview of the whole document: taken before its passages
+                    units.append((rank_prior + 1.0, rank, -1, "summary", summary, self._shingles(summary)))
+            for position, passage in enumerate(passages):
+                overlap = len(question_terms & self._terms(passage)) / len(question_terms) if question_terms else 0.0
+                units.append((overlap + rank_prior, rank, position, "passage", passage, self._shingles(passage)))
+
+        # 2. Greedy selection by score under the budget, skipping near-duplicates
+        selected, used = [], 0
+        for unit in sorted(units, key=lambda u: u[0], reverse=True):
+            cost = estimate_tokens(unit[4])
+            if used + cost > self.token_budget:
+                continue
+            if any(self._jaccard(unit[5], s[5]) >= self.dedup_threshold for s in selected):
+                continue
+            selected.append(unit)
+            used += cost
+
+        # 3. Render grouped by document, in retrieval order
+        blocks = []
+        for rank in sorted({u[1] for u in selected}):
+            lines = [f"[{len(blocks) + 1}] ({self._header(metadatas[rank] or {})})"]
+            for unit in sorted((u for u in selected if u[1] == rank), key=lambda u: u[2]):
+                lines.append(f"Summary: {unit[4]}" if unit[3] == "summary" else unit[4])
+            blocks.append("\n".join(lines))
+
+        stats = {
+            "documents": len(blocks),
+            "passages": sum(1 for u in selected if u[3] == "passage"),
+            "summaries": sum(1 for u in selected if u[3] == "summary"),
+            "context_tokens": used,
+        }
+        return "\n\n".join(blocks), stats
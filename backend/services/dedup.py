@@ -0,0 +1,324 @@
+# backend/services/dedup.py
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+
+NUM_PERM = 128
+BAND_ROWS = 4  # 32 bands of 4: pairs with Jaccard >= 0.6 share a bucket ~99% of the time
+SHINGLE_CHARS = 5
+EXCERPT_CHARS = 300
+_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(0x5EED)
+_A = _rng.randint(1, 1 << 31, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, NUM_PERM).astype(np.uint64)
+_NEGATIONS = {"not", "no", "never", "nothing", "none", "nobody", "neither", "nor", "without", "cannot"}
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def signature(text: str) -> np.ndarray:
+    """MinHash of the text's character 5-gram shingles (NUM_PERM uint32 values)."""
+    norm = normalize(text)
+    shingles = {norm[i:i + SHINGLE_CHARS] for i in range(max(1, len(norm) - SHINGLE_CHARS + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p per permutation, minimum over the shingles
+    return (((np.outer(_A, hashes) + _B[:, None]) % _PRIME) & 0xFFFFFFFF).min(axis=1).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> list:
+    """(band, bucket) pairs: texts sharing any of them are LSH candidates."""
+    return [
+        (band, int.from_bytes(hashlib.blake2b(sig[band * BAND_ROWS:(band + 1) * BAND_ROWS].tobytes(), digest_size=8).digest(), "big", signed=True))
+        for band in range(NUM_PERM // BAND_ROWS)
+    ]
+
+
+def guard(text: str) -> str:
+    """
+    Negations and numbers: near-identical texts that differ in one of these
+    ("works" / "never works", "2 days" / "20 days") mean different things.
+    """
+    words = re.sub(r"n t\b", " not", normalize(text)).split()
+    return " ".join(sorted({w for w in words if w in _NEGATIONS or w.isdigit()}))
+
+
+def cosine(a, b) -> float:
+    a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    return float(np.dot(a, b) / ((np.linalg.norm(a) * np.linalg.norm(b)) or 1.0))
+
+
+class DedupIndex:
+    """
+    Near-duplicate clusters of analyzed texts. Each cluster is one full LLM
+    analysis (its representative); later texts close enough to it are
+    linked as members and reuse that analysis instead of calling the LLM.
+    Candidates come from MinHash LSH over character shingles (lexical
+    near-duplicates) or from the vector store (paraphrases), and are only
+    accepted above an embedding-similarity threshold.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # Estimated shingle Jaccard for a lexical candidate, confirmed by embedding cosine
+        self.min_jaccard = float(os.getenv("DEDUP_JACCARD", "0.8"))
+        self.min_cosine = float(os.getenv("DEDUP_COSINE", "0.85"))
+        # Paraphrases without shingle overlap: embedding cosine alone (0 = off)
+        self.semantic_cosine = float(os.getenv("DEDUP_SEMANTIC_COSINE", "0.97"))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS clusters (
+                id TEXT PRIMARY KEY,
+                excerpt TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                guard TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS members (
+                doc_id TEXT PRIMARY KEY,
+                cluster_id TEXT NOT NULL,
+                excerpt TEXT NOT NULL,
+                similarity REAL NOT NULL,
+                route TEXT NOT NULL,
+                added REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS members_cluster ON members (cluster_id, added);
+            CREATE TABLE IF NOT EXISTS lsh (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                cluster_id TEXT NOT NULL,
+                PRIMARY KEY (band, bucket, cluster_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS lsh_cluster ON lsh (cluster_id);
+        """)
+        self.db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM clusters").fetchone()[0]
+
+    @staticmethod
+    def probe(text: str, vector) -> dict:
+        """What matching needs to know about one text."""
+        return {"signature": signature(text), "guard": guard(text), "vector": np.asarray(vector, dtype=np.float32)}
+
+    # --- Matching ---
+
+    def _candidates(self, sig: np.ndarray) -> list:
+        keys = band_keys(sig)
+        values = ", ".join("(?, ?)" for _ in keys)
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT DISTINCT cluster_id FROM lsh WHERE (band, bucket) IN (VALUES {values})",
+                [v for key in keys for v in key],
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def _load(self, ids: list) -> dict:
+        if not ids:
+            return {}
+        marks = ", ".join("?" for _ in ids)
+        with self._lock:
+            rows = self.db.execute(
+                f"SELECT id, analysis, guard, signature, vector FROM clusters WHERE id IN ({marks})", list(ids)
+            ).fetchall()
+        return {
+            cluster_id: {
+                "analysis": json.loads(analysis),
+                "guard": guard_terms,
+                "signature": np.frombuffer(sig, dtype=np.uint32),
+                "vector": np.frombuffer(vector, dtype=np.float32),
+            }
+            for cluster_id, analysis, guard_terms, sig, vector in rows
+        }
+
+    def compare(self, probe: dict, other: dict) -> tuple:
+        """(route, similarity) if `other` is a near-duplicate of `probe`, else None."""
+        if probe["guard"] != other["guard"]:
+            return None
+        similarity = cosine(probe["vector"], other["vector"])
+        if similarity >= self.min_cosine and float(np.mean(probe["signature"] == other["signature"])) >= self.min_jaccard:
+            return "lexical", similarity
+        if 0 < self.semantic_cosine <= similarity:
+            return "semantic", similarity
+        return None
+
+    def match(self, probe: dict, neighbours: list = ()) -> dict:
+        """
+        Best existing cluster for a text: LSH candidates plus `neighbours`
+        (ids of the nearest stored analyses, for the semantic route).
+        Returns {"cluster_id", "analysis", "similarity", "route"} or None.
+        """
+        clusters = self._load(list(dict.fromkeys([*self._candidates(probe["signature"]), *neighbours])))
+        best = None
+        for cluster_id, cluster in clusters.items():
+            verdict = self.compare(probe, cluster)
+            if verdict and (best is None or verdict[1] > best["similarity"]):
+                best = {"cluster_id": cluster_id, "analysis": cluster["analysis"], "route": verdict[0], "similarity": verdict[1]}
+        return best
+
+    def group(self, probes: list) -> list:
+        """
+        Near-duplicates among texts that are analyzed together: for each
+        probe, the index of an earlier probe it duplicates (or None).
+        """
+        buckets, leaders = {}, [None] * len(probes)
+        for i, probe in enumerate(probes):
+            keys = band_keys(probe["signature"])
+            seen = []
+            for key in keys:
+                seen += [j for j in buckets.get(key, ()) if j not in seen]
+            for j in seen:
+                if self.compare(probe, probes[j]):
+                    leaders[i] = j
+                    break
+            if leaders[i] is None:
+                for key in keys:
+                    buckets.setdefault(key, []).append(i)
+        return leaders
+
+    # --- Writes ---
+
+    def add_clusters(self, ids: list, texts: list, analyses: list, probes: list, timestamp: float = None):
+        """New clusters with these analyses as representatives (a re-analysis refreshes the analysis)."""
+        now = timestamp or time.time()
+        rows = [
+            (cluster_id, text[:EXCERPT_CHARS], json.dumps(analysis), probe["guard"],
+             probe["signature"].tobytes(), probe["vector"].tobytes(), now, now)
+            for cluster_id, text, analysis, probe in zip(ids, texts, analyses, probes)
+        ]
+        with self._lock:
+            self.db.executemany("""
+                INSERT INTO clusters (id, excerpt, analysis, guard, signature, vector, size, created, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET analysis = excluded.analysis, last_seen = excluded.last_seen
+            """, rows)
+            self.db.executemany(
+                "INSERT OR IGNORE INTO lsh (band, bucket, cluster_id) VALUES (?, ?, ?)",
+                [(band, bucket, cluster_id) for cluster_id, probe in zip(ids, probes)
+                 for band, bucket in band_keys(probe["signature"])],
+            )
+            self.db.commit()
+
+    def link(self, ids: list, texts: list, cluster_ids: list, similarities: list, routes: list,
+             timestamp: float = None) -> int:
+        """Record texts as members of their clusters; returns how many were new."""
+        now = timestamp or time.time()
+        added = 0
+        with self._lock:
+            for doc_id, text, cluster_id, similarity, route in zip(ids, texts, cluster_ids, similarities, routes):
+                if doc_id == cluster_id:
+                    continue
+                inserted = self.db.execute("""
+                    INSERT INTO members (doc_id, cluster_id, excerpt, similarity, route, added) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (doc_id) DO NOTHING
+                """, (doc_id, cluster_id, text[:EXCERPT_CHARS], round(similarity, 4), route, now)).rowcount
+                if inserted:
+                    self.db.execute("UPDATE clusters SET size = size + 1, last_seen = ? WHERE id = ?", (now, cluster_id))
+                    added += 1
+            self.db.commit()
+        return added
+
+    def _unlink(self, where: str, params: list) -> list:
+        rows = self.db.execute(f"SELECT doc_id, cluster_id FROM members WHERE {where}", params).fetchall()
+        self.db.executemany("DELETE FROM members WHERE doc_id = ?", [(doc_id,) for doc_id, _ in rows])
+        self.db.executemany("UPDATE clusters SET size = size - 1 WHERE id = ?", [(cluster_id,) for _, cluster_id in rows])
+        return [doc_id for doc_id, _ in rows]
+
+    def delete_members(self, ids: list):
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            with self._lock:
+                self._unlink(f"doc_id IN ({', '.join('?' for _ in chunk)})", chunk)
+                self.db.commit()
+
+    def expire(self, cutoff: float) -> list:
+        """Drop members added before `cutoff` and clusters not seen since; returns the removed member ids."""
+        with self._lock:
+            removed = self._unlink("added < ?", [cutoff])
+            stale = [(r[0],) for r in self.db.execute("SELECT id FROM clusters WHERE last_seen < ?", (cutoff,))]
+            self.db.executemany("DELETE FROM lsh WHERE cluster_id = ?", stale)
+            self.db.executemany("DELETE FROM clusters WHERE id = ?", stale)
+            self.db.commit()
+        return removed
+
+    def member_ids(self) -> set:
+        with self._lock:
+            return {r[0] for r in self.db.execute("SELECT doc_id FROM members")}
+
+    # --- Queries ---
+
+    def clusters(self, limit: int = 20, offset: int = 0, min_size: int = 2) -> list:
+        """Largest clusters first."""
+        with self._lock:
+            rows = self.db.execute("""
+                SELECT id, excerpt, analysis, size, created, last_seen FROM clusters
+                WHERE size >= ? ORDER BY size DESC, last_seen DESC LIMIT ? OFFSET ?
+            """, (min_size, limit, offset)).fetchall()
+        return [
+            {"cluster_id": cluster_id, "size": size, "text": excerpt, "analysis": json.loads(analysis),
+             "created": created, "last_seen": last_seen}
+            for cluster_id, excerpt, analysis, size, created, last_seen in rows
+        ]
+
+    def cluster(self, cluster_id: str, limit: int = 100) -> dict:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT excerpt, analysis, size, created, last_seen FROM clusters WHERE id = ?", (cluster_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            members = self.db.execute("""
+                SELECT doc_id, excerpt, similarity, route, added FROM members
+                WHERE cluster_id = ? ORDER BY added DESC LIMIT ?
+            """, (cluster_id, limit)).fetchall()
+        excerpt, analysis, size, created, last_seen = row
+        return {
+            "cluster_id": cluster_id, "size": size, "text": excerpt, "analysis": json.loads(analysis),
+            "created": created, "last_seen": last_seen,
+            "members": [
+                {"id": doc_id, "text": text, "similarity": similarity, "route": route, "added": added}
+                for doc_id, text, similarity, route, added in members
+            ],
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            clusters, largest = self.db.execute("SELECT COUNT(*), COALESCE(MAX(size), 0) FROM clusters").fetchone()
+            routes = dict(self.db.execute("SELECT route, COUNT(*) FROM members GROUP BY route").fetchall())
+        duplicates = sum(routes.values())
+        return {
+            "clusters": clusters,
+            "largest_cluster": largest,
+            "duplicates": duplicates,
+            # Every linked duplicate is one LLM analysis that was never generated
+            "llm_calls_saved": duplicates,
+            "duplicate_rate": round(duplicates / (clusters + duplicates), 3) if clusters + duplicates else None,
+            "by_route": routes,
+            "thresholds": {"jaccard": self.min_jaccard, "cosine": self.min_cosine, "semantic_cosine": self.semantic_cosine},
+        }
+
+    def compact(self):
+        with self._lock:
+            self.db.execute("DELETE FROM members WHERE cluster_id NOT IN (SELECT id FROM clusters)")
+            self.db.execute("UPDATE clusters SET size = 1 + (SELECT COUNT(*) FROM members WHERE cluster_id = clusters.id)")
+            self.db.commit()
+            self.db.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            self.db.close()
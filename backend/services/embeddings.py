@@ -0,0 +1,139 @@
+# backend/services/embeddings.py
+import os
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from chromadb.utils import embedding_functions
+from backend.utils.logger import logger
+
+BACKENDS = ("sentence-transformers", "onnx")
+
+def _load_backend(name: str, model_name: str):
+    """
+    sentence-transformers: the original PyTorch model.
+    onnx: Chroma's bundled ONNX Runtime export of all-MiniLM-L6-v2 (CPU, no torch).
+    """
+    if name == "sentence-transformers":
+        return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+    if name == "onnx":
+        if model_name != "all-MiniLM-L6-v2":
+            logger.warning(f"⚠️ ONNX backend only ships all-MiniLM-L6-v2, ignoring EMBEDDING_MODEL={model_name}")
+        return embedding_functions.ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{name}'. Use one of: {', '.join(BACKENDS)}")
+
+
+class VectorCache:
+    """
+    Persistent text-hash -> float32 vector cache.
+    Vectors live in one growing memory-mapped file; a SQLite table maps
+    each hash to its row.
+    """
+
+    def __init__(self, directory: str, initial_capacity: int = 4096):
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS rows (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self.db.commit()
+
+        meta = dict(self.db.execute("SELECT key, value FROM meta").fetchall())
+        self.dim = meta.get("dim")
+        self.capacity = meta.get("capacity", initial_capacity)
+        self.rows = dict(self.db.execute("SELECT hash, row FROM rows").fetchall())
+        self._mmap = self._open() if self.dim else None
+
+    def _open(self):
+        mode = "r+" if os.path.exists(self.vectors_path) else "w+"
+        return np.memmap(self.vectors_path, dtype=np.float32, mode=mode, shape=(self.capacity, self.dim))
+
+    def _grow(self, needed: int):
+        while self.capacity < needed:
+            self.capacity *= 2
+        self._mmap.flush()
+        del self._mmap
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(self.capacity * self.dim * 4)
+        self._mmap = self._open()
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('capacity', ?)", (self.capacity,))
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get_many(self, keys: list) -> dict:
+        with self._lock:
+            return {k: np.array(self._mmap[self.rows[k]]) for k in keys if k in self.rows}
+
+    def put_many(self, items: dict):
+        if not items:
+            return
+        with self._lock:
+            if self._mmap is None:
+                self.dim = len(next(iter(items.values())))
+                self._mmap = self._open()
+                self.db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                                    [("dim", self.dim), ("capacity", self.capacity)])
+            new = [k for k in items if k not in self.rows]
+            if len(self.rows) + len(new) > self.capacity:
+                self._grow(len(self.rows) + len(new))
+            for k in new:
+                row = len(self.rows)
+                self._mmap[row] = np.asarray(items[k], dtype=np.float32)
+                self.rows[k] = row
+            self._mmap.flush()
+            self.db.executemany("INSERT INTO rows VALUES (?, ?)", [(k, self.rows[k]) for k in new])
+            self.db.commit()
+
+
+class CachedEmbeddingFunction(embedding_functions.EmbeddingFunction):
+    """
+    Drop-in Chroma embedding function: pluggable backend, fixed-size
+    batches and a persistent vector cache in front of the model.
+    """
+
+    def __init__(self):
+        self.backend_name = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+        self.model_name = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+        self.max_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+        self.backend = _load_backend(self.backend_name, self.model_name)
+
+        self.cache = None
+        if os.getenv("EMBEDDING_CACHE", "1") != "0":
+            cache_root = os.getenv("EMBEDDING_CACHE_DIR", "./data/embedding_cache")
+            self.cache = VectorCache(os.path.join(cache_root, f"{self.backend_name}-{self.model_name}"))
+        self.hits = 0
+        self.misses = 0
+        logger.info(f"🔢 Embeddings: {self.backend_name} ({self.model_name}), cache {'on' if self.cache else 'off'}")
+
+    def __call__(self, input):
+        texts = list(input)
+        keys = [VectorCache.key(t) for t in texts]
+        found = self.cache.get_many(keys) if self.cache else {}
+
+        # Embed only what the cache doesn't know, each distinct text once
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        text_of = dict(zip(keys, texts))
+        computed = {}
+        for i in range(0, len(missing), self.max_batch_size):
+            batch = missing[i:i + self.max_batch_size]
+            vectors = self.backend([text_of[k] for k in batch])
+            computed.update({k: np.asarray(v, dtype=np.float32) for k, v in zip(batch, vectors)})
+        if self.cache:
+            self.cache.put_many(computed)
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        found.update(computed)
+        return [found[k] for k in keys]
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend_name,
+            "model": self.model_name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_vectors": len(self.cache.rows) if self.cache else 0,
+        }
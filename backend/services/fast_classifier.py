@@ -0,0 +1,168 @@
+# backend/services/fast_classifier.py
+import os
+import time
+import threading
+import numpy as np
+from backend.services.lexical_index import tokenize
+from backend.utils.logger import logger
+
+SENTIMENTS = ("positive", "neutral", "negative")
+INTENTS = ("informational", "complaint")
+
+POSITIVE_WORDS = frozenset(
+    "good great excellent love loved thanks thank works working perfect happy amazing awesome fast "
+    "helpful recommend nice fine quick easy smooth satisfied glad wonderful best".split()
+)
+NEGATIVE_WORDS = frozenset(
+    "bad broken terrible awful slow late refund crash crashes crashed hate worst disappointed problem "
+    "problems issue issues error errors fail fails failed poor angry useless wrong missing damaged "
+    "unacceptable rude cancel cancelled".split()
+)
+COMPLAINT_WORDS = NEGATIVE_WORDS | frozenset("complaint complain still waiting fix unresolved again".split())
+NEGATIONS = frozenset("not no never dont don't doesnt doesn't didnt didn't isnt isn't wasnt wasn't cant can't".split())
+
+
+def _lexicon_scores(text: str) -> tuple:
+    """(positive hits, negative hits, complaint cues), with 'not good' counted as negative."""
+    words = tokenize(text)
+    pos = neg = cues = 0
+    for i, w in enumerate(words):
+        negated = any(p in NEGATIONS for p in words[max(0, i - 2):i])
+        if w in POSITIVE_WORDS:
+            pos, neg = (pos, neg + 1) if negated else (pos + 1, neg)
+        elif w in NEGATIVE_WORDS:
+            pos, neg = (pos + 1, neg) if negated else (pos, neg + 1)
+        if w in COMPLAINT_WORDS and not negated:
+            cues += 1
+    return pos, neg, cues
+
+
+class FastClassifier:
+    """
+    Cheap CPU sentiment/intent classifier for the fast analysis path.
+
+    Primary model: nearest centroid over the embeddings of past LLM-labeled
+    analyses in Chroma (trained once at startup, refreshed as history grows).
+    Fallback until there is enough history: a small sentiment lexicon.
+    """
+
+    VERSION = "fast-v1"
+
+    def __init__(self):
+        self.min_examples = int(os.getenv("FAST_MIN_EXAMPLES", "20"))
+        self.max_train = int(os.getenv("FAST_MAX_TRAIN", "20000"))
+        self.retrain_every = int(os.getenv("FAST_RETRAIN_EVERY", "200"))
+        # Softmax temperature over cosine similarities (smaller = more decisive)
+        self.temperature = float(os.getenv("FAST_TEMPERATURE", "0.05"))
+
+        self.centroids = {}  # head -> (labels, matrix)
+        self.trained_on = 0
+        self.trained_at = None
+        self._new_labels = 0
+        self._training = threading.Lock()
+
+    # --- Training ---
+
+    def train(self, memory, page_size: int = 1000):
+        """Per-label centroids of stored embeddings. Rows from the fast path itself are skipped."""
+        if not self._training.acquire(blocking=False):
+            return
+        try:
+            started = time.perf_counter()
+            sums = {"sentiment": {}, "intent": {}}
+            counts = {"sentiment": {}, "intent": {}}
+            seen = 0
+            for page in memory.iter_pages(["embeddings", "metadatas"], page_size):
+                if seen >= self.max_train:
+                    break
+                for vector, metadata in zip(page["embeddings"], page["metadatas"]):
+                    if metadata.get("source") == "fast":
+                        continue
+                    v = np.asarray(vector, dtype=np.float32)
+                    v /= np.linalg.norm(v) or 1.0
+                    for head, labels in (("sentiment", SENTIMENTS), ("intent", INTENTS)):
+                        label = metadata.get(head)
+                        if label in labels:
+                            sums[head][label] = sums[head].get(label, 0) + v
+                            counts[head][label] = counts[head].get(label, 0) + 1
+                    seen += 1
+
+            centroids = {}
+            for head in sums:
+                labels = [l for l, n in counts[head].items() if n >= self.min_examples]
+                if len(labels) >= 2:
+                    matrix = np.stack([sums[head][l] / np.linalg.norm(sums[head][l]) for l in labels])
+                    centroids[head] = (labels, matrix)
+            self.centroids = centroids
+            self.trained_on = seen
+            self.trained_at = time.time()
+            self._new_labels = 0
+            logger.info(
+                f"🏷️ Fast classifier trained on {seen} analyses in {time.perf_counter() - started:.2f}s "
+                f"(heads: {', '.join(centroids) or 'none, using lexicon'})."
+            )
+        finally:
+            self._training.release()
+
+    def needs_retrain(self, new_labels: int = 1) -> bool:
+        """Counts new LLM-labeled analyses; True once enough accumulated for a refresh."""
+        self._new_labels += new_labels
+        return self._new_labels >= self.retrain_every
+
+    # --- Inference ---
+
+    def _centroid_head(self, head: str, vector) -> tuple:
+        labels, matrix = self.centroids[head]
+        sims = matrix @ vector
+        probs = np.exp((sims - sims.max()) / self.temperature)
+        probs /= probs.sum()
+        return dict(zip(labels, probs.tolist()))
+
+    @staticmethod
+    def _lexicon(text: str) -> dict:
+        pos, neg, cues = _lexicon_scores(text)
+        hits = pos + neg
+        if hits == 0:
+            sentiment_probs = {"positive": 0.25, "neutral": 0.5, "negative": 0.25}
+        else:
+            # Confidence grows with agreement and with the number of hits
+            strength = abs(pos - neg) / hits * min(1.0, hits / 2)
+            lean = "positive" if pos > neg else "negative" if neg > pos else "neutral"
+            sentiment_probs = {s: (1 - strength) / 3 for s in SENTIMENTS}
+            sentiment_probs[lean] += strength
+        complaint = min(1.0, 0.5 + 0.25 * cues) if cues and neg >= pos else 0.5 - 0.25 * min(pos, 2)
+        return {"sentiment": sentiment_probs, "intent": {"complaint": complaint, "informational": 1 - complaint}}
+
+    def classify(self, text: str, vector=None) -> dict:
+        """
+        sentiment, sentiment_score, intent and a confidence in [0, 1]
+        (the weaker of the two heads). `vector` is the text's embedding, if available.
+        """
+        probs = self._lexicon(text)
+        method = "lexicon"
+        if vector is not None and self.centroids:
+            v = np.asarray(vector, dtype=np.float32)
+            v /= np.linalg.norm(v) or 1.0
+            for head in self.centroids:
+                probs[head] = self._centroid_head(head, v)
+            method = "centroid"
+
+        sentiment = max(probs["sentiment"], key=probs["sentiment"].get)
+        intent = max(probs["intent"], key=probs["intent"].get)
+        score = probs["sentiment"].get("positive", 0.0) - probs["sentiment"].get("negative", 0.0)
+        return {
+            "sentiment": sentiment,
+            "sentiment_score": round(score, 3),
+            "intent": intent,
+            "confidence": round(min(probs["sentiment"][sentiment], probs["intent"][intent]), 3),
+            "method": method,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "version": self.VERSION,
+            "heads": {head: labels for head, (labels, _) in self.centroids.items()},
+            "trained_on": self.trained_on,
+            "trained_at": self.trained_at,
+            "new_labels_since_training": self._new_labels,
+        }
@@ -0,0 +1,215 @@
+# backend/services/job_queue.py
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from backend.utils.logger import logger
+
+class JobQueue:
+    """
+    Persistent queue for long analyses. Jobs live in SQLite, so they survive
+    restarts; a bounded set of asyncio workers drains them.
+
+    `handlers` maps a job kind to `async fn(payload, progress) -> dict`,
+    where `progress(fraction)` records how far along the job is.
+    """
+
+    def __init__(self, handlers: dict):
+        self.handlers = handlers
+        self.path = os.getenv("JOBS_DB_PATH", "./data/jobs.sqlite3")
+        self.workers = int(os.getenv("JOB_WORKERS", "2"))
+        self.upload_dir = os.getenv("JOB_UPLOAD_DIR", "./data/uploads")
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                progress REAL NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self.db.commit()
+
+        self._wake = asyncio.Event()
+        self._tasks = []
+        self._running = {}  # job id -> asyncio.Task
+        self._stopping = False
+
+    # --- Storage helpers ---
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            cur = self.db.execute(sql, params)
+            self.db.commit()
+            return cur
+
+    def _update(self, job_id: str, **fields):
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        self._execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def _claim(self):
+        """Atomically move the oldest queued job to 'running'."""
+        with self._lock:
+            row = self.db.execute("""
+                UPDATE jobs SET status = 'running', started_at = ?
+                WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1)
+                RETURNING *
+            """, (time.time(),)).fetchone()
+            self.db.commit()
+            return dict(row) if row else None
+
+    # --- Public API ---
+
+    def submit(self, kind: str, payload: dict) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = str(uuid.uuid4())
+        self._execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at) VALUES (?, ?, 'queued', ?, ?)",
+            (job_id, kind, json.dumps(payload), time.time()),
+        )
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id: str):
+        row = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        if job["status"] == "queued":
+            job["queue_position"] = self._execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ?", (job["created_at"],)
+            ).fetchone()[0]
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job. Returns False if it already finished."""
+        cur = self._execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        if cur.rowcount:
+            self._cleanup(job_id)
+            return True
+        task = self._running.get(job_id)
+        if task:
+            task.cancel()
+            return True
+        return False
+
+    def _cleanup(self, job_id: str):
+        """Removes a job's spooled upload once the job can no longer run."""
+        row = self._execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        path = json.loads(row[0]).get("path") if row else None
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def stats(self, window_s: float = 3600) -> dict:
+        since = time.time() - window_s
+        counts = dict(self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        row = self._execute("""
+            SELECT AVG(started_at - created_at), MAX(started_at - created_at),
+                   AVG(finished_at - started_at), MAX(finished_at - started_at), COUNT(*)
+            FROM jobs WHERE finished_at >= ? AND started_at IS NOT NULL
+        """, (since,)).fetchone()
+        oldest = self._execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        return {
+            "workers": self.workers,
+            "queue_depth": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "by_status": counts,
+            "oldest_queued_age_s": round(time.time() - oldest, 3) if oldest else 0.0,
+            "recent_finished": row[4],
+            "avg_wait_s": round(row[0] or 0.0, 3),
+            "max_wait_s": round(row[1] or 0.0, 3),
+            "avg_run_s": round(row[2] or 0.0, 3),
+            "max_run_s": round(row[3] or 0.0, 3),
+        }
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        # Jobs interrupted by a shutdown/crash go back to the queue
+        requeued = self._execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, progress = 0 WHERE status = 'running'"
+        ).rowcount
+        if requeued:
+            logger.info(f"♻️ Re-queued {requeued} interrupted job(s).")
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"🧵 Job queue started ({self.workers} workers).")
+
+    async def stop(self):
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        with self._lock:
+            self.db.close()
+
+    async def _worker(self, n: int):
+        while True:
+            job = self._claim()
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Never let one job take the worker down: the queue would stall
+                logger.error(f"❌ Job {job['id'][:8]} crashed worker {n}: {e!r}")
+                try:
+                    self._update(job["id"], status="failed", error=f"Internal error: {e!r}"[:500], finished_at=time.time())
+                except Exception as update_error:
+                    logger.error(f"❌ Could not mark job {job['id'][:8]} failed: {update_error!r}")
+
+    async def _run(self, job: dict):
+        job_id = job["id"]
+
+        def progress(fraction: float):
+            self._update(job_id, progress=round(min(max(fraction, 0.0), 1.0), 3))
+
+        task = asyncio.create_task(self.handlers[job["kind"]](json.loads(job["payload"]), progress))
+        self._running[job_id] = task
+        try:
+            result = await task
+            self._update(job_id, status="done", progress=1.0, result=json.dumps(result), finished_at=time.time())
+            logger.info(f"✅ Job {job_id[:8]} done.")
+        except asyncio.CancelledError:
+            if self._stopping:
+                # Shutdown, not a user cancel: run it again after restart
+                self._update(job_id, status="queued", started_at=None, progress=0)
+                raise
+            self._update(job_id, status="cancelled", finished_at=time.time())
+            logger.info(f"🛑 Job {job_id[:8]} cancelled.")
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e) or type(e).__name__, finished_at=time.time())
+            logger.error(f"❌ Job {job_id[:8]} failed: {e}")
+        finally:
+            self._running.pop(job_id, None)
+        self._cleanup(job_id)
@@ -0,0 +1,166 @@
+# backend/services/lexical_index.py
+import os
+import re
+import sqlite3
+import threading
+
+# Keeps codes like "AB-1234", "v2.1" or "order_55" as single tokens
+TOKEN_RE = re.compile(r"\w+(?:[-_./]\w+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its of on or our so that the "
+    "their them there they this to was we were what when where which who why will with you your".split()
+)
+MAX_ENTITY_WORDS = 4
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall(text.lower())
+
+
+def normalize_entity(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+class LexicalIndex:
+    """
+    Local inverted index kept next to the Chroma collection:
+    BM25 over document text (SQLite FTS5) plus an exact entity index
+    built from the spaCy/LLM entities of each analysis.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS doc_rows (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL)")
+        # Text is pre-tokenized by tokenize(), FTS5 only splits on spaces
+        self.db.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts
+            USING fts5(body, tokenize = "unicode61 tokenchars '-_./'")
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entities (
+                entity TEXT NOT NULL,
+                label TEXT,
+                doc_id TEXT NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_entities_entity ON entities(entity)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_entities_doc ON entities(doc_id)")
+        self.db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM doc_rows").fetchone()[0]
+
+    def known(self, ids: list) -> set:
+        """Which of `ids` are already indexed."""
+        marks = ", ".join("?" for _ in ids)
+        with self._lock:
+            rows = self.db.execute(f"SELECT id FROM doc_rows WHERE id IN ({marks})", ids).fetchall()
+        return {r[0] for r in rows}
+
+    def upsert(self, ids: list, texts: list, entities: list = None):
+        """
+        Index (or re-index) documents. `entities` holds one list of
+        {"text", "label"} dicts per document.
+        """
+        entities = entities or [[] for _ in ids]
+        with self._lock:
+            self._delete(ids)
+            for doc_id, text, ents in zip(ids, texts, entities):
+                row = self.db.execute("INSERT INTO doc_rows (id) VALUES (?)", (doc_id,)).lastrowid
+                self.db.execute("INSERT INTO docs_fts (rowid, body) VALUES (?, ?)", (row, " ".join(tokenize(text))))
+                unique = {(normalize_entity(e["text"]), e.get("label")) for e in ents if e.get("text")}
+                self.db.executemany(
+                    "INSERT INTO entities (entity, label, doc_id) VALUES (?, ?, ?)",
+                    [(name, label, doc_id) for name, label in unique if name],
+                )
+            self.db.commit()
+
+    def delete(self, ids: list):
+        with self._lock:
+            self._delete(ids)
+            self.db.commit()
+
+    def _delete(self, ids: list):
+        for doc_id in ids:
+            row = self.db.execute("SELECT row FROM doc_rows WHERE id = ?", (doc_id,)).fetchone()
+            if row:
+                self.db.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+                self.db.execute("DELETE FROM doc_rows WHERE row = ?", (row[0],))
+            self.db.execute("DELETE FROM entities WHERE doc_id = ?", (doc_id,))
+
+    def entities_of(self, ids: list) -> dict:
+        """doc id -> its indexed entities ({"text", "label"}, text normalized)."""
+        marks = ", ".join("?" for _ in ids)
+        with self._lock:
+            rows = self.db.execute(f"SELECT doc_id, entity, label FROM entities WHERE doc_id IN ({marks})", ids).fetchall()
+        found = {}
+        for doc_id, entity, label in rows:
+            found.setdefault(doc_id, []).append({"text": entity, "label": label})
+        return found
+
+    def search_bm25(self, query: str, limit: int = 20) -> list:
+        """Document ids ranked by BM25, best first."""
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t not in STOPWORDS]
+        if not terms:
+            return []
+        match = " OR ".join('"' + t.replace('"', '""') + '"' for t in terms)
+        with self._lock:
+            rows = self.db.execute("""
+                SELECT doc_rows.id FROM docs_fts
+                JOIN doc_rows ON doc_rows.row = docs_fts.rowid
+                WHERE docs_fts MATCH ?
+                ORDER BY bm25(docs_fts) LIMIT ?
+            """, (match, limit)).fetchall()
+        return [r[0] for r in rows]
+
+    def search_entities(self, query: str, limit: int = 20) -> list:
+        """
+        Document ids mentioning entities named in the query, ranked by how
+        many distinct query entities they contain.
+        """
+        tokens = tokenize(query)
+        grams = {
+            " ".join(tokens[i:i + n])
+            for n in range(1, MAX_ENTITY_WORDS + 1)
+            for i in range(len(tokens) - n + 1)
+        }
+        grams = [g for g in grams if g not in STOPWORDS]
+        if not grams:
+            return []
+        marks = ", ".join("?" for _ in grams)
+        with self._lock:
+            rows = self.db.execute(f"""
+                SELECT doc_id FROM entities WHERE entity IN ({marks})
+                GROUP BY doc_id ORDER BY COUNT(DISTINCT entity) DESC LIMIT ?
+            """, (*grams, limit)).fetchall()
+        return [r[0] for r in rows]
+
+    def ids(self) -> set:
+        with self._lock:
+            return {r[0] for r in self.db.execute("SELECT id FROM doc_rows")}
+
+    def compact(self):
+        """Merge FTS5 segments and give deleted rows' space back to the file system."""
+        with self._lock:
+            self.db.execute("INSERT INTO docs_fts (docs_fts) VALUES ('optimize')")
+            self.db.commit()
+            self.db.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    """Merge several ranked id lists: score(d) = sum of 1 / (k + rank)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
@@ -0,0 +1,309 @@
+# backend/services/llm_pool.py
+import os
+import time
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+import httpx
+import ollama
+from backend.services.admission import PRIORITY
+from backend.utils.logger import logger
+from backend.utils import metrics
+
+
+def parse_backends(spec: str, default_model: str, default_concurrency: int) -> list:
+    """
+    OLLAMA_BACKENDS: comma-separated "URL[|MODEL[|MAX_CONCURRENCY]]" entries, e.g.
+    "http://gpu1:11434|mistral|4, http://gpu2:11434|mistral|2".
+    """
+    backends = []
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        parts = [p.strip() for p in entry.split("|")]
+        host = parts[0]
+        model = parts[1] if len(parts) > 1 and parts[1] else default_model
+        concurrency = int(parts[2]) if len(parts) > 2 and parts[2] else default_concurrency
+        backends.append((host, model, concurrency))
+    return backends
+
+
+def _request_error(error: ollama.ResponseError) -> bool:
+    # 404 is the backend's problem (model not pulled there), other 4xx are the caller's
+    return 400 <= error.status_code < 500 and error.status_code != 404
+
+
+class LLMBackend:
+    """One Ollama endpoint: its own connection pool, concurrency slots, health and stats."""
+
+    def __init__(self, host: str, model: str, max_concurrency: int, timeout: float):
+        self.host = host
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.client = ollama.AsyncClient(
+            host=host,
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self.in_flight = 0
+        # Health: ejected backends get no traffic until a health check passes
+        self.healthy = True
+        self.ejected_until = 0.0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.requests = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def load(self) -> float:
+        """In-flight requests relative to what the backend runs at once."""
+        return self.in_flight / self.max_concurrency
+
+    def available(self, now: float) -> bool:
+        return self.healthy or now >= self.ejected_until
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "host": self.host,
+            "model": self.model,
+            "healthy": self.healthy,
+            "ejected_for_s": round(max(0.0, self.ejected_until - now), 1) if not self.healthy else 0.0,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "avg_latency_ms": round(self.busy_seconds / self.requests * 1000, 1) if self.requests else None,
+            "last_error": self.last_error,
+        }
+
+
+class LLMPool:
+    """
+    Routes generations across one or more Ollama backends: least loaded
+    first, failing backends are ejected for a while and the request fails
+    over to the next one. A background health check re-admits them.
+    """
+
+    def __init__(self, backends: list, timeout: float):
+        self.timeout = timeout
+        self.backends = [LLMBackend(host, model, n, timeout) for host, model, n in backends]
+        if not self.backends:
+            raise ValueError("No Ollama backends configured.")
+        # Consecutive failures before a backend is ejected, and for how long
+        self.eject_after = int(os.getenv("OLLAMA_EJECT_AFTER", "2"))
+        self.eject_seconds = float(os.getenv("OLLAMA_EJECT_SECONDS", "30"))
+        self.health_interval = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10"))
+        # Attempts per request (across backends; a single backend is retried after a short pause)
+        self.max_attempts = int(os.getenv("OLLAMA_MAX_ATTEMPTS", str(max(3, len(self.backends)))))
+        self._health_task = None
+        # Requests waiting for a slot on any backend, per priority class
+        self._free = asyncio.Condition()
+        self.queued = 0
+        self._waiting = Counter()
+
+    @property
+    def max_concurrency(self) -> int:
+        return sum(b.max_concurrency for b in self.backends)
+
+    @property
+    def models(self) -> list:
+        return sorted({b.model for b in self.backends})
+
+    # --- Routing ---
+
+    def _outranked(self, priority: int) -> bool:
+        return any(n and p < priority for p, n in self._waiting.items())
+
+    def pick(self, exclude: set = ()):
+        """
+        Least loaded backend with a free slot (None if all are busy).
+        Untried, non-ejected backends first; a tried one is reused only
+        when nothing else is left, and an ejected one only when every
+        backend is ejected (the one due back first).
+        """
+        now = time.monotonic()
+        available = [b for b in self.backends if b.available(now)]
+        candidates = [b for b in available if b not in exclude] or available
+        if not candidates:
+            candidates = [min(self.backends, key=lambda b: b.ejected_until)]
+        free = [b for b in candidates if b.in_flight < b.max_concurrency]
+        return min(free, key=lambda b: (b.load, b.requests)) if free else None
+
+    @asynccontextmanager
+    async def _slot(self, exclude: set):
+        """
+        Holds a slot on the picked backend. Requests wait in one shared
+        queue, so whichever backend frees a slot first takes the next one
+        (a slow backend simply gets fewer requests). Free slots go to the
+        most urgent priority class waiting (interactive chat before bulk).
+        """
+        priority = PRIORITY.get()
+        async with self._free:
+            self.queued += 1
+            self._waiting[priority] += 1
+            try:
+                while self._outranked(priority) or (backend := self.pick(exclude)) is None:
+                    await self._free.wait()
+            finally:
+                self.queued -= 1
+                self._waiting[priority] -= 1
+                # Less urgent waiters may now take a slot that is still free
+                self._free.notify_all()
+            backend.in_flight += 1
+        started = time.perf_counter()
+        try:
+            yield backend
+        finally:
+            backend.requests += 1
+            backend.busy_seconds += time.perf_counter() - started
+            async with self._free:
+                backend.in_flight -= 1
+                self._free.notify_all()
+
+    def _succeeded(self, backend: LLMBackend):
+        backend.consecutive_failures = 0
+        if not backend.healthy:
+            backend.healthy = True
+            logger.info(f"✅ Ollama backend {backend.host} is back.")
+
+    def _eject(self, backend: LLMBackend, error: Exception):
+        backend.last_error = f"{type(error).__name__}: {error}"[:200]
+        if backend.healthy:
+            logger.warning(f"🚫 Ollama backend {backend.host} ejected for {self.eject_seconds:.0f}s: {backend.last_error}")
+        backend.healthy = False
+        backend.ejected_until = time.monotonic() + self.eject_seconds
+
+    def _failed(self, backend: LLMBackend, error: Exception):
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        metrics.LLM_BACKEND_REQUESTS.inc(backend=backend.host, outcome="error")
+        if backend.consecutive_failures >= self.eject_after or not backend.healthy:
+            self._eject(backend, error)
+        else:
+            backend.last_error = f"{type(error).__name__}: {error}"[:200]
+
+    async def _before_attempt(self, attempt: int, tried: set):
+        if attempt:
+            metrics.LLM_RETRIES.inc()
+            if len(tried) >= len(self.backends):
+                # Nowhere else to go: back off a little before retrying
+                await asyncio.sleep(min(0.5 * attempt, 2.0))
+
+    async def chat(self, **kwargs):
+        """One non-streaming chat call, with failover to another backend."""
+        tried, error = set(), None
+        for attempt in range(self.max_attempts):
+            await self._before_attempt(attempt, tried)
+            async with self._slot(tried) as backend:
+                tried.add(backend)
+                try:
+                    with metrics.stage("llm_generate"):
+                        response = await asyncio.wait_for(
+                            backend.client.chat(model=backend.model, **kwargs), timeout=self.timeout,
+                        )
+                except ollama.ResponseError as e:
+                    # A bad request would fail anywhere: don't eject a backend for it
+                    if _request_error(e):
+                        raise
+                    error = e
+                except Exception as e:
+                    error = e
+                else:
+                    self._succeeded(backend)
+                    metrics.LLM_BACKEND_REQUESTS.inc(backend=backend.host, outcome="ok")
+                    return response
+                self._failed(backend, error)
+            logger.warning(f"🔁 Ollama call failed on {backend.host}, failing over: {backend.last_error}")
+        raise error
+
+    async def stream_chat(self, **kwargs):
+        """
+        Streaming chat. Fails over only until the first part has been yielded.
+        Each read from the model is timed out on its own, so the time the
+        consumer spends between parts doesn't count; closing the generator
+        early closes the Ollama stream and frees the slot.
+        """
+        tried, error = set(), None
+        for attempt in range(self.max_attempts):
+            await self._before_attempt(attempt, tried)
+            async with self._slot(tried) as backend:
+                tried.add(backend)
+                streamed, stream, error = False, None, None
+                try:
+                    while True:
+                        try:
+                            if stream is None:
+                                stream = await asyncio.wait_for(
+                                    backend.client.chat(model=backend.model, stream=True, **kwargs), timeout=self.timeout,
+                                )
+                            part = await asyncio.wait_for(anext(stream), timeout=self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        except ollama.ResponseError as e:
+                            if _request_error(e):
+                                raise
+                            error = e
+                            break
+                        except Exception as e:
+                            error = e
+                            break
+                        streamed = True
+                        yield part
+                finally:
+                    if stream is not None:
+                        await stream.aclose()
+                if error is None:
+                    self._succeeded(backend)
+                    metrics.LLM_BACKEND_REQUESTS.inc(backend=backend.host, outcome="ok")
+                    return
+                self._failed(backend, error)
+                if streamed:
+                    # Part of the answer is already out: can't fail over
+                    raise error
+            logger.warning(f"🔁 Ollama stream failed on {backend.host}, failing over: {backend.last_error}")
+        raise error
+
+    # --- Health ---
+
+    async def _check(self, backend: LLMBackend) -> bool:
+        try:
+            await asyncio.wait_for(backend.client.list(), timeout=5.0)
+        except Exception as e:
+            self._eject(backend, e)
+            return False
+        self._succeeded(backend)
+        return True
+
+    async def check_all(self) -> int:
+        """Health-checks every backend; returns how many are up."""
+        results = await asyncio.gather(*(self._check(b) for b in self.backends))
+        return sum(results)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_all()
+
+    def start_health_checks(self):
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    def stats(self) -> dict:
+        return {
+            "backends": [b.stats() for b in self.backends],
+            "healthy": sum(1 for b in self.backends if b.healthy),
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        await asyncio.gather(*(b.client.close() for b in self.backends), return_exceptions=True)
@@ -1,30 +1,58 @@
 import os
 import json
-import ollama
-from tenacity import retry, stop_after_attempt, wait_fixed
+import asyncio
+from contextlib import aclosing
+from backend.core.schemas import LLMAnalysis
+from backend.services.llm_pool import LLMPool, parse_backends
 from backend.utils.logger import logger
+from backend.utils import metrics
 
-class OllamaService:
-    def __init__(self):
-        # Default to 'mistral' if not set in .env
-        self.model = os.getenv("OLLAMA_MODEL", "mistral")
-        
-        # Check connection immediately on startup
-        try:
-            ollama.list()
-            logger.info(f"✅ Connected to Local Ollama (Model: {self.model})")
-        except Exception:
-            logger.critical("❌ Could not connect to Ollama! Is it running?")
+INVALID_JSON_SUMMARY = "Error: Model produced invalid JSON format."
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-    async def analyze_text(self, text: str) -> dict:
-        """
-        Sends text to local LLM and forces a JSON response.
+# --- Analysis prompts ---
+# The version is part of the cache key: add a new one instead of editing a template.
+#   v1:         original prompt; the LLM also re-extracts entities (format='json').
+#   v2-compact: short prompt, JSON-schema constrained output without entities;
+#               spaCy's entities are merged into the result instead.
+PROMPT_VERSIONS = ("v1", "v2-compact")
+DEFAULT_PROMPT_VERSION = "v2-compact"
+ANALYSIS_SCHEMA = LLMAnalysis.model_json_schema()
+# How the compact prompt asks for each field (in schema order)
+FIELD_HINTS = {
+    "sentiment": "sentiment",
+    "sentiment_score": "sentiment_score (-1 to 1)",
+    "summary": "one-sentence summary",
+    "topics": "up to 5 short topics",
+    "intent": "intent",
+}
+
+
+def analysis_schema(fields: tuple = None) -> dict:
+    """The output schema, restricted to `fields` for partial analyses."""
+    if not fields:
+        return ANALYSIS_SCHEMA
+    return {
+        **ANALYSIS_SCHEMA,
+        "properties": {f: p for f, p in ANALYSIS_SCHEMA["properties"].items() if f in fields},
+        "required": [f for f in ANALYSIS_SCHEMA["required"] if f in fields],
+    }
+
+
+def _entities_str(entities: list) -> str:
+    return ", ".join([f"{e['text']} ({e['label']})" for e in entities])
+
+
+def _prompt_v1(text: str, entities: list, fields: tuple = None) -> str:
+    # Always asks for the full analysis; partial requests are projected afterwards
+    enhanced = f"""
+        Context: Named Entities detected: [{_entities_str(entities)}].
+        Analyze the text below considering the context above.
+        Text: {text}
         """
-        prompt = f"""
+    return f"""
         You are an API that outputs strictly valid JSON.
         Analyze this text:
-        "{text}"
+        "{enhanced}"
 
         Return JSON matching this schema exactly:
         {{
@@ -37,32 +65,155 @@ class OllamaService:
         }}
         """
 
+
+def _prompt_v2_compact(text: str, entities: list, fields: tuple = None) -> str:
+    known = f"Known entities: {_entities_str(entities)}\n" if entities else ""
+    wanted = ", ".join(hint for f, hint in FIELD_HINTS.items() if not fields or f in fields)
+    return (
+        f"Analyze the text. Reply in JSON: {wanted}.\n"
+        f"{known}Text:\n{text}"
+    )
+
+
+PROMPTS = {"v1": _prompt_v1, "v2-compact": _prompt_v2_compact}
+
+
+def _dedupe_entities(entities: list) -> list:
+    seen, unique = set(), []
+    for e in entities:
+        key = (e["text"].lower(), e["label"])
+        if key not in seen:
+            seen.add(key)
+            unique.append({"text": e["text"], "label": e["label"]})
+    return unique
+
+def record_generation(response):
+    """Token counts and speed from Ollama's final response part."""
+    prompt_tokens = response.get('prompt_eval_count') or 0
+    eval_tokens = response.get('eval_count') or 0
+    eval_seconds = (response.get('eval_duration') or 0) / 1e9
+    metrics.LLM_TOKENS.inc(prompt_tokens, kind="prompt")
+    metrics.LLM_TOKENS.inc(eval_tokens, kind="eval")
+    if eval_tokens and eval_seconds:
+        metrics.LLM_TOKENS_PER_SEC.observe(eval_tokens / eval_seconds)
+    metrics.annotate(prompt_tokens=prompt_tokens, eval_tokens=eval_tokens)
+
+
+class OllamaService:
+    def __init__(self):
+        # Default to 'mistral' if not set in .env
+        model = os.getenv("OLLAMA_MODEL", "mistral")
+        self.host = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+        self.prompt_version = os.getenv("LLM_PROMPT_VERSION", DEFAULT_PROMPT_VERSION)
+        if self.prompt_version not in PROMPTS:
+            raise ValueError(f"Unknown LLM_PROMPT_VERSION '{self.prompt_version}'. Use one of: {', '.join(PROMPT_VERSIONS)}")
+
+        # Per-request timeout (seconds) and cap on in-flight generations per backend
+        self.timeout = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+        per_backend = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+
+        # One or more Ollama servers (OLLAMA_BACKENDS), each with its own pooled
+        # connections and slots; without it, the single OLLAMA_HOST / OLLAMA_MODEL
+        backends = parse_backends(os.getenv("OLLAMA_BACKENDS", ""), model, per_backend)
+        self.pool = LLMPool(backends or [(self.host, model, per_backend)], self.timeout)
+        self.max_concurrency = self.pool.max_concurrency
+        # Part of the analysis cache key: results depend on the model(s) serving them
+        self.model = ",".join(self.pool.models)
+
+    async def check_connection(self):
+        """Called during warm-up instead of blocking the constructor."""
+        up = await self.pool.check_all()
+        if not up:
+            logger.critical("❌ Could not connect to Ollama! Is it running?")
+            raise ConnectionError(f"No Ollama backend reachable ({', '.join(b.host for b in self.pool.backends)})")
+        logger.info(f"✅ Connected to Local Ollama (Model: {self.model}, {up}/{len(self.pool.backends)} backend(s) up)")
+        self.pool.start_health_checks()
+
+    async def warm_up(self):
+        """
+        One-token dummy generation on every healthy backend: makes Ollama load
+        the model into memory (and keep it there) so the first real request
+        doesn't pay for it.
+        """
+        await asyncio.gather(*(
+            b.client.chat(
+                model=b.model,
+                messages=[{'role': 'user', 'content': 'ok'}],
+                options={'num_predict': 1},
+                keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+            )
+            for b in self.pool.backends if b.healthy
+        ))
+        logger.info(f"🔥 Ollama model '{self.model}' loaded.")
+
+    async def chat(self, messages: list, **kwargs):
+        """
+        Single entry point for every generation. The pool picks the least
+        loaded backend, waits for one of its slots and runs the request with
+        a hard timeout, failing over to another backend on errors.
+        """
+        response = await self.pool.chat(messages=messages, **kwargs)
+        record_generation(response)
+        return response
+
+    async def stream_chat(self, messages: list, **kwargs):
+        """
+        Same as chat(), but yields response parts as Ollama produces them.
+        The backend's slot is held until the stream is exhausted or closed.
+        """
+        async with aclosing(self.pool.stream_chat(messages=messages, **kwargs)) as stream:
+            async for part in stream:
+                if part.get('done'):
+                    record_generation(part)
+                yield part
+
+    def backend_stats(self) -> dict:
+        return self.pool.stats()
+
+    async def close(self):
+        await self.pool.close()
+
+    async def analyze_text(self, text: str, entities: list = None, fields: tuple = None) -> dict:
+        """
+        Sends text (plus the entities spaCy found in it) to the local LLM
+        and forces a JSON response. `fields` restricts the compact prompt
+        to part of the analysis (fewer tokens to generate).
+        """
+        entities = entities or []
+        compact = self.prompt_version != "v1"
+        with metrics.stage("prompt_build"):
+            prompt = PROMPTS[self.prompt_version](text, entities, fields)
+
         try:
             logger.info("🧠 Processing locally with Ollama...")
-            
-            # We use format='json' to force structured output
-            response = ollama.chat(
-                model=self.model,
+
+            # Structured output: a JSON schema (v2) or plain JSON mode (v1)
+            response = await self.chat(
                 messages=[{'role': 'user', 'content': prompt}],
-                format='json', 
+                format=analysis_schema(fields) if compact else 'json',
             )
 
             response_text = response['message']['content']
-            
+
             # Parse the JSON string
-            return json.loads(response_text)
+            with metrics.stage("json_parse"):
+                result = json.loads(response_text)
+            if compact:
+                result["entities"] = _dedupe_entities(entities)
+            return result
 
         except json.JSONDecodeError:
+            metrics.LLM_INVALID_JSON.inc()
             logger.error(f"❌ LLM produced invalid JSON: {response_text}")
             # Fallback for bad JSON
             return {
-                "sentiment": "neutral", 
+                "sentiment": "neutral",
                 "sentiment_score": 0.0,
-                "summary": "Error: Model produced invalid JSON format.",
+                "summary": INVALID_JSON_SUMMARY,
                 "topics": [],
                 "intent": "unknown",
-                "entities": []
+                "entities": _dedupe_entities(entities) if compact else []
             }
         except Exception as e:
             logger.error(f"❌ Ollama Error: {e}")
-            raise es
\ No newline at end of file
+            raise e
@@ -1,54 +1,830 @@
 # backend/services/memory_store.py
 import chromadb
-from chromadb.utils import embedding_functions
+import os
+import time
 import uuid
+import shutil
+import sqlite3
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from backend.services.embeddings import CachedEmbeddingFunction
+from backend.services.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from backend.services.analytics import AnalyticsStore
+from backend.services.dedup import DedupIndex
+from backend.services.llm_provider import INVALID_JSON_SUMMARY
+from backend.services.raw_store import RawStore
+from backend.utils.executors import run_io
 from backend.utils.logger import logger
+from backend.utils.metrics import stage
+
+LEGACY_COLLECTION = "analysis_history"  # the single, unpartitioned collection
+PARTITION_PREFIX = "analysis_"
+SUMMARY_FALLBACK_CHARS = 300  # stored instead of the text when there is no summary
+
+
+def month_partition(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(f"{PARTITION_PREFIX}%Y_%m")
+
+
+def partition_range(name: str):
+    """(start, end) epoch seconds covered by a month partition; None for the legacy collection."""
+    try:
+        start = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y_%m").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    return start.timestamp(), end.timestamp()
+
+
+def _time_bounds(where: dict) -> tuple:
+    """(since, until) of a build_where() filter, for partition pruning."""
+    since = until = None
+    for clause in (where or {}).get("$and", [where] if where else []):
+        condition = clause.get("timestamp")
+        if isinstance(condition, dict):
+            since = condition.get("$gte", since)
+            until = condition.get("$lte", until)
+    return since, until
+
+
+def _narrow_where(where: dict, span: tuple):
+    """
+    The filter for one partition: time clauses the whole month satisfies
+    are dropped (a filtered Chroma query is ~10x slower than a plain one).
+    """
+    if not where or not span:
+        return where
+    clauses = []
+    for clause in where.get("$and", [where]):
+        condition = clause.get("timestamp")
+        if isinstance(condition, dict) and set(condition) <= {"$gte", "$lte"} and (
+            condition.get("$gte", span[0]) <= span[0] and condition.get("$lte", span[1]) >= span[1]
+        ):
+            continue
+        clauses.append(clause)
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
 
 class MemoryStore:
     def __init__(self):
         # 1. Initialize local database (saved to /data folder)
-        self.client = chromadb.PersistentClient(path="./data/chroma_db")
+        self.path = "./data/chroma_db"
+        self.client = chromadb.PersistentClient(path=self.path)
         
         # 2. Use a standard, fast embedding model
-        # This turns text into a list of numbers (vectors)
-        self.embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        # This turns text into a list of numbers (vectors).
+        # Backend, batching and the vector cache are configured via EMBEDDING_* env vars.
+        self.embedding_fn = CachedEmbeddingFunction()
         
-        # 3. Create or Get the collection (like a table in SQL)
-        self.collection = self.client.get_or_create_collection(
-            name="analysis_history",
-            embedding_function=self.embedding_fn
-        )
-        logger.info("🧠 Memory Store initialized.")
+        # 3. Collections (like tables in SQL): one for everything, or one per
+        # month (MEMORY_PARTITION=month) so each HNSW index stays small, old
+        # months can be dropped whole and time-filtered searches skip them.
+        # We always pass vectors ourselves, so Chroma gets no embedding function
+        # (it would otherwise conflict with the one persisted for the collection).
+        self.partitioning = os.getenv("MEMORY_PARTITION", "none")  # none | month
+        if self.partitioning not in ("none", "month"):
+            raise ValueError(f"Unknown MEMORY_PARTITION '{self.partitioning}'. Use 'none' or 'month'.")
+        self._collections = {}
+        self._partition_lock = threading.Lock()
+        for collection in self.client.list_collections():
+            if collection.name == LEGACY_COLLECTION or partition_range(collection.name):
+                self._collections[collection.name] = self.client.get_collection(collection.name, embedding_function=None)
+        if self.partitioning == "none" or LEGACY_COLLECTION in self._collections:
+            try:
+                self.migrate_timestamps(self._partition(LEGACY_COLLECTION))
+            except Exception as e:
+                # Retried on the next start; legacy rows just don't match time filters until then
+                logger.warning(f"⚠️ Timestamp migration skipped: {e}")
+        self.search_threads = int(os.getenv("MEMORY_SEARCH_THREADS", "4"))
+        self._fanout_pool = None
+
+        # 4. What Chroma stores as the document: the full text, or only the
+        # summary with the text zlib-compressed in a side store
+        self.store_text = os.getenv("MEMORY_STORE_TEXT", "full")  # full | summary
+        self.raw = RawStore(os.getenv("RAW_STORE_PATH", "./data/raw_texts.sqlite3"))
+        # Analyses older than this are deleted (0 = keep forever)
+        self.retention_days = float(os.getenv("MEMORY_RETENTION_DAYS", "0"))
+        self.retention_interval = float(os.getenv("MEMORY_RETENTION_INTERVAL", "3600"))
+        self._retention_task = None
+
+        # 5. Lexical side index (BM25 + entities) for hybrid retrieval
+        self.lexical = LexicalIndex(os.getenv("LEXICAL_INDEX_PATH", "./data/lexical_index.sqlite3"))
+        self.sync_lexical_index()
+        # Aggregates (counts, scores, top topics/entities) kept up to date on every save
+        self.analytics = AnalyticsStore(os.getenv("ANALYTICS_PATH", "./data/analytics.sqlite3"))
+        self.sync_analytics()
+        # Near-duplicate clusters: texts that reuse an earlier analysis instead of the LLM
+        self.dedup = DedupIndex(os.getenv("DEDUP_INDEX_PATH", "./data/dedup.sqlite3"))
+        self.dedup_neighbours = int(os.getenv("DEDUP_NEIGHBOURS", "3"))
+        self.search_mode = os.getenv("MEMORY_SEARCH_MODE", "hybrid")  # hybrid | vector
+        self.search_candidates = int(os.getenv("MEMORY_SEARCH_CANDIDATES", "20"))
+        self.rrf_k = int(os.getenv("MEMORY_RRF_K", "60"))
+        self.rerank = os.getenv("MEMORY_RERANK", "0") == "1"
+        self.rerank_model = os.getenv("MEMORY_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+        self._reranker = None
+        logger.info(f"🧠 Memory Store initialized ({len(self._collections)} collection(s), partitioning: {self.partitioning}).")
+
+        # 6. Write-behind buffer: analyses are queued and flushed in batches
+        self.flush_size = int(os.getenv("MEMORY_FLUSH_SIZE", "32"))
+        self.flush_interval = float(os.getenv("MEMORY_FLUSH_INTERVAL", "2.0"))
+        self.max_pending = int(os.getenv("MEMORY_MAX_PENDING", "1000"))
+        self._pending = []  # (text, analysis, id, extra_metadata, entities, queued_at)
+        self._space = asyncio.Condition()
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher = None
+        self._closing = False
+        # Thread work of the background loops that close() must wait for:
+        # cancelling an await doesn't stop the worker thread
+        self._io_inflight = set()
+        self.buffer_stats = {
+            "enqueued": 0, "flushed": 0, "failed": 0, "flushes": 0,
+            "backpressure_waits": 0, "last_flush_ms": 0.0, "max_queue_age_ms": 0.0,
+        }
+
+    # --- Partitions ---
+
+    def _partition_name(self, timestamp: float) -> str:
+        return month_partition(timestamp) if self.partitioning == "month" else LEGACY_COLLECTION
+
+    def _partition(self, name: str):
+        """The collection called `name`, created on first use."""
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._partition_lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = self.client.get_or_create_collection(
+                        name=name,
+                        embedding_function=None,
+                        metadata={"timestamp_format": "epoch"},
+                    )
+                    self._collections[name] = collection
+        return collection
+
+    def partitions(self, since: float = None, until: float = None) -> list:
+        """(name, collection) pairs that may hold rows in [since, until], oldest month first."""
+        selected = []
+        for name, collection in sorted(self._collections.items()):
+            span = partition_range(name)
+            if span and ((since is not None and span[1] <= since) or (until is not None and span[0] > until)):
+                continue
+            selected.append((name, collection))
+        return selected
+
+    def _fanout(self, fn, targets: list) -> list:
+        """fn(collection) on every target, in parallel when there are several."""
+        if len(targets) <= 1 or self.search_threads <= 1:
+            return [fn(c) for _, c in targets]
+        if self._fanout_pool is None:
+            self._fanout_pool = ThreadPoolExecutor(max_workers=self.search_threads, thread_name_prefix="memory-fanout")
+        return list(self._fanout_pool.map(lambda target: fn(target[1]), targets))
+
+    def count(self) -> int:
+        return sum(c.count() for _, c in self.partitions())
+
+    def iter_pages(self, include: list, page_size: int = 500):
+        """Every stored row, page by page across all partitions (documents are the full texts)."""
+        if "documents" in include and "metadatas" not in include:
+            include = [*include, "metadatas"]
+        for _, collection in self.partitions():
+            offset = 0
+            while True:
+                page = collection.get(include=include, limit=page_size, offset=offset)
+                if not len(page["ids"]):
+                    break
+                if "documents" in include:
+                    page["documents"] = self._hydrate(page["ids"], page["documents"], page["metadatas"])
+                yield page
+                offset += len(page["ids"])
+
+    @staticmethod
+    def _metadata(analysis: dict, extra: dict) -> dict:
+        # Partial analyses (AnalysisRequest.modules) only carry some of the fields
+        metadata = {
+            "sentiment": analysis.get("sentiment"),
+            "summary": analysis.get("summary"),
+            "intent": (analysis.get("intent") or "").strip().lower() or None,
+            "timestamp": time.time(), # epoch seconds, filterable with $gte/$lte
+            **extra,
+        }
+        return {k: v for k, v in metadata.items() if v is not None}
 
-    def save_analysis(self, text: str, analysis: dict):
+    @staticmethod
+    def _stored_document(text: str, metadata: dict) -> str:
+        """Summary-only mode: what Chroma keeps instead of the text (flagged for _hydrate)."""
+        metadata["raw_text"] = True
+        summary = metadata.get("summary")
+        if summary and summary != INVALID_JSON_SUMMARY:
+            return summary
+        return text[:SUMMARY_FALLBACK_CHARS]
+
+    def _hydrate(self, ids: list, documents: list, metadatas: list) -> list:
+        """Swap stored summaries back for the original texts (only rows flagged raw_text)."""
+        metadatas = metadatas or [{}] * len(ids)
+        wanted = [i for i, m in zip(ids, metadatas) if (m or {}).get("raw_text")]
+        if not wanted:
+            return documents
+        with stage("raw_read"):
+            texts = self.raw.get(wanted)
+        return [texts.get(i, d) for i, d in zip(ids, documents)]
+
+    def save_analyses(self, texts: list, analyses: list, ids: list = None, extra_metadata: list = None,
+                      entities: list = None):
         """
-        Save the original text + the AI's analysis into the vector DB.
+        Batched save: embeds all texts in one call and writes them with a
+        single collection.upsert instead of one round trip per document.
+        Passing content-hash ids makes re-submitted documents overwrite
+        their existing row instead of adding a duplicate.
+        `extra_metadata` (one dict per text) is merged into the stored metadata.
+        `entities` (one list of spaCy entities per text) goes to the lexical index.
         """
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        extra_metadata = extra_metadata or [{} for _ in texts]
+        entities = entities or [[] for _ in texts]
+        # Chroma rejects repeated ids within one call: keep the first of each
+        unique = {}
+        for i, doc_id in enumerate(ids):
+            unique.setdefault(doc_id, i)
+        keep = list(unique.values())
+        texts = [texts[i] for i in keep]
+        analyses = [analyses[i] for i in keep]
+        extra_metadata = [extra_metadata[i] for i in keep]
+        entities = [entities[i] for i in keep]
+        ids = [ids[i] for i in keep]
+        if not texts:
+            return True
         try:
             # We store the 'summary' and 'sentiment' as metadata 
             # so we can filter by them later.
-            self.collection.add(
-                documents=[text],
-                metadatas=[{
-                    "sentiment": analysis["sentiment"],
-                    "summary": analysis["summary"],
-                    "intent": analysis["intent"],
-                    "timestamp": str(uuid.uuid4()) # simple unique ID
-                }],
-                ids=[str(uuid.uuid4())]
-            )
-            logger.info("💾 Analysis saved to long-term memory.")
+            metadatas = [self._metadata(analysis, extra) for analysis, extra in zip(analyses, extra_metadata)]
+            with stage("embed"):
+                embeddings = self.embedding_fn(texts)
+            documents = texts
+            if self.store_text == "summary":
+                # The vector still comes from the full text; only the stored copy shrinks
+                documents = [self._stored_document(text, m) for text, m in zip(texts, metadatas)]
+                with stage("raw_write"):
+                    self.raw.put(ids, texts)
+            with stage("chroma_write"):
+                groups = {}
+                for i, metadata in enumerate(metadatas):
+                    groups.setdefault(self._partition_name(metadata["timestamp"]), []).append(i)
+                for name, rows in groups.items():
+                    self._partition(name).upsert(
+                        documents=[documents[i] for i in rows],
+                        embeddings=[embeddings[i] for i in rows],
+                        metadatas=[metadatas[i] for i in rows],
+                        ids=[ids[i] for i in rows],
+                    )
+            entity_lists = [
+                list(ents) + [e for e in analysis.get("entities") or [] if isinstance(e, dict)]
+                for ents, analysis in zip(entities, analyses)
+            ]
+            with stage("lexical_write"):
+                self.lexical.upsert(ids, texts, entity_lists)
+            with stage("analytics_write"):
+                self.analytics.upsert(ids, analyses, [m["timestamp"] for m in metadatas], entity_lists)
+            logger.info(f"💾 {len(texts)} analysis(es) saved to long-term memory.")
+            return True
         except Exception as e:
             logger.error(f"Failed to save to memory: {e}")
+            return False
+
+    # --- Near-duplicates ---
+
+    def find_duplicates(self, texts: list) -> tuple:
+        """
+        For each text: its best existing cluster ({"cluster_id", "analysis",
+        "similarity", "route"}), or {"leader": j, ...} when it duplicates the
+        earlier texts[j] of the same call, or None. Also returns the probes,
+        to be passed on to add_clusters for the texts that were analyzed.
+        """
+        with stage("dedup_embed"):
+            vectors = self.embedding_fn(texts)
+        probes = [self.dedup.probe(text, vector) for text, vector in zip(texts, vectors)]
+        with stage("dedup_match"):
+            # One Chroma query per partition for the whole call, not one per text
+            neighbours = [[] for _ in probes]
+            if probes and self.dedup.semantic_cosine > 0 and self.dedup_neighbours > 0:
+                neighbours = self._query([probe["vector"].tolist() for probe in probes], self.dedup_neighbours)["ids"]
+            matches = [self.dedup.match(probe, ids) for probe, ids in zip(probes, neighbours)]
+            for i, leader in enumerate(self.dedup.group(probes)):
+                if matches[i] is None and leader is not None and matches[leader] is None:
+                    verdict = self.dedup.compare(probes[i], probes[leader])
+                    matches[i] = {"leader": leader, "route": verdict[0], "similarity": verdict[1]}
+        return matches, probes
+
+    def add_clusters(self, ids: list, texts: list, analyses: list, probes: list):
+        """Full LLM analyses become cluster representatives for later near-duplicates."""
+        with stage("dedup_write"):
+            self.dedup.add_clusters(ids, texts, analyses, probes)
+
+    def link_duplicates(self, ids: list, texts: list, cluster_ids: list, analyses: list, similarities: list,
+                        routes: list, entities: list = None):
+        """
+        Record near-duplicates as cluster members. No vector or text is
+        stored for them (the representative is already in memory), but
+        they still count in the analytics aggregates.
+        """
+        entities = entities or [[] for _ in ids]
+        now = time.time()
+        with stage("dedup_write"):
+            self.dedup.link(ids, texts, cluster_ids, similarities, routes, now)
+            entity_lists = [
+                list(ents) + [e for e in analysis.get("entities") or [] if isinstance(e, dict)]
+                for ents, analysis in zip(entities, analyses)
+            ]
+            self.analytics.upsert(ids, analyses, [now] * len(ids), entity_lists)
+
+    # --- Write-behind buffer ---
+
+    async def enqueue_analyses(self, texts: list, analyses: list, ids: list = None, extra_metadata: list = None,
+                               entities: list = None):
+        """
+        Queue analyses for a later batched save_analyses. Returns as soon as
+        they are buffered; waits only when the buffer is full (backpressure).
+        """
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        # Stamp with submission time, not flush time
+        now = time.time()
+        extra_metadata = [{"timestamp": now, **extra} for extra in (extra_metadata or [{} for _ in texts])]
+        entities = entities or [[] for _ in texts]
+        for item in zip(texts, analyses, ids, extra_metadata, entities):
+            async with self._space:
+                if len(self._pending) >= self.max_pending:
+                    self.buffer_stats["backpressure_waits"] += 1
+                    self._flush_now.set()
+                    await self._space.wait_for(lambda: len(self._pending) < self.max_pending)
+                self._pending.append((*item, time.time()))
+                self.buffer_stats["enqueued"] += 1
+            if len(self._pending) >= self.flush_size:
+                self._flush_now.set()
+
+    async def start(self):
+        self._flusher = asyncio.create_task(self._flush_loop())
+        if self.retention_days > 0:
+            self._retention_task = asyncio.create_task(self._retention_loop())
+
+    async def _background_io(self, fn, *args):
+        """run_io whose thread work close() waits for, even if this await is cancelled."""
+        future = asyncio.ensure_future(run_io(fn, *args))
+        self._io_inflight.add(future)
+        future.add_done_callback(self._io_inflight.discard)
+        return await asyncio.shield(future)
+
+    async def _flush_loop(self):
+        # Stopped by close() between flushes, never in the middle of one
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write everything buffered so far, `flush_size` rows per collection call."""
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.flush_size]
+                del self._pending[:len(batch)]
+                async with self._space:
+                    self._space.notify_all()
+
+                started = time.time()
+                ok = await self._background_io(
+                    self.save_analyses,
+                    [b[0] for b in batch], [b[1] for b in batch], [b[2] for b in batch], [b[3] for b in batch],
+                    [b[4] for b in batch],
+                )
+                stats = self.buffer_stats
+                stats["flushes"] += 1
+                stats["flushed" if ok else "failed"] += len(batch)
+                stats["last_flush_ms"] = round((time.time() - started) * 1000, 1)
+                stats["max_queue_age_ms"] = max(stats["max_queue_age_ms"], round((started - batch[0][5]) * 1000, 1))
+
+    async def close(self):
+        """Stop the background loops and persist whatever is still buffered, then close the side stores."""
+        self._closing = True
+        self._flush_now.set()
+        if self._retention_task:
+            self._retention_task.cancel()
+            await asyncio.gather(self._retention_task, return_exceptions=True)
+        if self._flusher:
+            # Let it finish the flush it is in (its batch is no longer in _pending)
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        self._flusher = self._retention_task = None
+        await self.flush()
+        # Nothing may still be writing when the SQLite stores close under it
+        await asyncio.gather(*self._io_inflight, return_exceptions=True)
+        if self._fanout_pool:
+            self._fanout_pool.shutdown(wait=False)
+        self.lexical.close()
+        self.raw.close()
+        self.analytics.close()
+        self.dedup.close()
+        logger.info("💾 Memory buffer flushed.")
 
-    def search_similar(self, query: str, n_results=3):
+    def queue_stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "flush_size": self.flush_size,
+            "flush_interval_s": self.flush_interval,
+            **self.buffer_stats,
+        }
+
+    # --- Timestamps ---
+
+    def _row_creation_times(self) -> dict:
+        """
+        Chroma 1.x records when each row was inserted; use it to date legacy
+        rows. That table is Chroma's own: if its layout isn't the one we know,
+        return nothing and let the caller use the migration time.
+        """
+        try:
+            db = sqlite3.connect(f"file:{self.path}/chroma.sqlite3?mode=ro", uri=True)
+            try:
+                columns = {row[1] for row in db.execute("PRAGMA table_info(embeddings)")}
+                if not {"embedding_id", "created_at"} <= columns:
+                    logger.warning("⚠️ Unknown Chroma schema: legacy rows are dated with the migration time.")
+                    return {}
+                rows = db.execute("SELECT embedding_id, MIN(created_at) FROM embeddings GROUP BY embedding_id").fetchall()
+            finally:
+                db.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read row creation times: {e}")
+            return {}
+        created = {}
+        for doc_id, value in rows:
+            try:
+                created[doc_id] = datetime.strptime(str(value)[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                pass
+        return created
+
+    def migrate_timestamps(self, collection, page_size: int = 500):
+        """
+        One-time migration: rows written before real timestamps existed
+        stored a uuid in 'timestamp'. Replace it with the row's insertion time,
+        or the migration time when Chroma can't tell.
+        """
+        if (collection.metadata or {}).get("timestamp_format") == "epoch":
+            return
+        created, migrated_at = None, time.time()
+        fixed, offset = 0, 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            ids, metadatas = [], []
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                if not isinstance(metadata.get("timestamp"), (int, float)):
+                    if created is None:
+                        created = self._row_creation_times()
+                    ids.append(doc_id)
+                    metadatas.append({**metadata, "timestamp": created.get(doc_id, migrated_at)})
+            if ids:
+                collection.update(ids=ids, metadatas=metadatas)
+                fixed += len(ids)
+            offset += len(page["ids"])
+        collection.modify(metadata={**(collection.metadata or {}), "timestamp_format": "epoch"})
+        if fixed:
+            logger.info(f"🕒 Migrated {fixed} legacy row(s) to epoch timestamps.")
+
+    @staticmethod
+    def build_where(sentiment: str = None, intent: str = None, since: float = None, until: float = None):
+        """
+        Chroma metadata filter, applied inside the index (not after retrieval).
+        Returns None when there is nothing to filter on.
         """
-        Find past analyses that match the meaning of the query.
+        clauses = []
+        if sentiment:
+            clauses.append({"sentiment": sentiment.lower()})
+        if intent:
+            clauses.append({"intent": intent.strip().lower()})
+        if since is not None:
+            clauses.append({"timestamp": {"$gte": float(since)}})
+        if until is not None:
+            clauses.append({"timestamp": {"$lte": float(until)}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def sync_lexical_index(self, page_size: int = 500):
+        """Index rows the lexical index doesn't know yet (first run, or a crash between the two writes)."""
+        added = 0
+        for page in self.iter_pages(["documents"], page_size):
+            known = self.lexical.known(page["ids"])
+            missing = [(i, d) for i, d in zip(page["ids"], page["documents"]) if i not in known]
+            if missing:
+                self.lexical.upsert([i for i, _ in missing], [d for _, d in missing])
+                added += len(missing)
+        if added:
+            logger.info(f"🔎 Indexed {added} stored analyses for lexical search.")
+
+    def sync_analytics(self, page_size: int = 500):
+        """
+        Count stored analyses the aggregates don't know yet (first run).
+        Only what Chroma and the lexical index keep can be recovered:
+        sentiment, intent, day and entities, not scores or topics.
+        """
+        added = 0
+        for page in self.iter_pages(["metadatas"], page_size):
+            known = self.analytics.known(page["ids"])
+            missing = [(i, m or {}) for i, m in zip(page["ids"], page["metadatas"]) if i not in known]
+            if missing:
+                ids = [i for i, _ in missing]
+                entities = self.lexical.entities_of(ids)
+                self.analytics.upsert(
+                    ids, [m for _, m in missing], [m.get("timestamp", time.time()) for _, m in missing],
+                    [entities.get(i, []) for i in ids],
+                )
+                added += len(missing)
+        if added:
+            logger.info(f"📊 Counted {added} stored analyses into the analytics aggregates.")
+
+    def _rerank(self, query: str, ids: list, rows: dict) -> list:
+        """Cross-encoder re-scoring of the fused candidates (best first)."""
+        if self._reranker is None:
+            from sentence_transformers import CrossEncoder
+            self._reranker = CrossEncoder(self.rerank_model)
+        scores = self._reranker.predict([(query, rows[i][0]) for i in ids])
+        return [i for _, i in sorted(zip(scores, ids), key=lambda pair: pair[0], reverse=True)]
+
+    def _query(self, query_embeddings: list, n_results: int, where: dict = None) -> dict:
+        """
+        Dense search fanned out over the partitions the filter can match,
+        merged into one top-k by distance per query embedding (a row re-saved
+        in a newer month counts once, with its newest copy).
+        """
+        targets = self.partitions(*_time_bounds(where))
+        results = self._fanout(lambda c: c.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=_narrow_where(where, partition_range(c.name)),
+            include=["documents", "metadatas", "distances"],
+        ), targets)
+        merged = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for q in range(len(query_embeddings)):
+            best = {}
+            for result in results:
+                for i, d, m, dist in zip(result["ids"][q], result["documents"][q], result["metadatas"][q], result["distances"][q]):
+                    if i not in best or (m or {}).get("timestamp", 0) > (best[i][2] or {}).get("timestamp", 0):
+                        best[i] = (dist, d, m)
+            ranked = sorted(best.items(), key=lambda item: item[1][0])[:n_results]
+            merged["ids"].append([i for i, _ in ranked])
+            merged["documents"].append([d for _, (_, d, _) in ranked])
+            merged["metadatas"].append([m for _, (_, _, m) in ranked])
+            merged["distances"].append([dist for _, (dist, _, _) in ranked])
+        return merged
+
+    def _get(self, ids: list, where: dict = None) -> dict:
+        """Rows by id from whichever partitions hold them."""
+        targets = self.partitions(*_time_bounds(where))
+        found = {"ids": [], "documents": [], "metadatas": []}
+        for page in self._fanout(lambda c: c.get(ids=ids, where=_narrow_where(where, partition_range(c.name)), include=["documents", "metadatas"]), targets):
+            for key in found:
+                found[key] += page[key]
+        return found
+
+    def search_similar(self, query: str, n_results=3, where: dict = None, mode: str = None, rerank: bool = None):
         """
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-        return results
\ No newline at end of file
+        Find past analyses that match the query, optionally restricted by a
+        metadata filter (see build_where).
+        mode="vector": dense search only.
+        mode="hybrid": dense, BM25 and entity rankings merged with reciprocal
+        rank fusion, then optionally re-ranked by a cross-encoder.
+        Returns Chroma's query() layout: {"ids": [[...]], "documents": [[...]], "metadatas": [[...]]},
+        with the original texts as documents (also in summary-only mode).
+        """
+        mode = mode or self.search_mode
+        rerank = self.rerank if rerank is None else rerank
+        with stage("search_embed"):
+            query_embeddings = self.embedding_fn([query])
+        if mode == "vector" and not rerank:
+            with stage("search_vector"):
+                result = self._query(query_embeddings, n_results, where)
+            result["documents"][0] = self._hydrate(result["ids"][0], result["documents"][0], result["metadatas"][0])
+            return result
+
+        # 1. Candidates from every retriever
+        candidates = max(self.search_candidates, n_results)
+        with stage("search_vector"):
+            dense = self._query(query_embeddings, candidates, where)
+        rows = {i: (d, m) for i, d, m in zip(dense["ids"][0], dense["documents"][0], dense["metadatas"][0])}
+        rankings = [dense["ids"][0]]
+        if mode == "hybrid":
+            with stage("search_lexical"):
+                lexical = [self.lexical.search_bm25(query, candidates), self.lexical.search_entities(query, candidates)]
+            extra = list({i for ranking in lexical for i in ranking if i not in rows})
+            if extra:
+                # Lexical hits go through the same metadata filter, inside Chroma
+                found = self._get(extra, where)
+                rows.update({i: (d, m) for i, d, m in zip(found["ids"], found["documents"], found["metadatas"])})
+            rankings += [[i for i in ranking if i in rows] for ranking in lexical]
+
+        # 2. Fuse, then optionally re-rank the head of the list
+        ranked = [i for i, _ in reciprocal_rank_fusion(rankings, self.rrf_k)]
+        if rerank:
+            ranked = ranked[:candidates]
+            texts = self._hydrate(ranked, [rows[i][0] for i in ranked], [rows[i][1] for i in ranked])
+            rows.update({i: (t, rows[i][1]) for i, t in zip(ranked, texts)})
+            with stage("search_rerank"):
+                ranked = self._rerank(query, ranked, rows)
+        ranked = ranked[:n_results]
+        return {
+            "ids": [ranked],
+            "documents": [self._hydrate(ranked, [rows[i][0] for i in ranked], [rows[i][1] for i in ranked])],
+            "metadatas": [[rows[i][1] for i in ranked]],
+        }
+
+    # --- Retention & compaction ---
+
+    def _forget(self, ids: list):
+        """Drop deleted rows from the side indexes too."""
+        self.lexical.delete(ids)
+        self.raw.delete(ids)
+        self.analytics.delete(ids)
+        self.dedup.delete_members(ids)
+
+    def _all_ids(self, collection, page_size: int = 5000) -> list:
+        ids, offset = [], 0
+        while True:
+            page = collection.get(include=[], limit=page_size, offset=offset)["ids"]
+            if not page:
+                return ids
+            ids += page
+            offset += len(page)
+
+    def apply_retention(self, now: float = None) -> int:
+        """
+        Delete analyses older than MEMORY_RETENTION_DAYS. Whole expired month
+        partitions are dropped at once; otherwise rows are deleted by timestamp.
+        """
+        if self.retention_days <= 0:
+            return 0
+        cutoff = (now or time.time()) - self.retention_days * 86400
+        removed = 0
+        for name, collection in self.partitions(until=cutoff):
+            span = partition_range(name)
+            if span and span[1] <= cutoff:
+                ids = self._all_ids(collection)
+                with self._partition_lock:
+                    self.client.delete_collection(name)
+                    self._collections.pop(name, None)
+            else:
+                ids = collection.get(where={"timestamp": {"$lt": cutoff}}, include=[])["ids"]
+                if ids:
+                    collection.delete(ids=ids)
+            self._forget(ids)
+            removed += len(ids)
+        duplicates = self.dedup.expire(cutoff)
+        self.analytics.delete(duplicates)
+        removed += len(duplicates)
+        if removed:
+            logger.info(f"🗑️ Retention: removed {removed} analyses older than {self.retention_days:g} days.")
+        return removed
+
+    async def _retention_loop(self):
+        while True:
+            try:
+                await self._background_io(self.apply_retention)
+            except Exception as e:
+                logger.error(f"Retention pass failed: {e}")
+            await asyncio.sleep(self.retention_interval)
+
+    def _rebuild(self, name: str, page_size: int = 1000) -> dict:
+        """
+        Copy a partition into a fresh collection (a clean HNSW index without
+        deleted entries) and swap it in. Rows are re-routed on the way: to
+        their month partition if partitioning changed, and to summary-only
+        storage if MEMORY_STORE_TEXT changed.
+        """
+        old = self._collections[name]
+        tmp_name = f"{name}__rebuild"
+        try:
+            self.client.delete_collection(tmp_name)  # left over from an interrupted run
+        except Exception:
+            pass
+        tmp = self.client.create_collection(tmp_name, embedding_function=None, metadata=old.metadata)
+        moved = kept = 0
+        offset = 0
+        while True:
+            page = old.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+            if not len(page["ids"]):
+                break
+            offset += len(page["ids"])
+            ids, documents = page["ids"], page["documents"]
+            metadatas = [m or {} for m in page["metadatas"]]
+            if self.store_text == "summary":
+                fresh = [k for k, m in enumerate(metadatas) if not m.get("raw_text")]
+                self.raw.put([ids[k] for k in fresh], [documents[k] for k in fresh])
+                for k in fresh:
+                    documents[k] = self._stored_document(documents[k], metadatas[k])
+            else:
+                documents = self._hydrate(ids, documents, metadatas)
+                for metadata in metadatas:
+                    metadata.pop("raw_text", None)
+            groups = {}
+            for k, metadata in enumerate(metadatas):
+                groups.setdefault(self._partition_name(metadata.get("timestamp", time.time())), []).append(k)
+            for target, rows in groups.items():
+                collection = tmp if target == name else self._partition(target)
+                collection.upsert(
+                    ids=[ids[k] for k in rows],
+                    embeddings=[page["embeddings"][k] for k in rows],
+                    documents=[documents[k] for k in rows],
+                    metadatas=[metadatas[k] for k in rows],
+                )
+                if target == name:
+                    kept += len(rows)
+                else:
+                    moved += len(rows)
+        with self._partition_lock:
+            self.client.delete_collection(name)
+            if kept:
+                tmp.modify(name=name)
+                self._collections[name] = tmp
+            else:
+                self.client.delete_collection(tmp_name)
+                self._collections.pop(name, None)
+        return {"kept": kept, "moved": moved}
+
+    def _disk_usage(self) -> dict:
+        def size(path):
+            if os.path.isfile(path):
+                return os.path.getsize(path)
+            return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+        paths = {
+            "chroma": self.path, "lexical": self.lexical.path, "raw": self.raw.path,
+            "analytics": self.analytics.path, "dedup": self.dedup.path,
+        }
+        usage = {}
+        for key, path in paths.items():
+            files = [path] + ([f"{path}-wal", f"{path}-shm"] if os.path.isfile(path) else [])
+            usage[key] = sum(size(f) for f in files if os.path.exists(f))
+        return usage
+
+    def compact(self, rebuild: bool = True) -> dict:
+        """
+        Maintenance (run with the API stopped, see backend.maintenance):
+        retention, per-partition index rebuild / re-partitioning, orphan
+        cleanup in the side stores, then VACUUM of every SQLite file.
+        """
+        report = {"disk_before": self._disk_usage(), "expired": self.apply_retention(), "partitions": {}}
+        if rebuild:
+            for name in list(self._collections):
+                if name in self._collections:
+                    report["partitions"][name] = self._rebuild(name)
+        # Near-duplicate members have no row of their own, only analytics
+        live = {i for _, c in self.partitions() for i in self._all_ids(c)} | self.dedup.member_ids()
+        orphans = list((self.lexical.ids() | self.raw.ids() | self.analytics.ids()) - live)
+        self._forget(orphans)
+        report["orphans"] = len(orphans)
+        if rebuild and self.store_text == "full":
+            # Every row now holds its full text again
+            self.raw.delete(list(self.raw.ids()))
+        self.lexical.compact()
+        self.analytics.compact()
+        self.dedup.compact()
+        self.raw.compact()
+        try:
+            db = sqlite3.connect(os.path.join(self.path, "chroma.sqlite3"))
+            try:
+                db.execute("VACUUM")
+                segments = {r[0] for r in db.execute("SELECT id FROM segments")}
+            finally:
+                db.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not VACUUM the Chroma database: {e}")
+        else:
+            # Chroma leaves the index files of deleted collections behind
+            for entry in os.scandir(self.path):
+                if entry.is_dir() and entry.name not in segments:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+        report["disk_after"] = self._disk_usage()
+        return report
+
+    def partition_stats(self) -> dict:
+        partitions = []
+        for name, collection in self.partitions():
+            span = partition_range(name)
+            partitions.append({
+                "name": name,
+                "rows": collection.count(),
+                "from": datetime.fromtimestamp(span[0], timezone.utc).date().isoformat() if span else None,
+            })
+        return {
+            "partitioning": self.partitioning,
+            "store_text": self.store_text,
+            "retention_days": self.retention_days,
+            "partitions": partitions,
+            "raw_store": self.raw.stats(),
+            "disk_bytes": self._disk_usage(),
+        }
@@ -1,11 +1,66 @@
 # backend/services/nlp_engine.py
-import spacy
+import os
+import asyncio
+from functools import lru_cache
+from backend.utils.executors import run_cpu, cpu_worker_count
+
+
+@lru_cache(maxsize=None)
+def load_model(model_name: str):
+    # Cached per process: each CPU pool worker loads the model exactly once.
+    # Imported here so importing the API doesn't pay for spaCy.
+    import spacy
+    return spacy.load(model_name)
+
+
+def _warm_worker(model_name: str) -> int:
+    load_model(model_name)
+    return os.getpid()
+
+
+def _extract_entities(model_name: str, text: str):
+    doc = load_model(model_name)(text)
+    return [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
+
+
+def _extract_entities_batch(model_name: str, texts: list, batch_size: int, n_process: int):
+    """
+    One nlp.pipe pass over many texts. Returns one entry per text:
+    a list of entities, or an error string if that document failed.
+    """
+    nlp = load_model(model_name)
+    try:
+        return [
+            [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
+            for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+        ]
+    except Exception:
+        # A single bad document breaks the whole pipe; retry one by one to isolate it
+        results = []
+        for text in texts:
+            try:
+                results.append([{"text": ent.text, "label": ent.label_} for ent in nlp(text).ents])
+            except Exception as e:
+                results.append(f"NER failed: {e}")
+        return results
+
 
 class NLPService:
     def __init__(self):
-        # Load the small model for speed
-        self.nlp = spacy.load("en_core_web_sm")
+        # Load the small model for speed (lazily: see warm_up)
+        self.model_name = os.getenv("SPACY_MODEL", "en_core_web_sm")
+        # nlp.pipe tuning for batch requests
+        self.batch_size = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+        self.n_process = int(os.getenv("SPACY_N_PROCESS", "1"))
+
+    async def warm_up(self):
+        """Load the model in every CPU pool worker before real traffic arrives."""
+        pids = await asyncio.gather(*(run_cpu(_warm_worker, self.model_name) for _ in range(cpu_worker_count())))
+        return len(set(pids))
+
+    async def extract_entities_async(self, text: str):
+        # Runs in the CPU process pool so NER never blocks the event loop
+        return await run_cpu(_extract_entities, self.model_name, text)
 
-    def extract_entities(self, text: str):
-        doc = self.nlp(text)
-        return [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
\ No newline at end of file
+    async def extract_entities_batch_async(self, texts: list):
+        return await run_cpu(_extract_entities_batch, self.model_name, texts, self.batch_size, self.n_process)
@@ -1,53 +1,613 @@
-from backend.services.llm_provider import OllamaService
+import os
+import time
+import asyncio
+from collections import Counter
+from contextlib import aclosing
+from backend.services.llm_provider import OllamaService, INVALID_JSON_SUMMARY, _dedupe_entities
 from backend.services.nlp_engine import NLPService
-from backend.services.memory_store import MemoryStore
-from backend.core.schemas import AnalysisResult
-import ollama # Make sure to import this for the chat method
+from backend.services.analysis_cache import AnalysisCache
+from backend.services.job_queue import JobQueue
+from backend.services.context_builder import ContextBuilder
+from backend.services.fast_classifier import FastClassifier
+from backend.services.analysis_plan import AnalysisPlan
+from backend.services.report_service import ReportService
+from backend.services.admission import AdmissionController, SingleFlight
+from backend.core.schemas import AnalysisResult, BatchItemResult, BatchAnalysisResult
+from backend.core.exceptions import ComponentUnavailable
+from backend.utils.executors import run_io
+from backend.utils.chunker import split_into_chunks, estimate_tokens
+from backend.utils.file_parser import extract_pages
+from backend.utils.query_parser import parse_question_filters
+from backend.utils.logger import logger
+from backend.utils.metrics import stage, FAST_PATH, DEDUP
+
+NO_CONTEXT_ANSWER = "I couldn't find any relevant past analyses to answer that."
 
 class Orchestrator:
+    COMPONENTS = ("llm", "nlp", "memory")
+
     def __init__(self):
+        # Cheap to construct; the heavy parts (spaCy, embeddings, Chroma,
+        # the Ollama model) are loaded concurrently by start().
         self.llm = OllamaService()
         self.nlp = NLPService()
-        self.memory = MemoryStore()
-
-    async def run_hybrid_analysis(self, text: str) -> AnalysisResult:
-        # 1. Classical NLP Pass
-        spacy_raw_entities = self.nlp.extract_entities(text)
-        entities_str = ", ".join([f"{e['text']} ({e['label']})" for e in spacy_raw_entities])
-
-        # 2. Enhanced Prompt
-        enhanced_prompt = f"""
-        Context: Named Entities detected: [{entities_str}].
-        Analyze the text below considering the context above.
-        Text: {text}
+        self.memory = None
+        self.cache = AnalysisCache()
+        # Max LLM calls one batch may have in flight (leaves room for interactive traffic)
+        self.batch_concurrency = int(os.getenv("BATCH_LLM_CONCURRENCY", str(self.llm.max_concurrency)))
+        # Documents longer than this (estimated tokens) are analyzed chunk by chunk
+        self.chunk_tokens = int(os.getenv("DOC_CHUNK_TOKENS", "1500"))
+        # Chat: how many analyses to retrieve, and how to pack them into the prompt
+        self.chat_results = int(os.getenv("CHAT_RESULTS", "5"))
+        self.context = ContextBuilder()
+        self.chat_stats = {"calls": 0, "prompt_tokens": 0, "context_tokens": 0, "total_ms": 0.0}
+        # Fast path (modules=["fast"]): local classifier, LLM only when it isn't sure
+        self.classifier = FastClassifier()
+        self.fast_min_confidence = float(os.getenv("FAST_MIN_CONFIDENCE", "0.75"))
+        self.fast_max_tokens = int(os.getenv("FAST_MAX_TOKENS", "80"))
+        self.fast_stats = {"fast": 0, "escalated": Counter()}
+        self._retraining = None
+        # Near-duplicates of earlier LLM analyses reuse them (see DedupIndex)
+        self.dedup = os.getenv("DEDUP", "1") == "1"
+        # PDF reports: rendered in the CPU pool, cached by content hash
+        self.reports = ReportService()
+        # In front of the pipeline: identical concurrent requests share one
+        # run, and a bounded priority queue caps how many run at once
+        self.inflight = SingleFlight()
+        self.admission = AdmissionController(2 * self.llm.max_concurrency)
+        self.jobs = JobQueue({
+            "analyze_text": self._job_analyze_text,
+            "analyze_file": self._job_analyze_file,
+        })
+
+        # Per-component readiness, reported by the health check
+        self.readiness = {name: {"state": "pending"} for name in self.COMPONENTS}
+        self._ready = {name: asyncio.Event() for name in self.COMPONENTS}
+        self._warmups = []
+        # How long a request may wait for a component that is still warming up
+        self.startup_wait = float(os.getenv("STARTUP_WAIT_TIMEOUT", "60"))
+
+    # --- Startup / readiness ---
+    async def _load_llm(self):
+        await self.llm.check_connection()
+        if os.getenv("OLLAMA_WARMUP", "0") == "1":
+            await self.llm.warm_up()
+
+    async def _load_nlp(self):
+        workers = await self.nlp.warm_up()
+        logger.info(f"🔤 spaCy '{self.nlp.model_name}' loaded in {workers} worker(s).")
+
+    async def _load_memory(self):
+        # Deferred import: chromadb + the embedding model are the slowest part of startup
+        from backend.services.memory_store import MemoryStore
+        memory = await run_io(MemoryStore)
+        await memory.start()
+        self.memory = memory
+        try:
+            await run_io(self.classifier.train, memory)
+        except Exception as e:
+            logger.warning(f"⚠️ Fast classifier training failed, using the lexicon: {e}")
+
+    async def _warm(self, name: str, loader):
+        self.readiness[name] = {"state": "warming"}
+        started = time.perf_counter()
+        try:
+            await loader()
+            self.readiness[name] = {"state": "ready"}
+        except Exception as e:
+            self.readiness[name] = {"state": "failed", "error": str(e) or type(e).__name__}
+            logger.error(f"❌ {name} failed to start: {e}")
+        finally:
+            self.readiness[name]["seconds"] = round(time.perf_counter() - started, 2)
+            self._ready[name].set()
+
+    async def _require(self, *names):
+        """Wait (bounded) for components a request needs; 503-worthy error if unavailable."""
+        for name in names:
+            if not self._ready[name].is_set():
+                try:
+                    await asyncio.wait_for(self._ready[name].wait(), timeout=self.startup_wait)
+                except asyncio.TimeoutError:
+                    raise ComponentUnavailable(f"'{name}' is still warming up, try again shortly.")
+            if name == "memory" and self.memory is None:
+                raise ComponentUnavailable(f"'memory' failed to start: {self.readiness[name].get('error')}")
+
+    def health(self) -> dict:
+        states = {c["state"] for c in self.readiness.values()}
+        if states == {"ready"}:
+            status = "ready"
+        elif states & {"pending", "warming"}:
+            status = "warming"
+        else:
+            status = "degraded"
+        return {"status": status, "components": self.readiness}
+
+    def cache_key(self, text: str) -> str:
+        # Also used as the Chroma document id, so memory is deduplicated too
+        return self.cache.make_key(text, self.llm.model, self.llm.prompt_version)
+
+    async def _remember(self, key: str, result: AnalysisResult):
+        # Never pin a fallback result: the next attempt may produce valid JSON
+        if result.summary != INVALID_JSON_SUMMARY:
+            await run_io(self.cache.put, key, result.model_dump())
+
+    def _escalate(self, reason: str) -> str:
+        self.fast_stats["escalated"][reason] += 1
+        FAST_PATH.inc(outcome=reason)
+        return reason
+
+    def _plan_key(self, text: str, plan: AnalysisPlan) -> str:
+        """Cache key / memory id of what `plan` computes (partial results never replace full ones)."""
+        if not plan.needs_llm:
+            return self.cache.make_key(text, "spacy", "entities")
+        if plan.partial_llm:
+            return self.cache.make_key(text, self.llm.model, f"{self.llm.prompt_version}:{plan.signature}")
+        return self.cache_key(text)
+
+    async def _store(self, plan: AnalysisPlan, texts: list, results: list, keys: list, entities: list,
+                     source: str = None):
+        """Memory write (if the plan has one) and result cache write, side by side."""
+        if not texts:
+            return
+        analyses = [r.model_dump(exclude_none=True) for r in results]
+        writes = [self._remember(k, r) for k, r in zip(keys, results)] if plan.needs_llm else []
+        if plan.memory:
+            extra = [{"source": source} if source else {} for _ in texts]
+            writes.append(self.memory.enqueue_analyses(texts, analyses, keys, extra_metadata=extra, entities=entities))
+        if writes:
+            with stage("memory_enqueue"):
+                await asyncio.gather(*writes)
+        # New LLM labels for the fast classifier
+        if source is None and {"sentiment", "intent"} & set(plan.llm_fields):
+            self._learned(len(texts))
+
+    def _dedup_active(self, plan: AnalysisPlan) -> bool:
+        # Never waits for memory: while it warms up every text goes to the LLM
+        return self.dedup and plan.needs_llm and self.memory is not None
+
+    @staticmethod
+    def _reuse(match: dict, entities) -> AnalysisResult:
+        """A near-duplicate's result: its cluster's LLM fields with this text's own entities."""
+        DEDUP.inc(outcome=match["route"])
+        return AnalysisResult(**{
+            **match["analysis"], "entities": _dedupe_entities(entities), "cluster_id": match["cluster_id"],
+        })
+
+    async def _cluster(self, plan: AnalysisPlan, texts: list, results: list, keys: list, probes: list):
+        """Full LLM results become clusters that later near-duplicates reuse."""
+        rows = [k for k, r in enumerate(results) if not plan.partial_llm and r.summary != INVALID_JSON_SUMMARY]
+        if not rows:
+            return
+        DEDUP.inc(len(rows), outcome="unique")
+        for k in rows:
+            results[k].cluster_id = keys[k]
+        await run_io(
+            self.memory.add_clusters, [keys[k] for k in rows], [texts[k] for k in rows],
+            [results[k].model_dump(exclude_none=True, exclude={"cluster_id", "entities"}) for k in rows],
+            [probes[k] for k in rows],
+        )
+
+    async def _store_duplicates(self, plan: AnalysisPlan, texts: list, results: list, keys: list, entities: list,
+                                matches: list):
+        """Result cache write and cluster link (no memory row, no LLM label) for reused analyses."""
+        if not texts:
+            return
+        writes = [self._remember(k, r) for k, r in zip(keys, results)]
+        if plan.memory:
+            writes.append(run_io(
+                self.memory.link_duplicates, keys, texts, [r.cluster_id for r in results],
+                [r.model_dump(exclude_none=True, exclude={"cluster_id"}) for r in results],
+                [m["similarity"] for m in matches], [m["route"] for m in matches], entities,
+            ))
+        with stage("memory_enqueue"):
+            await asyncio.gather(*writes)
+
+    def _fast_precheck(self, text: str, plan: AnalysisPlan) -> str:
+        """Escalation reason known before classifying (None if the text may take the fast path)."""
+        if plan.wants_text:
+            return self._escalate("summary_requested")
+        if estimate_tokens(text) > self.fast_max_tokens:
+            return self._escalate("long_text")
+        return None
+
+    def _fast_verdict(self, text: str, entities, vector):
+        """Fast-path result for one text, or None when the classifier isn't confident enough."""
+        verdict = self.classifier.classify(text, vector)
+        if verdict["confidence"] < self.fast_min_confidence:
+            self._escalate("low_confidence")
+            return None
+        self.fast_stats["fast"] += 1
+        FAST_PATH.inc(outcome="fast")
+        # No summary/topics (None, not empty): they are left out of the response and
+        # the memory row instead of passing for a real, empty summary
+        return AnalysisResult(
+            sentiment=verdict["sentiment"],
+            sentiment_score=verdict["sentiment_score"],
+            intent=verdict["intent"],
+            entities=_dedupe_entities(entities),
+        )
+
+    def _learned(self, n: int):
+        """Counts new LLM labels and refreshes the classifier in the background when due."""
+        if self.classifier.needs_retrain(n) and (self._retraining is None or self._retraining.done()):
+            self._retraining = asyncio.ensure_future(run_io(self.classifier.train, self.memory))
+
+    def fast_report(self) -> dict:
+        fast = self.fast_stats["fast"]
+        escalated = sum(self.fast_stats["escalated"].values())
+        return {
+            "requests": fast + escalated,
+            "fast": fast,
+            "escalated": escalated,
+            "escalation_rate": round(escalated / (fast + escalated), 3) if fast + escalated else None,
+            "escalation_reasons": dict(self.fast_stats["escalated"]),
+            "min_confidence": self.fast_min_confidence,
+            "max_tokens": self.fast_max_tokens,
+            "classifier": self.classifier.stats(),
+        }
+
+    async def run_hybrid_analysis(self, text: str, modules: list = None) -> AnalysisResult:
+        plan = AnalysisPlan(modules)
+        # 0. Same text already analyzed with this model + prompt?
+        key = self.cache_key(text)
+        with stage("cache_lookup"):
+            cached = await run_io(self.cache.get, key)
+            if not cached and plan.partial_llm:
+                cached = await run_io(self.cache.get, self._plan_key(text, plan))
+        if cached:
+            return AnalysisResult(**plan.project(cached))
+
+        if plan.fast and plan.needs_llm and self._fast_precheck(text, plan) is None:
+            fast_key = self.cache.make_key(text, "fast", FastClassifier.VERSION)
+            cached = await run_io(self.cache.get, fast_key)
+            if cached:
+                return AnalysisResult(**plan.project(cached))
+            await self._require("nlp", "memory")
+            # NER and the embedding are independent: run them side by side
+            with stage("fast_classify"):
+                spacy_raw_entities, vectors = await asyncio.gather(
+                    self.nlp.extract_entities_async(text),
+                    run_io(self.memory.embedding_fn, [text]),
+                )
+                result = self._fast_verdict(text, spacy_raw_entities, vectors[0])
+            if result is not None:
+                await self._store(plan, [text], [result], [fast_key], [spacy_raw_entities], source="fast")
+                return AnalysisResult(**plan.project(result.model_dump()))
+            logger.info("⬆️ Fast path not confident enough, escalating to the LLM.")
+
+        await self._require("nlp", *(["llm"] if plan.needs_llm else []), *(["memory"] if plan.memory else []))
+
+        # 1. Classical NLP Pass, side by side with 2. the near-duplicate probe
+        # (it only needs the text; spaCy's entities are needed from here on)
+        async def ner():
+            with stage("ner"):
+                return await self.nlp.extract_entities_async(text)
+
+        async def probe():
+            if not self._dedup_active(plan):
+                return [None], None
+            return await run_io(self.memory.find_duplicates, [text])
+
+        spacy_raw_entities, (matches, probes) = await asyncio.gather(ner(), probe())
+
+        # 2. Near-duplicate of an earlier analysis: reuse it instead of the LLM
+        if matches[0] is not None:
+            result = self._reuse(matches[0], spacy_raw_entities)
+            await self._store_duplicates(plan, [text], [result], [self._plan_key(text, plan)],
+                                         [spacy_raw_entities], matches)
+            return AnalysisResult(**plan.project(result.model_dump()))
+
+        # 3. Local LLM Pass, with spaCy's entities as context
+        # (prompt build, generation and JSON parse are timed inside).
+        # Skipped when only entities were requested.
+        if plan.needs_llm:
+            llm_result_dict = await self.llm.analyze_text(
+                text, spacy_raw_entities, plan.llm_fields if plan.partial_llm else None,
+            )
+        else:
+            llm_result_dict = {"entities": _dedupe_entities(spacy_raw_entities)}
+        result = AnalysisResult(**llm_result_dict)
+        if probes:
+            await self._cluster(plan, [text], [result], [key], probes)
+
+        # 4. Save to Memory (Fire and forget: buffered, flushed in batches;
+        # embedding and Chroma write are timed when the buffer flushes)
+        await self._store(plan, [text], [result], [self._plan_key(text, plan)], [spacy_raw_entities])
+
+        return AnalysisResult(**plan.project(result.model_dump()))
+
+    async def run_batch_analysis(self, texts: list, modules: list = None) -> BatchAnalysisResult:
+        """
+        Analyze many texts in one go: a single nlp.pipe pass, bounded LLM
+        fan-out and one batched memory write. Failures are reported per item.
         """
+        plan = AnalysisPlan(modules)
+        await self._require("nlp", *(["llm"] if plan.needs_llm else []), *(["memory"] if plan.memory or plan.fast else []))
+        items = [BatchItemResult(index=i) for i in range(len(texts))]
+        keys = [self.cache_key(text) for text in texts]
+        plan_keys = [self._plan_key(text, plan) for text in texts]
+        fast_keys = [self.cache.make_key(text, "fast", FastClassifier.VERSION) for text in texts] if plan.fast else None
+        valid = []
+        duplicates = {}  # index -> index of the first occurrence of the same text
+        first_seen = {}
+        for i, text in enumerate(texts):
+            if len(text.strip()) < 10:
+                items[i].error = "Text too short (min 10 characters)."
+            elif keys[i] in first_seen:
+                duplicates[i] = first_seen[keys[i]]
+            else:
+                first_seen[keys[i]] = i
+                cached = await run_io(self.cache.get, keys[i])
+                if not cached and plan.partial_llm:
+                    cached = await run_io(self.cache.get, plan_keys[i])
+                if not cached and plan.fast and plan.needs_llm and not plan.wants_text:
+                    cached = await run_io(self.cache.get, fast_keys[i])
+                if cached:
+                    items[i].result = AnalysisResult(**cached)
+                else:
+                    valid.append(i)
 
-        # 3. Local LLM Pass
-        llm_result_dict = await self.llm.analyze_text(enhanced_prompt)
-        
-        # 4. Save to Memory (Fire and forget)
-        self.memory.save_analysis(text, llm_result_dict)
+        # 1. Classical NLP Pass over the whole batch
+        with stage("ner"):
+            batch_entities = await self.nlp.extract_entities_batch_async([texts[i] for i in valid])
+        ner = dict(zip(valid, batch_entities))
 
-        return AnalysisResult(**llm_result_dict)
+        # 1b. Fast path: short texts the local classifier is sure about skip the LLM
+        fast_done = []
+        candidates = [i for i in valid if plan.fast and plan.needs_llm and not isinstance(ner[i], str)
+                      and self._fast_precheck(texts[i], plan) is None]
+        if candidates:
+            with stage("fast_classify"):
+                vectors = await run_io(self.memory.embedding_fn, [texts[i] for i in candidates])
+                for i, vector in zip(candidates, vectors):
+                    result = self._fast_verdict(texts[i], ner[i], vector)
+                    if result is not None:
+                        items[i].result = result
+                        fast_done.append(i)
+        pending = [i for i in valid if items[i].result is None]
 
-    def query_memory(self, query: str):
-        return self.memory.search_similar(query)
+        # 1c. Near-duplicates, of earlier analyses or of each other, share one LLM result
+        probes, reused, followers = {}, {}, {}
+        checked = [i for i in pending if not isinstance(ner[i], str)] if self._dedup_active(plan) else []
+        if checked:
+            matches, found = await run_io(self.memory.find_duplicates, [texts[i] for i in checked])
+            probes = dict(zip(checked, found))
+            for i, match in zip(checked, matches):
+                if match is None:
+                    continue
+                if "leader" in match:
+                    followers[i] = {**match, "leader": checked[match["leader"]]}
+                else:
+                    items[i].result = self._reuse(match, ner[i])
+                    reused[i] = match
+            pending = [i for i in pending if i not in reused and i not in followers]
 
-    # --- NEW CHAT METHOD ---
-    async def chat_with_memory(self, user_question: str) -> str:
-        # 1. Search Vector DB
-        results = self.memory.search_similar(user_question, n_results=5)
-        
-        # 2. Extract Context
-        context_text = ""
-        if results['documents']:
-            context_text = "\n\n".join(results['documents'][0])
-            
-        if not context_text:
-            return "I couldn't find any relevant past analyses to answer that."
+        # 2. Local LLM Pass, fanned out with bounded concurrency (entities-only: none)
+        slots = asyncio.Semaphore(self.batch_concurrency)
+        fields = plan.llm_fields if plan.partial_llm else None
 
-        # 3. Prompt with Context
-        prompt = f"""
+        async def analyze_one(i, spacy_raw_entities):
+            if isinstance(spacy_raw_entities, str):
+                raise RuntimeError(spacy_raw_entities)
+            if not plan.needs_llm:
+                return AnalysisResult(entities=_dedupe_entities(spacy_raw_entities))
+            async with slots:
+                llm_result_dict = await self.llm.analyze_text(texts[i], spacy_raw_entities, fields)
+            return AnalysisResult(**llm_result_dict)
+
+        outcomes = await asyncio.gather(
+            *(analyze_one(i, ner[i]) for i in pending),
+            return_exceptions=True,
+        )
+
+        done = []
+        for i, outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                items[i].error = str(outcome) or type(outcome).__name__
+            else:
+                items[i].result = outcome
+                done.append(i)
+
+        clustered = [i for i in done if i in probes]
+        await self._cluster(plan, [texts[i] for i in clustered], [items[i].result for i in clustered],
+                            [plan_keys[i] for i in clustered], [probes[i] for i in clustered])
+        for i, match in followers.items():
+            leader = items[match["leader"]].result
+            if leader is None or leader.cluster_id is None:
+                # The leader failed or fell back: share its outcome like an exact duplicate
+                duplicates[i] = match["leader"]
+            else:
+                reused[i] = {**match, "cluster_id": leader.cluster_id,
+                             "analysis": leader.model_dump(exclude_none=True, exclude={"cluster_id", "entities"})}
+                items[i].result = self._reuse(reused[i], ner[i])
+
+        # 3. Batched write to memory (write-behind) and to the result cache
+        await asyncio.gather(
+            self._store(plan, [texts[i] for i in done], [items[i].result for i in done],
+                        [plan_keys[i] for i in done], [ner[i] for i in done]),
+            self._store(plan, [texts[i] for i in fast_done], [items[i].result for i in fast_done],
+                        [fast_keys[i] for i in fast_done], [ner[i] for i in fast_done], source="fast"),
+            self._store_duplicates(plan, [texts[i] for i in reused], [items[i].result for i in reused],
+                                   [plan_keys[i] for i in reused], [ner[i] for i in reused], list(reused.values())),
+        )
+
+        for item in items:
+            if item.result is not None:
+                item.result = AnalysisResult(**plan.project(item.result.model_dump()))
+        for i, first in duplicates.items():
+            items[i].result, items[i].error = items[first].result, items[first].error
+
+        failed = sum(1 for item in items if item.error)
+        fast_note = f", {len(fast_done)} on the fast path" if plan.fast else ""
+        dedup_note = f", {len(reused)} near-duplicates reused" if reused else ""
+        logger.info(f"📦 Batch finished: {len(texts) - failed} ok{fast_note}{dedup_note}, {failed} failed.")
+        return BatchAnalysisResult(items=items, succeeded=len(texts) - failed, failed=failed)
+
+    async def run_document_analysis(self, text: str, progress=None, modules: list = None) -> AnalysisResult:
+        """
+        Analysis for arbitrarily long documents: splits into token-bounded
+        chunks, analyzes them concurrently and merges one document-level
+        result. Each chunk is stored in memory as its own entry.
+        `progress(fraction)` is called as chunks finish. A multi-chunk document
+        is always analyzed in full (the merge needs every field); `modules`
+        then only selects the fields returned.
+        """
+        progress = progress or (lambda fraction: None)
+        chunks = split_into_chunks(text, self.chunk_tokens)
+        if len(chunks) <= 1:
+            return await self.run_hybrid_analysis(text, modules)
+        plan = AnalysisPlan(modules)
+        if not plan.full:
+            result = await self.run_document_analysis(text, progress)
+            return AnalysisResult(**plan.project(result.model_dump()))
+
+        doc_key = self.cache_key(text)
+        cached = await run_io(self.cache.get, doc_key)
+        if cached:
+            return AnalysisResult(**cached)
+        await self._require("nlp", "llm", "memory")
+
+        logger.info(f"📚 Long document: analyzing {len(chunks)} chunks...")
+
+        # 1. Classical NLP Pass over all chunks at once
+        with stage("ner"):
+            chunk_entities = await self.nlp.extract_entities_batch_async(chunks)
+
+        # 2. Local LLM Pass per chunk, bounded like a batch
+        slots = asyncio.Semaphore(self.batch_concurrency)
+        finished = 0
+
+        async def analyze_chunk(chunk, spacy_raw_entities):
+            nonlocal finished
+            if isinstance(spacy_raw_entities, str):
+                spacy_raw_entities = []
+            try:
+                async with slots:
+                    llm_result_dict = await self.llm.analyze_text(chunk, spacy_raw_entities)
+                return AnalysisResult(**llm_result_dict)
+            finally:
+                finished += 1
+                # Leave the last 10% for the merge step
+                progress(0.9 * finished / len(chunks))
+
+        outcomes = await asyncio.gather(
+            *(analyze_chunk(c, e) for c, e in zip(chunks, chunk_entities)),
+            return_exceptions=True,
+        )
+        parts = [(i, r) for i, r in enumerate(outcomes) if not isinstance(r, Exception)]
+        if not parts:
+            raise outcomes[0]
+        if len(parts) < len(chunks):
+            logger.warning(f"⚠️ {len(chunks) - len(parts)} of {len(chunks)} chunks failed; merging the rest.")
+
+        # 3. Merge into one document-level result
+        result = await self._merge_chunk_results(
+            [r for _, r in parts], [len(chunks[i]) for i, _ in parts]
+        )
+
+        # 4. Per-chunk entries in memory, linked to the document
+        await self.memory.enqueue_analyses(
+            [chunks[i] for i, _ in parts],
+            [r.model_dump() for _, r in parts],
+            [f"{doc_key}:{i}" for i, _ in parts],
+            [{"doc_id": doc_key, "chunk": i, "chunks": len(chunks)} for i, _ in parts],
+            entities=[chunk_entities[i] if isinstance(chunk_entities[i], list) else [] for i, _ in parts],
+        )
+        await self._remember(doc_key, result)
+        return result
+
+    async def _merge_chunk_results(self, results: list, weights: list) -> AnalysisResult:
+        total = sum(weights)
+        score = sum(r.sentiment_score * w for r, w in zip(results, weights)) / total
+        sentiment = "positive" if score > 0.2 else "negative" if score < -0.2 else "neutral"
+
+        intents = Counter()
+        for r, w in zip(results, weights):
+            intents[r.intent] += w
+
+        topics = Counter(t.lower() for r in results for t in r.topics)
+
+        entities, seen = [], set()
+        for r in results:
+            for ent in r.entities:
+                if (ent.text.lower(), ent.label) not in seen:
+                    seen.add((ent.text.lower(), ent.label))
+                    entities.append(ent)
+
+        # Summary of summaries
+        summaries = "\n".join(f"- {r.summary}" for r in results)
+        response = await self.llm.chat(messages=[{'role': 'user', 'content': f"""
+        These are summaries of consecutive sections of one document:
+        {summaries}
+
+        Write a concise summary (at most 3 sentences) of the whole document.
+        Reply with the summary only.
+        """}])
+
+        return AnalysisResult(
+            sentiment=sentiment,
+            sentiment_score=round(score, 3),
+            summary=response['message']['content'].strip(),
+            topics=[t for t, _ in topics.most_common(8)],
+            intent=intents.most_common(1)[0][0],
+            entities=entities,
+        )
+
+    # --- Background jobs ---
+    # Jobs take a bulk admission slot like /analyze/batch, so a burst of them
+    # doesn't compete with interactive traffic; turned away, they wait and retry.
+    async def _job_analyze_text(self, payload: dict, progress) -> dict:
+        result = await self.admission.run(
+            "bulk", self.run_document_analysis, payload["text"], progress, payload.get("modules"), patient=True,
+        )
+        return result.model_dump(exclude_none=True)
+
+    async def _job_analyze_file(self, payload: dict, progress) -> dict:
+        return await self.admission.run("bulk", self._analyze_file, payload, progress, patient=True)
+
+    async def _analyze_file(self, payload: dict, progress) -> dict:
+        with stage("parse_file"):
+            pages = await extract_pages(payload["path"])
+        text = "\n".join(pages).strip()
+        if len(text) < 10:
+            raise ValueError("File empty.")
+        progress(0.05)
+        result = await self.run_document_analysis(text, lambda f: progress(0.05 + 0.95 * f))
+        return result.model_dump()
+
+    async def start(self, wait: bool = False):
+        """
+        Loads components concurrently in the background. With wait=True
+        (STARTUP_MODE=blocking) it returns only once all of them are done.
+        """
+        self._warmups = [
+            asyncio.create_task(self._warm(name, getattr(self, f"_load_{name}")))
+            for name in self.COMPONENTS
+        ]
+        await self.jobs.start()
+        if wait:
+            await asyncio.gather(*self._warmups)
+
+    async def close(self):
+        await self.jobs.stop()
+        for task in self._warmups:
+            task.cancel()
+        await asyncio.gather(*self._warmups, return_exceptions=True)
+        if self.memory:
+            await self.memory.close()
+        await self.llm.close()
+        self.cache.close()
+
+    async def query_memory(self, query: str, n_results: int = 3, **filters):
+        """`filters`: sentiment, intent, since, until (epoch seconds), see MemoryStore.build_where."""
+        await self._require("memory")
+        where = self.memory.build_where(**filters)
+        return await run_io(self.memory.search_similar, query, n_results, where)
+
+    # --- NEW CHAT METHOD ---
+    @staticmethod
+    def _chat_prompt(user_question: str, context_text: str) -> str:
+        return f"""
         You are an AI assistant with access to a database of past text analyses.
         
         User Question: "{user_question}"
@@ -61,10 +621,80 @@ class Orchestrator:
         Keep the answer concise and professional.
         """
 
-        # 4. Call Ollama directly for a chat response
-        response = ollama.chat(
-            model=self.llm.model,
+    async def _build_chat_prompt(self, user_question: str):
+        """Returns (prompt, context stats), or (None, None) when nothing relevant is stored."""
+        await self._require("memory", "llm")
+        # 1. Narrow the search to the time window / intent the question mentions
+        filters = parse_question_filters(user_question)
+        where = self.memory.build_where(**filters)
+        results = await run_io(self.memory.search_similar, user_question, self.chat_results, where)
+        if where and not results['documents'][0] and (filters["intent"] or filters["sentiment"]):
+            # Intent/sentiment words can be loose; keep only the time window
+            where = self.memory.build_where(since=filters["since"], until=filters["until"])
+            results = await run_io(self.memory.search_similar, user_question, self.chat_results, where)
+
+        # 2. Pack the most relevant passages into the token budget
+        if not results['documents'] or not results['documents'][0]:
+            return None, None
+        with stage("context_build"):
+            context_text, stats = self.context.build(user_question, results['documents'][0], results['metadatas'][0])
+        if not context_text:
+            return None, None
+
+        # 3. Prompt with Context
+        return self._chat_prompt(user_question, context_text), stats
+
+    def _record_chat(self, stats: dict, prompt_tokens, started: float):
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.chat_stats["calls"] += 1
+        self.chat_stats["prompt_tokens"] += prompt_tokens or 0
+        self.chat_stats["context_tokens"] += stats["context_tokens"]
+        self.chat_stats["total_ms"] += total_ms
+        logger.info(
+            f"💬 Chat: {stats['context_tokens']} context tokens from {stats['documents']} analyses "
+            f"({stats['passages']} passages, {stats['summaries']} summaries), "
+            f"{prompt_tokens} prompt tokens, {total_ms} ms"
+        )
+
+    def chat_report(self) -> dict:
+        calls = self.chat_stats["calls"]
+        return {
+            "calls": calls,
+            "context_token_budget": self.context.token_budget,
+            "avg_prompt_tokens": round(self.chat_stats["prompt_tokens"] / calls, 1) if calls else 0.0,
+            "avg_context_tokens": round(self.chat_stats["context_tokens"] / calls, 1) if calls else 0.0,
+            "avg_total_ms": round(self.chat_stats["total_ms"] / calls, 1) if calls else 0.0,
+        }
+
+    async def chat_with_memory(self, user_question: str) -> str:
+        started = time.perf_counter()
+        prompt, stats = await self._build_chat_prompt(user_question)
+        if prompt is None:
+            return NO_CONTEXT_ANSWER
+
+        # 4. Call Ollama through the shared async client
+        response = await self.llm.chat(
             messages=[{'role': 'user', 'content': prompt}]
         )
+        self._record_chat(stats, response.get('prompt_eval_count'), started)
         
-        return response['message']['content']
\ No newline at end of file
+        return response['message']['content']
+
+    async def stream_chat_with_memory(self, user_question: str):
+        """
+        Streaming variant of chat_with_memory: yields answer tokens as the
+        model generates them.
+        """
+        started = time.perf_counter()
+        prompt, stats = await self._build_chat_prompt(user_question)
+        if prompt is None:
+            yield NO_CONTEXT_ANSWER
+            return
+
+        async with aclosing(self.llm.stream_chat(messages=[{'role': 'user', 'content': prompt}])) as stream:
+            async for part in stream:
+                token = part['message']['content']
+                if token:
+                    yield token
+                if part.get('done'):
+                    self._record_chat(stats, part.get('prompt_eval_count'), started)
@@ -0,0 +1,79 @@
+# backend/services/raw_store.py
+import os
+import zlib
+import sqlite3
+import threading
+
+
+class RawStore:
+    """
+    Original analysis texts, zlib-compressed, keyed by analysis id.
+    Used when MEMORY_STORE_TEXT=summary: Chroma then keeps only the summary
+    (plus the vector) and the full text is fetched from here for the few
+    rows a search actually returns.
+    """
+
+    def __init__(self, path: str, level: int = 6):
+        self.path = path
+        self.level = level
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS raw_texts (
+                id TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM raw_texts").fetchone()[0]
+
+    def put(self, ids: list, texts: list):
+        rows = []
+        for doc_id, text in zip(ids, texts):
+            data = text.encode("utf-8")
+            rows.append((doc_id, zlib.compress(data, self.level), len(data)))
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO raw_texts (id, body, size) VALUES (?, ?, ?)", rows)
+            self.db.commit()
+
+    def get(self, ids: list) -> dict:
+        if not ids:
+            return {}
+        marks = ", ".join("?" for _ in ids)
+        with self._lock:
+            rows = self.db.execute(f"SELECT id, body FROM raw_texts WHERE id IN ({marks})", list(ids)).fetchall()
+        return {doc_id: zlib.decompress(body).decode("utf-8") for doc_id, body in rows}
+
+    def delete(self, ids: list):
+        if not ids:
+            return
+        with self._lock:
+            self.db.executemany("DELETE FROM raw_texts WHERE id = ?", [(i,) for i in ids])
+            self.db.commit()
+
+    def ids(self) -> set:
+        with self._lock:
+            return {r[0] for r in self.db.execute("SELECT id FROM raw_texts")}
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows, raw, stored = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM raw_texts"
+            ).fetchone()
+        return {"rows": rows, "text_bytes": raw, "compressed_bytes": stored,
+                "ratio": round(raw / stored, 2) if stored else None}
+
+    def compact(self):
+        """Give the space of deleted rows back to the file system."""
+        with self._lock:
+            self.db.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            self.db.close()
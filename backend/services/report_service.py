@@ -0,0 +1,105 @@
+# backend/services/report_service.py
+import os
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from backend.utils.executors import run_cpu, run_io
+from backend.utils.metrics import REPORT_RENDERS, stage
+
+# Bump when the layout in report_generator changes: old cached PDFs then miss
+REPORT_LAYOUT_VERSION = "2"
+
+
+class ReportService:
+    """
+    PDF reports rendered in the CPU process pool (FPDF is pure Python and
+    would block the event loop), returned as bytes, and cached in memory
+    by content hash: the same analysis is rendered once.
+    """
+
+    def __init__(self):
+        self.cache_bytes = int(float(os.getenv("REPORT_CACHE_MB", "64")) * 1024 * 1024)
+        self.max_items = int(os.getenv("REPORT_MAX_ITEMS", "500"))
+        self._lru = OrderedDict()  # key -> pdf/zip bytes
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats_counts = {"hits": 0, "misses": 0, "rendered_bytes": 0}
+
+    @staticmethod
+    def make_key(kind: str, payload) -> str:
+        body = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(f"{REPORT_LAYOUT_VERSION}\x00{kind}\x00{body}".encode("utf-8")).hexdigest()
+
+    def _get(self, key: str):
+        with self._lock:
+            content = self._lru.get(key)
+            if content is not None:
+                self._lru.move_to_end(key)
+                self.stats_counts["hits"] += 1
+                REPORT_RENDERS.inc(result="cache_hit")
+                return content
+            self.stats_counts["misses"] += 1
+            return None
+
+    def _put(self, key: str, content: bytes):
+        if len(content) > self.cache_bytes:
+            return
+        with self._lock:
+            if key in self._lru:
+                self._size -= len(self._lru.pop(key))
+            self._lru[key] = content
+            self._size += len(content)
+            while self._size > self.cache_bytes:
+                _, evicted = self._lru.popitem(last=False)
+                self._size -= len(evicted)
+
+    async def _cached(self, kind: str, payload, fn, *args) -> bytes:
+        key = self.make_key(kind, payload)
+        content = self._get(key)
+        if content is None:
+            with stage("generate_pdf"):
+                content = await run_cpu(fn, *args)
+            REPORT_RENDERS.inc(result="rendered")
+            self.stats_counts["rendered_bytes"] += len(content)
+            self._put(key, content)
+        return content
+
+    async def render(self, data: dict) -> bytes:
+        """One analysis -> PDF bytes."""
+        from backend.utils.report_generator import generate_pdf
+        return await self._cached("pdf", data, generate_pdf, data)
+
+    async def render_bulk(self, items: list, fmt: str = "pdf", title: str = None) -> bytes:
+        """
+        Many analyses -> one consolidated PDF, or a zip with one PDF each
+        (rendered in parallel across the pool, each reusing its cache entry).
+        """
+        # Deferred: fpdf is only needed when a report is requested
+        from backend.utils.report_generator import generate_bulk_pdf, generate_zip
+        if not items:
+            raise ValueError("No analyses to report on.")
+        if len(items) > self.max_items:
+            raise ValueError(f"At most {self.max_items} analyses per bulk report (got {len(items)}).")
+        title = title or "AI Smart Analysis Report"
+        if fmt == "pdf":
+            return await self._cached("bulk", {"title": title, "items": items}, generate_bulk_pdf, items, title)
+        if fmt != "zip":
+            raise ValueError(f"Unknown report format '{fmt}'. Use 'pdf' or 'zip'.")
+        pdfs = await asyncio.gather(*(self.render(data) for data in items))
+        width = len(str(len(items)))
+        reports = {f"report_{i:0{width}d}.pdf": pdf for i, pdf in enumerate(pdfs, 1)}
+        return await run_io(generate_zip, reports)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats_counts["hits"] + self.stats_counts["misses"]
+            return {
+                **self.stats_counts,
+                "hit_rate": round(self.stats_counts["hits"] / lookups, 3) if lookups else None,
+                "cached_reports": len(self._lru),
+                "cached_bytes": self._size,
+                "cache_limit_bytes": self.cache_bytes,
+            }
+
@@ -0,0 +1,48 @@
+# backend/utils/chunker.py
+import re
+
+# Rough but model-agnostic: ~4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _pieces(text: str, max_tokens: int):
+    """Paragraphs, falling back to sentences, then fixed-width slices, for oversized units."""
+    for para in re.split(r"\n\s*\n|\n", text):
+        para = para.strip()
+        if not para:
+            continue
+        if estimate_tokens(para) <= max_tokens:
+            yield para
+            continue
+        for sentence in _SENTENCE_END.split(para):
+            if estimate_tokens(sentence) <= max_tokens:
+                yield sentence
+                continue
+            # No usable boundary left: hard-split on characters
+            width = max_tokens * CHARS_PER_TOKEN
+            for i in range(0, len(sentence), width):
+                yield sentence[i:i + width]
+
+
+def split_into_chunks(text: str, max_tokens: int = 1500) -> list:
+    """
+    Greedily packs paragraphs into chunks of at most `max_tokens`
+    (estimated), never splitting inside a sentence unless it is too long alone.
+    """
+    chunks, current, current_tokens = [], [], 0
+    for piece in _pieces(text, max_tokens):
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -0,0 +1,74 @@
+# backend/utils/executors.py
+import os
+import asyncio
+import contextvars
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from backend.utils.logger import logger
+
+# Two pools, created on first use:
+# - CPU pool (processes): spaCy NER, PDF/DOCX parsing. Sidesteps the GIL.
+# - IO pool (threads): embeddings + Chroma reads/writes (release the GIL in native code).
+_cpu_pool = None
+_io_pool = None
+
+
+def _cpu_workers() -> int:
+    # CPU_WORKERS=0 disables the process pool; CPU work then runs on the IO threads
+    return int(os.getenv("CPU_WORKERS", str(min(os.cpu_count() or 2, 4))))
+
+
+def _io_workers() -> int:
+    return int(os.getenv("IO_WORKERS", "8"))
+
+
+def cpu_worker_count() -> int:
+    return max(_cpu_workers(), 1)
+
+
+def get_cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is None and _cpu_workers() > 0:
+        # 'spawn' keeps workers clean of the parent's threads (uvicorn, httpx, torch)
+        ctx = multiprocessing.get_context(os.getenv("CPU_POOL_START_METHOD", "spawn"))
+        _cpu_pool = ProcessPoolExecutor(max_workers=_cpu_workers(), mp_context=ctx)
+        logger.info(f"⚙️ CPU pool started ({_cpu_workers()} processes)")
+    return _cpu_pool
+
+
+def get_io_pool():
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(max_workers=_io_workers(), thread_name_prefix="io")
+    return _io_pool
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """
+    Run a CPU-bound function in the process pool.
+    `fn` and its arguments must be picklable (module-level functions only).
+    """
+    pool = get_cpu_pool() or get_io_pool()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+
+
+async def run_io(fn, *args, **kwargs):
+    """
+    Run a blocking (I/O or GIL-releasing) function in the thread pool.
+    The caller's context travels along, so stage timings land in its request trace.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_io_pool(), partial(ctx.run, fn, *args, **kwargs))
+
+
+def shutdown():
+    global _cpu_pool, _io_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=True, cancel_futures=True)
+        _cpu_pool = None
+    if _io_pool is not None:
+        _io_pool.shutdown(wait=True, cancel_futures=True)
+        _io_pool = None
@@ -1,34 +1,87 @@
 # backend/utils/file_parser.py
 from fastapi import UploadFile, HTTPException
-import pypdf
-import docx
-import io
+import os
+import asyncio
+import tempfile
+from backend.utils.executors import run_cpu, run_io, cpu_worker_count
+from backend.utils.metrics import stage
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# --- Worker functions (run inside the CPU pool, so module-level only) ---
+# pypdf/docx are imported inside them: only the workers ever need them.
+
+def _pdf_page_count(path: str) -> int:
+    import pypdf
+    return len(pypdf.PdfReader(path).pages)
+
+def _extract_pdf_pages(path: str, start: int, end: int) -> list:
+    import pypdf
+    reader = pypdf.PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+def _extract_docx(path: str) -> list:
+    import docx
+    doc = docx.Document(path)
+    return ["\n".join([para.text for para in doc.paragraphs])]
+
+def _read_txt(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [f.read()]
+
+# --- Async API ---
+
+async def spool_upload(file: UploadFile, directory: str = None) -> str:
+    """
+    Stream the upload to a temp file in fixed-size chunks instead of
+    holding the whole file in RAM. The caller must delete the path.
+    """
+    suffix = os.path.splitext(file.filename.lower())[1]
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory or os.getenv("UPLOAD_DIR") or None)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                await run_io(out.write, chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+async def extract_pages(path: str) -> list:
+    """
+    Returns the document text as a list of pages (one entry for DOCX/TXT).
+    PDF pages are split into ranges and extracted in parallel across the CPU pool.
+    """
+    if path.endswith(".pdf"):
+        n_pages = await run_cpu(_pdf_page_count, path)
+        # A couple of ranges per worker keeps the pool busy without tiny tasks
+        step = max(1, -(-n_pages // (cpu_worker_count() * 2)))
+        ranges = await asyncio.gather(*(
+            run_cpu(_extract_pdf_pages, path, start, min(start + step, n_pages))
+            for start in range(0, n_pages, step)
+        ))
+        return [page for pages in ranges for page in pages]
+
+    if path.endswith(".docx"):
+        return await run_cpu(_extract_docx, path)
+
+    return await run_io(_read_txt, path)
 
 async def parse_file(file: UploadFile) -> str:
-    content = ""
     filename = file.filename.lower()
-    
-    # Read the file into memory
-    file_bytes = await file.read()
-    file_stream = io.BytesIO(file_bytes)
 
+    if not filename.endswith(SUPPORTED_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use PDF, DOCX, or TXT.")
+
+    with stage("upload_spool"):
+        path = await spool_upload(file)
     try:
-        if filename.endswith(".pdf"):
-            reader = pypdf.PdfReader(file_stream)
-            for page in reader.pages:
-                content += page.extract_text() + "\n"
-                
-        elif filename.endswith(".docx"):
-            doc = docx.Document(file_stream)
-            content = "\n".join([para.text for para in doc.paragraphs])
-            
-        elif filename.endswith(".txt"):
-            content = file_bytes.decode("utf-8")
-            
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format. Use PDF, DOCX, or TXT.")
-
-        return content.strip()
+        with stage("parse_file"):
+            pages = await extract_pages(path)
+        return "\n".join(pages).strip()
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"File parsing error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"File parsing error: {str(e)}")
+    finally:
+        os.remove(path)
@@ -1,6 +1,38 @@
 # backend/utils/logger.py
+import json
 import logging
+from datetime import datetime, timezone
 from rich.logging import RichHandler
+from backend.utils.metrics import current_trace
+
+
+class RequestIdFilter(logging.Filter):
+    """Tags every record with the id of the request being handled (or None)."""
+
+    def filter(self, record):
+        trace = current_trace()
+        record.request_id = trace["request_id"] if trace else None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers (LOG_FORMAT=json)."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key in ("method", "route", "status", "duration_ms", "stages", "attrs"):
+            if hasattr(record, key):
+                entry[key] = getattr(record, key)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
 
 def setup_logger():
     logging.basicConfig(
@@ -11,4 +43,18 @@ def setup_logger():
     )
     return logging.getLogger("rich")
 
-logger = setup_logger()
\ No newline at end of file
+
+def configure_logging(fmt: str = "text"):
+    """
+    Called once .env is loaded. "text": Rich console lines (default),
+    "json": structured lines with the request id.
+    """
+    if fmt == "json":
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler = RichHandler(rich_tracebacks=True)
+    handler.addFilter(RequestIdFilter())
+    logging.getLogger().handlers = [handler]
+
+logger = setup_logger()
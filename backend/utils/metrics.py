@@ -0,0 +1,158 @@
+# backend/utils/metrics.py
+"""
+Minimal in-process Prometheus metrics (text exposition format) plus
+per-request stage tracing. No client library needed: the API runs as one
+process, and CPU-pool work is timed from the caller's side.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+REGISTRY = []
+
+# Current request's trace: {"request_id": ..., "stages": {name: [count, seconds]}, "attrs": {...}}
+_trace = ContextVar("trace", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.label_names = name, help, labels
+        # Unlabelled counters are exported as 0 from the start
+        self._values = {} if labels else {(): 0.0}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.label_names), 0.0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        with self._lock:
+            series = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            i = bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    bucket = _labels(self.label_names, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+                bucket = _labels(self.label_names, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# --- Metrics used across the app ---
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+STAGE_SECONDS = Histogram("analyzer_stage_seconds", "Time spent per pipeline stage.", ("stage",))
+LLM_TOKENS = Counter("ollama_tokens_total", "Tokens processed by Ollama.", ("kind",))
+LLM_TOKENS_PER_SEC = Histogram(
+    "ollama_generation_tokens_per_second", "Ollama generation speed (eval tokens / eval time).",
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500),
+)
+LLM_RETRIES = Counter("ollama_retries_total", "Generations retried (failed over) after an error.")
+LLM_BACKEND_REQUESTS = Counter("ollama_backend_requests_total", "Generations per Ollama backend by outcome.", ("backend", "outcome"))
+LLM_INVALID_JSON = Counter("ollama_invalid_json_total", "Analyses that fell back because the model returned invalid JSON.")
+CACHE_LOOKUPS = Counter("analysis_cache_lookups_total", "Analysis cache lookups by result.", ("result",))
+REPORT_RENDERS = Counter("report_renders_total", "PDF reports by result (rendered or served from the cache).", ("result",))
+FAST_PATH = Counter("fast_path_total", "Fast-path analyses by outcome (fast, or the escalation reason).", ("outcome",))
+ADMISSION = Counter("admission_total", "Requests by priority class and admission outcome (admitted, queue_full, shed, deadline).", ("priority", "outcome"))
+COALESCED = Counter("coalesced_requests_total", "Requests that shared the result of an identical in-flight request.", ("route",))
+DEDUP = Counter("dedup_total", "Texts checked for near-duplicates by outcome (unique, lexical, semantic).", ("outcome",))
+
+
+# --- Per-request tracing ---
+
+def start_trace(request_id: str) -> dict:
+    trace = {"request_id": request_id, "stages": {}, "attrs": {}}
+    _trace.set(trace)
+    return trace
+
+
+def current_trace():
+    return _trace.get()
+
+
+def record_stage(name: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    trace = _trace.get()
+    if trace is not None:
+        entry = trace["stages"].setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+
+@contextmanager
+def stage(name: str):
+    """Times a block (sync or containing awaits) into the stage histogram and the request trace."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def annotate(**attrs):
+    """Adds numeric attributes (e.g. token counts) to the current request trace, summing repeats."""
+    trace = _trace.get()
+    if trace is not None:
+        for key, value in attrs.items():
+            trace["attrs"][key] = trace["attrs"].get(key, 0) + value
+
+
+def server_timing(trace: dict) -> str:
+    """Stage durations as a Server-Timing header value (ms), shown by browser devtools."""
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" + (f';desc="x{count}"' if count > 1 else "")
+        for name, (count, seconds) in trace["stages"].items()
+    )
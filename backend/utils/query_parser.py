@@ -0,0 +1,70 @@
+# backend/utils/query_parser.py
+import re
+import time
+from datetime import datetime, timedelta
+
+# Intent/sentiment words as they appear in questions -> stored metadata values
+INTENT_WORDS = {
+    "complaint": r"\bcomplain(?:t|ts|ed|ing)?\b",
+    "informational": r"\binformational\b",
+}
+SENTIMENT_WORDS = {
+    "negative": r"\bnegative\b",
+    "positive": r"\bpositive\b",
+    "neutral": r"\bneutral\b",
+}
+UNIT_SECONDS = {"hour": 3600, "day": 86400, "week": 7 * 86400, "month": 30 * 86400, "year": 365 * 86400}
+
+
+def _start_of_day(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def parse_time_window(question: str, now: float = None, tz=None):
+    """
+    Turns phrases like "last week", "yesterday" or "past 3 days" into an
+    (since, until) pair of epoch seconds. Returns (None, None) if none found.
+    Days, weeks and months start at midnight in `tz` (default: local time).
+    """
+    q = question.lower()
+    now_dt = datetime.fromtimestamp(now if now is not None else time.time(), tz)
+    today = _start_of_day(now_dt)
+
+    m = re.search(r"\b(?:last|past|previous)\s+(\d+)\s+(hour|day|week|month|year)s?\b", q)
+    if m:
+        return now_dt.timestamp() - int(m.group(1)) * UNIT_SECONDS[m.group(2)], None
+
+    if re.search(r"\btoday\b", q):
+        return today.timestamp(), None
+    if re.search(r"\byesterday\b", q):
+        return (today - timedelta(days=1)).timestamp(), today.timestamp()
+
+    week_start = today - timedelta(days=today.weekday())
+    if re.search(r"\bthis week\b", q):
+        return week_start.timestamp(), None
+    if re.search(r"\b(?:last|previous|past) week\b", q):
+        return (week_start - timedelta(days=7)).timestamp(), week_start.timestamp()
+
+    month_start = today.replace(day=1)
+    if re.search(r"\bthis month\b", q):
+        return month_start.timestamp(), None
+    if re.search(r"\b(?:last|previous|past) month\b", q):
+        prev_start = (month_start - timedelta(days=1)).replace(day=1)
+        return prev_start.timestamp(), month_start.timestamp()
+
+    year_start = today.replace(month=1, day=1)
+    if re.search(r"\bthis year\b", q):
+        return year_start.timestamp(), None
+    if re.search(r"\b(?:last|previous|past) year\b", q):
+        return year_start.replace(year=year_start.year - 1).timestamp(), year_start.timestamp()
+
+    return None, None
+
+
+def parse_question_filters(question: str, now: float = None) -> dict:
+    """Metadata filters implied by a chat question (time window, intent, sentiment)."""
+    since, until = parse_time_window(question, now)
+    q = question.lower()
+    intent = next((v for v, pattern in INTENT_WORDS.items() if re.search(pattern, q)), None)
+    sentiment = next((v for v, pattern in SENTIMENT_WORDS.items() if re.search(pattern, q)), None)
+    return {"since": since, "until": until, "intent": intent, "sentiment": sentiment}
@@ -1,12 +1,21 @@
 # backend/utils/report_generator.py
+# Rendering runs in the CPU process pool (see ReportService): everything
+# here is module-level and returns bytes, so nothing touches the disk.
+import io
+import zipfile
+from collections import Counter
+from datetime import datetime, timezone
 from fpdf import FPDF
-import tempfile
 
 class PDFReport(FPDF):
+    def __init__(self, title: str = 'AI Smart Analysis Report'):
+        super().__init__()
+        self.report_title = title
+
     def header(self):
         # Logo or Title
         self.set_font('Arial', 'B', 15)
-        self.cell(0, 10, 'AI Smart Analysis Report', 0, 1, 'C')
+        self.cell(0, 10, _latin1(self.report_title), 0, 1, 'C')
         self.ln(10)
 
     def footer(self):
@@ -14,49 +23,117 @@ class PDFReport(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
-def generate_pdf(data: dict) -> str:
-    pdf = PDFReport()
-    pdf.add_page()
-    
+def _latin1(text) -> str:
+    # The core PDF fonts only cover latin-1 (curly quotes, emoji... would raise)
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+def _render_analysis(pdf: PDFReport, data: dict, heading: str = None):
+    """One analysis: summary, metrics, entities (and the text excerpt for stored analyses)."""
+    if heading:
+        pdf.set_font("Arial", "B", 13)
+        pdf.cell(0, 10, _latin1(heading), 0, 1)
+
     # 1. Summary Section
     pdf.set_font("Arial", "B", 12)
     pdf.cell(0, 10, "Executive Summary", 0, 1)
     pdf.set_font("Arial", "", 11)
     # Multi_cell handles text wrapping automatically
-    pdf.multi_cell(0, 7, data.get("summary", "No summary available."))
+    pdf.multi_cell(0, 7, _latin1(data.get("summary") or "No summary available."))
     pdf.ln(5)
 
     # 2. Key Metrics (Sentiment & Intent)
     pdf.set_font("Arial", "B", 12)
     pdf.cell(0, 10, "Key Metrics", 0, 1)
     pdf.set_font("Arial", "", 11)
-    
-    sentiment = data.get("sentiment", "Unknown").title()
-    score = data.get("sentiment_score", 0)
-    intent = data.get("intent", "Unknown").title()
-    
-    pdf.cell(50, 10, f"Sentiment: {sentiment}", 1)
-    pdf.cell(50, 10, f"Score: {score}", 1)
-    pdf.cell(50, 10, f"Intent: {intent}", 1)
+
+    sentiment = (data.get("sentiment") or "Unknown").title()
+    score = data.get("sentiment_score")
+    intent = (data.get("intent") or "Unknown").title()
+
+    pdf.cell(50, 10, _latin1(f"Sentiment: {sentiment}"), 1)
+    pdf.cell(50, 10, f"Score: {score if score is not None else '-'}", 1)
+    pdf.cell(50, 10, _latin1(f"Intent: {intent}"), 1)
     pdf.ln(15)
 
     # 3. Entities Table
+    entities = data.get("entities") or []
+    if entities or "entities" in data:
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, "Detected Entities", 0, 1)
+
+        # Table Header
+        pdf.set_fill_color(200, 220, 255)
+        pdf.set_font("Arial", "B", 10)
+        pdf.cell(90, 10, "Entity Text", 1, 0, 'C', fill=True)
+        pdf.cell(50, 10, "Category", 1, 1, 'C', fill=True)
+
+        # Table Rows
+        pdf.set_font("Arial", "", 10)
+        for ent in entities:
+            pdf.cell(90, 8, _latin1(ent['text']), 1)
+            pdf.cell(50, 8, _latin1(ent['label']), 1, 1)
+
+    # 4. Original text (memory search results carry it)
+    if data.get("text"):
+        pdf.ln(5)
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, "Text", 0, 1)
+        pdf.set_font("Arial", "", 10)
+        text = data["text"]
+        pdf.multi_cell(0, 6, _latin1(text if len(text) <= 3000 else text[:3000] + " [...]"))
+
+def generate_pdf(data: dict) -> bytes:
+    pdf = PDFReport()
+    pdf.add_page()
+    _render_analysis(pdf, data)
+    return bytes(pdf.output())
+
+def _label(data: dict, index: int) -> str:
+    timestamp = data.get("timestamp")
+    if timestamp:
+        return f"#{index} - {datetime.fromtimestamp(timestamp, timezone.utc):%Y-%m-%d %H:%M} UTC"
+    return f"#{index}"
+
+def generate_bulk_pdf(items: list, title: str = "AI Smart Analysis Report") -> bytes:
+    """One consolidated PDF: an overview of the set, then one page per analysis."""
+    pdf = PDFReport(title)
+    pdf.add_page()
+
+    # 1. Overview
     pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 10, "Detected Entities", 0, 1)
-    
-    # Table Header
+    pdf.cell(0, 10, f"Overview ({len(items)} analyses)", 0, 1)
+    pdf.set_font("Arial", "", 11)
+    for field in ("sentiment", "intent"):
+        counts = Counter((d.get(field) or "unknown").lower() for d in items)
+        pdf.cell(0, 8, _latin1(f"{field.title()}: " + ", ".join(f"{k} {v}" for k, v in counts.most_common())), 0, 1)
+    scores = [d["sentiment_score"] for d in items if d.get("sentiment_score") is not None]
+    if scores:
+        pdf.cell(0, 8, f"Average score: {sum(scores) / len(scores):.2f}", 0, 1)
+    pdf.ln(5)
+
+    # 2. Index
     pdf.set_fill_color(200, 220, 255)
     pdf.set_font("Arial", "B", 10)
-    pdf.cell(90, 10, "Entity Text", 1, 0, 'C', fill=True)
-    pdf.cell(50, 10, "Category", 1, 1, 'C', fill=True)
-    
-    # Table Rows
-    pdf.set_font("Arial", "", 10)
-    for ent in data.get("entities", []):
-        pdf.cell(90, 8, ent['text'], 1)
-        pdf.cell(50, 8, ent['label'], 1, 1)
-
-    # Save to a temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    pdf.output(temp_file.name)
-    return temp_file.name
\ No newline at end of file
+    pdf.cell(40, 8, "Report", 1, 0, 'C', fill=True)
+    pdf.cell(30, 8, "Sentiment", 1, 0, 'C', fill=True)
+    pdf.cell(120, 8, "Summary", 1, 1, 'C', fill=True)
+    pdf.set_font("Arial", "", 9)
+    for i, data in enumerate(items, 1):
+        summary = data.get("summary") or ""
+        pdf.cell(40, 7, f"#{i}", 1)
+        pdf.cell(30, 7, _latin1(data.get("sentiment") or "-"), 1)
+        pdf.cell(120, 7, _latin1(summary if len(summary) <= 70 else summary[:67] + "..."), 1, 1)
+
+    # 3. One page per analysis
+    for i, data in enumerate(items, 1):
+        pdf.add_page()
+        _render_analysis(pdf, data, heading=_label(data, i))
+    return bytes(pdf.output())
+
+def generate_zip(reports: dict) -> bytes:
+    """{file name: pdf bytes} -> zip archive. PDF streams are already compressed."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, content in reports.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
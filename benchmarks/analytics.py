@@ -0,0 +1,84 @@
+# benchmarks/analytics.py
+"""
+Analytics aggregates at scale: write overhead per saved analysis and
+/memory/stats query latency over N analyses spread across a year,
+compared with the per-row GROUP BY the aggregates replace.
+
+    python -m benchmarks.analytics --analyses 100000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from benchmarks.retrieval import WORDS
+
+
+def synthetic(n: int, days: int, seed: int = 7):
+    rng = random.Random(seed)
+    now = time.time()
+    for i in range(n):
+        words = rng.sample(WORDS, 6)
+        yield (
+            f"a-{i}",
+            {
+                "sentiment": rng.choice(("positive", "neutral", "negative")),
+                "sentiment_score": round(rng.uniform(-1, 1), 2),
+                "intent": rng.choice(("informational", "complaint", "request")),
+                "topics": words[:2],
+                "entities": [{"text": w.title(), "label": "ORG"} for w in words[2:rng.randint(3, 6)]],
+            },
+            now - rng.random() * days * 86400,
+        )
+
+
+def p50_ms(fn, runs: int = 20) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch", type=int, default=32, help="Analyses per save (MEMORY_FLUSH_SIZE)")
+    args = parser.parse_args()
+
+    from backend.services.analytics import AnalyticsStore
+
+    path = os.path.join(tempfile.mkdtemp(prefix="analytics-bench-"), "analytics.sqlite3")
+    store = AnalyticsStore(path)
+    rows = list(synthetic(args.analyses, args.days))
+    started = time.perf_counter()
+    for i in range(0, len(rows), args.batch):
+        chunk = rows[i:i + args.batch]
+        store.upsert([r[0] for r in chunk], [r[1] for r in chunk], [r[2] for r in chunk])
+    write_s = time.perf_counter() - started
+    print(f"📊 {args.analyses} analyses over {args.days} days: {write_s / args.analyses * 1e6:.0f} µs per analysis "
+          f"written, {os.path.getsize(path) / 1e6:.1f} MB on disk")
+
+    month_ago = time.time() - 30 * 86400
+    queries = {
+        "all time, by day": lambda: store.summary(),
+        "last 30 days, by week": lambda: store.summary(since=month_ago, bucket="week"),
+        "complaints, all time, by month": lambda: store.summary(intent="complaint", bucket="month"),
+    }
+    for label, fn in queries.items():
+        print(f"  {label:32s} {p50_ms(fn):7.2f} ms")
+
+    # What answering from the per-analysis rows would cost (no aggregates)
+    scan = lambda: store.db.execute(
+        "SELECT sentiment, intent, COUNT(*), AVG(score) FROM analytics_rows GROUP BY sentiment, intent"
+    ).fetchall()
+    print(f"  {'per-row GROUP BY (no aggregates)':32s} {p50_ms(scan, 5):7.2f} ms (counts only, no topics/entities)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
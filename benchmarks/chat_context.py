@@ -0,0 +1,125 @@
+# benchmarks/chat_context.py
+"""
+Prompt tokens and end-to-end chat latency with the full retrieved documents
+in the prompt (budget 0, the old behaviour) versus packed context under a
+token budget. Uses long synthetic documents and the fake Ollama server with
+prompt-size dependent evaluation time, or a real model via --host.
+
+    python -m benchmarks.chat_context --docs 300 --budgets 0 600 1200 2400
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+from benchmarks.fake_ollama import FakeOllamaServer
+
+WORDS = ("battery screen refund delivery late broken support account password invoice "
+         "charger app crash slow fast great terrible order shipping warranty update").split()
+QUESTIONS = ("What are the main complaints about the battery?", "Why do customers ask for refunds?",
+             "What do people say about delivery?", "Are there problems with the app crashing?",
+             "How is support rated?")
+
+
+def long_documents(n: int, seed: int = 7) -> list:
+    """Multi-paragraph feedback, 300-3000 estimated tokens each, some near-duplicates."""
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n):
+        if docs and rng.random() < 0.1:
+            docs.append(docs[-1] + " Thanks.")  # re-submitted with a tiny edit
+            continue
+        paragraphs = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 120))) + "."
+            for _ in range(rng.randint(3, 20))
+        ]
+        docs.append(f"Report {i}.\n" + "\n\n".join(paragraphs))
+    return docs
+
+
+async def run_chat(llm, memory, context, questions: list) -> dict:
+    from backend.services.orchestrator import Orchestrator
+
+    prompt_tokens, context_tokens, latencies = [], [], []
+    for question in questions:
+        started = time.perf_counter()
+        results = memory.search_similar(question, 5)
+        context_text, stats = context.build(question, results["documents"][0], results["metadatas"][0])
+        response = await llm.chat(messages=[{"role": "user", "content": Orchestrator._chat_prompt(question, context_text)}])
+        latencies.append(time.perf_counter() - started)
+        prompt_tokens.append(response.get("prompt_eval_count") or 0)
+        context_tokens.append(stats["context_tokens"])
+    return {
+        "budget": context.token_budget,
+        "avg_prompt_tokens": round(statistics.mean(prompt_tokens), 1),
+        "avg_context_tokens": round(statistics.mean(context_tokens), 1),
+        "latency_ms_p50": round(statistics.median(latencies) * 1000, 1),
+        "latency_ms_max": round(max(latencies) * 1000, 1),
+    }
+
+
+async def bench(args, memory) -> list:
+    from backend.services.llm_provider import OllamaService
+    from backend.services.context_builder import ContextBuilder
+
+    llm = OllamaService()
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+    results = []
+    try:
+        for budget in args.budgets:
+            context = ContextBuilder()
+            context.token_budget = budget
+            res = await run_chat(llm, memory, context, questions)
+            results.append(res)
+            label = "full docs" if budget == 0 else f"budget {budget}"
+            print(f"💬 {label:12s} prompt {res['avg_prompt_tokens']:>8} tok | context {res['avg_context_tokens']:>8} tok | "
+                  f"p50 {res['latency_ms_p50']} ms | max {res['latency_ms_max']} ms")
+    finally:
+        await llm.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 600, 1200, 2400])
+    parser.add_argument("--host", default=None, help="Real Ollama URL; default starts the fake server")
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=300.0, help="Fake server prompt eval speed")
+    parser.add_argument("--port", type=int, default=11502)
+    parser.add_argument("--out", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+    out = os.path.abspath(args.out) if args.out else None
+
+    # MemoryStore keeps everything under ./data: build the corpus in a scratch dir
+    os.chdir(tempfile.mkdtemp(prefix="chat-context-bench-"))
+    from backend.services.memory_store import MemoryStore
+    memory = MemoryStore()
+    docs = long_documents(args.docs)
+    memory.save_analyses(
+        docs,
+        [{"sentiment": "negative", "summary": f"Customer report {i} about product issues.", "intent": "complaint"}
+         for i in range(len(docs))],
+        [f"doc-{i}" for i in range(len(docs))],
+    )
+
+    if args.host:
+        os.environ["OLLAMA_HOST"] = args.host
+        results = asyncio.run(bench(args, memory))
+    else:
+        with FakeOllamaServer(port=args.port, latency=0.05, tokens_per_sec=200,
+                              prompt_tokens_per_sec=args.prompt_tokens_per_sec) as server:
+            os.environ["OLLAMA_HOST"] = server.url
+            results = asyncio.run(bench(args, memory))
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
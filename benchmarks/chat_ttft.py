@@ -0,0 +1,50 @@
+# benchmarks/chat_ttft.py
+"""
+Compares time-to-first-token of /memory/chat/stream with the time the
+blocking /memory/chat takes to return anything. Needs a running backend.
+
+    python -m benchmarks.chat_ttft --question "What are the main complaints?" --runs 5
+"""
+import json
+import time
+import argparse
+import statistics
+
+import httpx
+
+
+def blocking(client: httpx.Client, question: str) -> float:
+    start = time.perf_counter()
+    client.post("/memory/chat", json={"question": question}).raise_for_status()
+    return time.perf_counter() - start
+
+
+def streaming(client: httpx.Client, question: str) -> tuple:
+    start = time.perf_counter()
+    first = None
+    with client.stream("POST", "/memory/chat/stream", json={"question": question}) as res:
+        res.raise_for_status()
+        for line in res.iter_lines():
+            if line and first is None and "token" in json.loads(line):
+                first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--api", default="http://127.0.0.1:8000")
+    parser.add_argument("--question", default="What were the main complaints?")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.api, timeout=300) as client:
+        full = [blocking(client, args.question) for _ in range(args.runs)]
+        streamed = [streaming(client, args.question) for _ in range(args.runs)]
+
+    print(f"⏳ /memory/chat         first byte = full answer: median {statistics.median(full):.2f}s")
+    print(f"⚡ /memory/chat/stream  first token: median {statistics.median(s[0] for s in streamed):.2f}s "
+          f"| full answer: median {statistics.median(s[1] for s in streamed):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# benchmarks/dedup.py
+"""
+Near-duplicate detection at ingest, on a synthetic duplicate-heavy corpus:
+base complaints, each re-submitted as variants (case, punctuation, typos,
+greetings, another sign-off), plus hard negatives that look alike but mean
+something else (a negation, another number, another product).
+Ingests it through run_batch_analysis with DEDUP off and on (fake Ollama)
+and reports LLM calls saved, link precision / recall and docs/s.
+
+    python -m benchmarks.dedup --bases 200 --variants 4 --latency 0.2
+
+Similarities depend on EMBEDDING_BACKEND: run with the model you deploy.
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+from benchmarks.fake_ollama import FakeOllamaServer
+
+PRODUCTS = ["mobile app", "web dashboard", "smart watch", "wireless earbuds", "laptop charger", "router",
+            "coffee machine", "e-reader", "fitness tracker", "vacuum robot"]
+PROBLEMS = [
+    "crashes every time I open the {part}",
+    "stopped syncing with the {part} after the last update",
+    "shows the wrong {part} since yesterday",
+    "drains the battery whenever the {part} is on",
+    "freezes for {n} seconds when I use the {part}",
+    "was delivered {n} days late and the {part} was missing",
+]
+PARTS = ["settings page", "calendar", "account screen", "notifications", "charging case", "status light",
+         "payment form", "reading mode", "heart rate screen", "map view"]
+CLOSINGS = ["Please fix it.", "Can someone help?", "This is really frustrating.", "I want a refund.", ""]
+GREETINGS = ["Hi,", "Hello team,", "Hey,", "Dear support,"]
+
+
+def _typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    k = rng.randrange(1, len(word) - 2)
+    return word[:k] + word[k + 1] + word[k] + word[k + 2:]
+
+
+def variant(core: str, closing: str, rng: random.Random) -> str:
+    """The same message, re-typed: what a duplicate-heavy inbox looks like."""
+    if rng.random() < 0.4:
+        closing = rng.choice(CLOSINGS)
+    words = f"{core} {closing}".split()
+    for _ in range(rng.randint(1, 3)):
+        edit = rng.choice(("case", "punct", "typo", "greet"))
+        if edit == "case":
+            words = [w.lower() for w in words]
+        elif edit == "punct":
+            words[-1] = words[-1].rstrip(".?!") + rng.choice(("!!", "...", "", "?!"))
+        elif edit == "typo":
+            k = rng.randrange(len(words))
+            words[k] = _typo(words[k], rng)
+        elif edit == "greet":
+            words = rng.choice(GREETINGS).split() + words
+    return " ".join(words)
+
+
+def hard_negative(product: str, problem: str, part: str, n: int, rng: random.Random) -> str:
+    """Looks like the base message, means something else."""
+    kind = rng.choice(("negation", "number", "product"))
+    if kind == "negation":
+        return f"My {product} never {problem.format(part=part, n=n)}."
+    if kind == "number" and "{n}" in problem:
+        return f"My {product} {problem.format(part=part, n=n + rng.randint(2, 9))}."
+    return f"My {rng.choice([p for p in PRODUCTS if p != product])} {problem.format(part=part, n=n)}."
+
+
+def synthetic_corpus(bases: int, variants: int, negatives: float, seed: int = 5) -> list:
+    """[(text, group)]: texts of one group are duplicates of each other, shuffled."""
+    rng = random.Random(seed)
+    corpus, seen, group = [], set(), 0
+    while group < bases:
+        product, problem, part = rng.choice(PRODUCTS), rng.choice(PROBLEMS), rng.choice(PARTS)
+        n, closing = rng.randint(2, 9), rng.choice(CLOSINGS)
+        core = f"My {product} {problem.format(part=part, n=n)}."
+        if core in seen:
+            continue
+        seen.add(core)
+        group += 1
+        base = f"{core} {closing}".strip()
+        corpus.append((base, group))
+        corpus += [(variant(core, closing, rng), group) for _ in range(rng.randint(1, variants))]
+        negative = hard_negative(product, problem, part, n, rng)
+        if rng.random() < negatives and negative not in seen:
+            # Its own group: a base of its own, with the same sign-off as the look-alike
+            seen.add(negative)
+            corpus.append((f"{negative} {closing}".strip(), -group))
+    rng.shuffle(corpus)
+    return corpus
+
+
+async def ingest(corpus: list, batch: int) -> dict:
+    from chromadb.api.client import SharedSystemClient
+    from backend.services.orchestrator import Orchestrator
+
+    # Chroma caches clients by path, and every run uses ./data/chroma_db
+    SharedSystemClient.clear_system_cache()
+    orchestrator = Orchestrator()
+    await orchestrator.start(wait=True)
+    try:
+        started = time.perf_counter()
+        results = []
+        for i in range(0, len(corpus), batch):
+            outcome = await orchestrator.run_batch_analysis([text for text, _ in corpus[i:i + batch]])
+            results += [item.result for item in outcome.items]
+        elapsed = time.perf_counter() - started
+        await orchestrator.memory.flush()
+        return {"elapsed": elapsed, "results": results, "keys": [orchestrator.cache_key(t) for t, _ in corpus]}
+    finally:
+        await orchestrator.close()
+
+
+def quality(corpus: list, run: dict) -> dict:
+    """Link precision (linked to its own group) and recall (of the texts that had an earlier duplicate)."""
+    group_of = dict(zip(run["keys"], (g for _, g in corpus)))
+    linked = correct = 0
+    seen, should = set(), 0
+    for (_, group), key, result in zip(corpus, run["keys"], run["results"]):
+        should += group in seen
+        seen.add(group)
+        if result is not None and result.cluster_id and result.cluster_id != key:
+            linked += 1
+            correct += group_of.get(result.cluster_id) == group
+    return {
+        "linked": linked,
+        "precision": correct / linked if linked else None,
+        "recall": correct / should if should else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bases", type=int, default=200, help="Distinct messages")
+    parser.add_argument("--variants", type=int, default=4, help="Up to this many re-typed copies of each")
+    parser.add_argument("--negatives", type=float, default=0.5, help="Share of bases with a look-alike that means something else")
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake generation latency (s)")
+    parser.add_argument("--port", type=int, default=11520)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.bases, args.variants, args.negatives)
+    groups = len({g for _, g in corpus})
+    print(f"🧬 {len(corpus)} texts in {groups} groups ({len(corpus) - groups} near-duplicates, "
+          f"{sum(1 for _, g in corpus if g < 0)} hard negatives)")
+    with FakeOllamaServer(port=args.port, latency=args.latency, tokens_per_sec=1000) as server:
+        os.environ["OLLAMA_HOST"] = server.url
+        calls = {}
+        for mode in ("0", "1"):
+            os.environ["DEDUP"] = mode
+            os.chdir(tempfile.mkdtemp(prefix="dedup-bench-"))
+            calls_before = server.app.state.requests
+            run = asyncio.run(ingest(corpus, args.batch))
+            calls[mode] = server.app.state.requests - calls_before
+            line = (f"  DEDUP={mode}: {calls[mode]:5d} LLM calls, {len(corpus) / run['elapsed']:6.1f} docs/s "
+                    f"({run['elapsed']:.1f}s)")
+            if mode == "1":
+                q = quality(corpus, run)
+                precision = f"{q['precision']:.3f}" if q["precision"] is not None else "-"
+                recall = f"{q['recall']:.3f}" if q["recall"] is not None else "-"
+                saved = calls["0"] - calls["1"]
+                line += (f" | {saved} LLM calls saved ({saved / calls['0']:.0%}), "
+                         f"{q['linked']} linked, precision {precision}, recall {recall}")
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/embeddings.py
+"""
+Embeddings/sec and query latency per embedding backend, cold (model only)
+and warm (served from the vector cache).
+
+    python -m benchmarks.embeddings --backends sentence-transformers onnx --docs 2000
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+WORDS = ("battery screen refund delivery late broken support account password invoice "
+         "charger app crash slow fast great terrible order shipping warranty update").split()
+
+
+def synthetic_texts(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 60))) + f" #{i}" for i in range(n)]
+
+
+def bench_backend(name: str, docs: list, queries: list) -> dict:
+    os.environ["EMBEDDING_BACKEND"] = name
+    from backend.services.embeddings import CachedEmbeddingFunction
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["EMBEDDING_CACHE_DIR"] = cache_dir
+        fn = CachedEmbeddingFunction()
+        fn(["warm-up"])  # model load is not part of the measurement
+
+        start = time.perf_counter()
+        fn(docs)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fn(docs)
+        warm = time.perf_counter() - start
+
+        cold_q, warm_q = [], []
+        for q in queries:
+            t = time.perf_counter(); fn([q]); cold_q.append(time.perf_counter() - t)
+            t = time.perf_counter(); fn([q]); warm_q.append(time.perf_counter() - t)
+
+    return {
+        "backend": name,
+        "docs": len(docs),
+        "embeddings_per_sec_cold": round(len(docs) / cold, 1),
+        "embeddings_per_sec_cached": round(len(docs) / warm, 1),
+        "query_ms_p50_cold": round(statistics.median(cold_q) * 1000, 2),
+        "query_ms_p50_cached": round(statistics.median(warm_q) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["sentence-transformers", "onnx"])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--out", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    os.environ["EMBEDDING_BATCH_SIZE"] = str(args.batch_size)
+    docs = synthetic_texts(args.docs)
+    queries = synthetic_texts(args.queries, seed=11)
+
+    results = []
+    for name in args.backends:
+        res = bench_backend(name, docs, queries)
+        results.append(res)
+        print(f"🔢 {name:22s} {res['embeddings_per_sec_cold']:>9} emb/s cold | "
+              f"{res['embeddings_per_sec_cached']:>10} emb/s cached | "
+              f"query p50 {res['query_ms_p50_cold']} ms cold / {res['query_ms_p50_cached']} ms cached")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
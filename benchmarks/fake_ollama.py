@@ -0,0 +1,189 @@
+# benchmarks/fake_ollama.py
+"""
+A tiny stand-in for the Ollama HTTP API so the backend can be load tested
+without a GPU or a real model. Latency and token rate are configurable.
+
+Run standalone:
+    python -m benchmarks.fake_ollama --port 11500 --latency 1.0
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+from datetime import datetime, timezone
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_ANALYSIS = {
+    "sentiment": "negative",
+    "sentiment_score": -0.6,
+    "summary": "The customer reports that the battery drains too fast.",
+    "topics": ["battery", "hardware"],
+    "intent": "complaint",
+    "entities": [{"text": "Acme", "label": "ORG"}],
+}
+FAKE_ANSWER = "Most past complaints were about battery life and slow support replies."
+
+
+def create_app(latency: float = 0.5, tokens_per_sec: float = 50.0, prompt_tokens_per_sec: float = 0.0) -> FastAPI:
+    """
+    `latency` models prompt evaluation (time before the first token),
+    `tokens_per_sec` models generation speed after that.
+    `prompt_tokens_per_sec` > 0 adds prompt-size dependent evaluation time,
+    like a CPU-bound model reading a long prompt.
+    All three live on app.state and can be changed while the server runs,
+    as do `fail` (answer every call with HTTP 500, like a crashed runner)
+    and `drop_after` (cut streams off after that many tokens).
+    """
+    app = FastAPI(title="Fake Ollama")
+    app.state.latency = latency
+    app.state.tokens_per_sec = tokens_per_sec
+    app.state.prompt_tokens_per_sec = prompt_tokens_per_sec
+    app.state.fail = False
+    app.state.drop_after = None
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+    app.state.requests = 0
+
+    def _now():
+        return datetime.now(timezone.utc).isoformat()
+
+    def _reply_for(body: dict) -> str:
+        fmt = body.get("format")
+        if isinstance(fmt, dict):
+            # JSON schema: like constrained decoding, only the schema's fields are generated
+            return json.dumps({k: v for k, v in FAKE_ANALYSIS.items() if k in fmt.get("properties", {})})
+        if fmt:
+            return json.dumps(FAKE_ANALYSIS)
+        return FAKE_ANSWER
+
+    def _prompt_tokens(body: dict) -> int:
+        text = body.get("prompt") or " ".join(m.get("content", "") for m in body.get("messages", []))
+        return len(text.split())
+
+    def _prompt_eval_s(body: dict) -> float:
+        prompt_tps = app.state.prompt_tokens_per_sec
+        return app.state.latency + (_prompt_tokens(body) / prompt_tps if prompt_tps > 0 else 0.0)
+
+    def _failure():
+        return JSONResponse({"error": "fake backend failure"}, status_code=500)
+
+    async def _generate(request: Request, key: str):
+        if app.state.fail:
+            return _failure()
+        body = await request.json()
+        app.state.requests += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        reply = _reply_for(body)
+        tokens = reply.split(" ")
+        prompt_eval_s = _prompt_eval_s(body)
+        tokens_per_sec = app.state.tokens_per_sec
+        started = time.perf_counter()
+
+        def _chunk(content: str, done: bool) -> str:
+            part = {"model": body.get("model"), "created_at": _now(), "done": done}
+            if key == "message":
+                part["message"] = {"role": "assistant", "content": content}
+            else:
+                part["response"] = content
+            if done:
+                elapsed = time.perf_counter() - started
+                part.update({
+                    "done_reason": "stop",
+                    "total_duration": int(elapsed * 1e9),
+                    "prompt_eval_count": _prompt_tokens(body),
+                    "prompt_eval_duration": int(prompt_eval_s * 1e9),
+                    "eval_count": len(tokens),
+                    "eval_duration": int(max(elapsed - prompt_eval_s, 0) * 1e9),
+                })
+            return json.dumps(part) + "\n"
+
+        async def stream():
+            try:
+                await asyncio.sleep(prompt_eval_s)
+                for i, tok in enumerate(tokens):
+                    if app.state.drop_after is not None and i >= app.state.drop_after:
+                        raise ConnectionAbortedError("fake stream dropped")
+                    yield _chunk(tok if i == 0 else " " + tok, False)
+                    await asyncio.sleep(1.0 / tokens_per_sec)
+                yield _chunk("", True)
+            finally:
+                app.state.in_flight -= 1
+
+        if body.get("stream", True):
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+        try:
+            await asyncio.sleep(prompt_eval_s + len(tokens) / tokens_per_sec)
+            return json.loads(_chunk(reply, True))
+        finally:
+            app.state.in_flight -= 1
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        return await _generate(request, "message")
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        return await _generate(request, "response")
+
+    @app.get("/api/tags")
+    async def tags():
+        if app.state.fail:
+            return _failure()
+        return {"models": [{"model": "mistral:latest", "name": "mistral:latest", "size": 0}]}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": []}
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "requests": app.state.requests,
+            "in_flight": app.state.in_flight,
+            "max_in_flight": app.state.max_in_flight,
+        }
+
+    return app
+
+
+class FakeOllamaServer:
+    """Runs the fake server on a background thread (for benchmark scripts)."""
+
+    def __init__(self, port: int = 11500, latency: float = 0.5, tokens_per_sec: float = 50.0,
+                 prompt_tokens_per_sec: float = 0.0):
+        self.port = port
+        self.app = create_app(latency=latency, tokens_per_sec=tokens_per_sec, prompt_tokens_per_sec=prompt_tokens_per_sec)
+        config = uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Ollama server")
+    parser.add_argument("--port", type=int, default=int(os.getenv("FAKE_OLLAMA_PORT", "11500")))
+    parser.add_argument("--latency", type=float, default=float(os.getenv("FAKE_OLLAMA_LATENCY", "0.5")))
+    parser.add_argument("--tokens-per-sec", type=float, default=float(os.getenv("FAKE_OLLAMA_TPS", "50")))
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=float(os.getenv("FAKE_OLLAMA_PROMPT_TPS", "0")))
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.tokens_per_sec, args.prompt_tokens_per_sec), host="127.0.0.1", port=args.port)
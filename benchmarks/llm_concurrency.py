@@ -0,0 +1,62 @@
+# benchmarks/llm_concurrency.py
+"""
+Load test: N concurrent analyze_text calls against the fake Ollama server
+must overlap (wall time ~ one generation), not queue up one after another.
+
+    python -m benchmarks.llm_concurrency --requests 8 --latency 1.0
+"""
+import os
+import time
+import asyncio
+import argparse
+
+from benchmarks.fake_ollama import FakeOllamaServer
+
+
+async def run(n_requests: int) -> dict:
+    # Imported late so OLLAMA_HOST points at the fake server
+    from backend.services.llm_provider import OllamaService
+
+    llm = OllamaService()
+    try:
+        start = time.perf_counter()
+        await llm.analyze_text("warm-up")
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await asyncio.gather(*(llm.analyze_text(f"ticket #{i}: battery died") for i in range(n_requests)))
+        concurrent = time.perf_counter() - start
+    finally:
+        await llm.close()
+
+    return {"single_s": single, "concurrent_s": concurrent, "serial_estimate_s": single * n_requests}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=11500)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OLLAMA_MAX_CONCURRENCY", str(args.requests))
+    limit = int(os.environ["OLLAMA_MAX_CONCURRENCY"])
+
+    with FakeOllamaServer(port=args.port, latency=args.latency) as server:
+        os.environ["OLLAMA_HOST"] = server.url
+        stats = asyncio.run(run(args.requests))
+        peak = server.app.state.max_in_flight
+
+    waves = -(-args.requests // limit)  # ceil: batches the semaphore allows
+    print(f"⏱️  single: {stats['single_s']:.2f}s | {args.requests} concurrent: {stats['concurrent_s']:.2f}s "
+          f"| serial would be ~{stats['serial_estimate_s']:.2f}s | peak in-flight at server: {peak}")
+
+    if stats["concurrent_s"] > stats["single_s"] * (waves + 0.5):
+        raise SystemExit("❌ Requests did not overlap — something is blocking the event loop.")
+    if peak > limit:
+        raise SystemExit(f"❌ Concurrency cap exceeded ({peak} > {limit}).")
+    print("✅ Generations overlap and respect OLLAMA_MAX_CONCURRENCY.")
+
+
+if __name__ == "__main__":
+    main()
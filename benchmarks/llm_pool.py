@@ -0,0 +1,114 @@
+# benchmarks/llm_pool.py
+"""
+Multi-backend LLM pool against several fake Ollama servers:
+throughput with 1 vs N backends, routing around a slow backend, and
+failover + re-admission when one backend starts failing mid-run.
+
+    python -m benchmarks.llm_pool --backends 3 --requests 48 --latency 0.5
+"""
+import os
+import time
+import asyncio
+import argparse
+from contextlib import ExitStack
+
+from benchmarks.fake_ollama import FakeOllamaServer
+
+
+def _service(servers: list, concurrency: int):
+    # Imported late so the pool reads the environment set below
+    from backend.services.llm_provider import OllamaService
+
+    os.environ["OLLAMA_BACKENDS"] = ",".join(f"{s.url}|mistral|{concurrency}" for s in servers)
+    return OllamaService()
+
+
+async def _burst(llm, n_requests: int) -> dict:
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(
+        *(llm.analyze_text(f"ticket #{i}: battery died after the update") for i in range(n_requests)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+    return {
+        "wall_s": elapsed,
+        "throughput": n_requests / elapsed,
+        "errors": sum(1 for o in outcomes if isinstance(o, Exception)),
+    }
+
+
+def _spread(llm) -> str:
+    return ", ".join(f"{b['host'].rsplit(':', 1)[-1]}={b['requests']}" for b in llm.backend_stats()["backends"])
+
+
+async def scenario_scaling(servers: list, args) -> None:
+    for n in sorted({1, len(servers)}):
+        llm = _service(servers[:n], args.concurrency)
+        try:
+            await llm.check_connection()
+            stats = await _burst(llm, args.requests)
+            print(f"  {n} backend(s): {stats['wall_s']:.2f}s, {stats['throughput']:.1f} req/s, "
+                  f"{stats['errors']} errors | per backend: {_spread(llm)}")
+        finally:
+            await llm.close()
+
+
+async def scenario_slow_backend(servers: list, args) -> None:
+    servers[0].app.state.latency = args.latency * 4
+    llm = _service(servers, args.concurrency)
+    try:
+        await llm.check_connection()
+        stats = await _burst(llm, args.requests)
+        print(f"  backend :{servers[0].port} 4x slower: {stats['wall_s']:.2f}s, "
+              f"{stats['errors']} errors | per backend: {_spread(llm)}")
+    finally:
+        servers[0].app.state.latency = args.latency
+        await llm.close()
+
+
+async def scenario_failover(servers: list, args) -> None:
+    llm = _service(servers, args.concurrency)
+    broken = servers[0]
+    try:
+        await llm.check_connection()
+        broken.app.state.fail = True
+        stats = await _burst(llm, args.requests)
+        state = llm.backend_stats()["backends"][0]
+        print(f"  backend :{broken.port} failing: {stats['errors']} errors of {args.requests} | "
+              f"ejected={not state['healthy']}, failures={state['failures']} | per backend: {_spread(llm)}")
+
+        broken.app.state.fail = False
+        await asyncio.sleep(llm.pool.health_interval * 2)
+        print(f"  after recovery + health check: healthy={llm.backend_stats()['backends'][0]['healthy']}")
+        if stats["errors"]:
+            raise SystemExit("❌ Requests failed although healthy backends were available.")
+    finally:
+        await llm.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=48)
+    parser.add_argument("--concurrency", type=int, default=4, help="Slots per backend")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--port", type=int, default=11520)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OLLAMA_HEALTH_INTERVAL", "0.5")
+    os.environ.setdefault("OLLAMA_EJECT_SECONDS", "30")
+
+    with ExitStack() as stack:
+        servers = [
+            stack.enter_context(FakeOllamaServer(port=args.port + i, latency=args.latency, tokens_per_sec=200))
+            for i in range(args.backends)
+        ]
+        print(f"⚖️  {args.requests} concurrent analyses, {args.concurrency} slots per backend")
+        asyncio.run(scenario_scaling(servers, args))
+        asyncio.run(scenario_slow_backend(servers, args))
+        asyncio.run(scenario_failover(servers, args))
+    print("✅ Pool spreads load, routes around slow backends and fails over.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/memory_footprint.py
+"""
+Disk, RAM and search latency of the memory store per layout, extrapolated
+to one million analyses: single collection vs monthly partitions, full
+texts vs summary-only (texts zlib-compressed in the side store), and the
+effect of retention + compaction.
+
+Vectors are random (no embedding model needed): the footprint only
+depends on their dimension.
+
+    python -m benchmarks.memory_footprint --docs 20000 --months 12
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+from benchmarks.retrieval import WORDS
+
+LAYOUTS = {
+    "single/full": {"MEMORY_PARTITION": "none", "MEMORY_STORE_TEXT": "full"},
+    "monthly/full": {"MEMORY_PARTITION": "month", "MEMORY_STORE_TEXT": "full"},
+    "monthly/summary": {"MEMORY_PARTITION": "month", "MEMORY_STORE_TEXT": "summary"},
+}
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RandomVectors:
+    def __init__(self, dim: int, seed: int = 3):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, texts: list) -> list:
+        vectors = self.rng.normal(size=(len(texts), self.dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return list(vectors)
+
+
+def corpus(n: int, months: int, seed: int = 5):
+    """(text, analysis, id, timestamp): ~120-word feedback spread over the last `months` months."""
+    rng = random.Random(seed)
+    now = time.time()
+    for i in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(80, 160))]
+        text = f"Ticket {i}: " + " ".join(words) + "."
+        analysis = {
+            "sentiment": rng.choice(("positive", "neutral", "negative")),
+            "summary": "Customer writes about " + ", ".join(sorted(set(words[:4]))) + ".",
+            "intent": rng.choice(("informational", "complaint")),
+            "entities": [],
+        }
+        yield text, analysis, f"doc-{i}", now - rng.random() * months * 30 * 86400
+
+
+def measure(layout: str, args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="memory-bench-")
+    os.chdir(workdir)
+    os.environ.update(LAYOUTS[layout])
+    os.environ["EMBEDDING_CACHE"] = "0"
+    from chromadb.api.client import SharedSystemClient
+    from backend.services.memory_store import MemoryStore
+    from backend.utils.query_parser import parse_time_window
+
+    # Chroma caches clients by path, and every layout uses ./data/chroma_db
+    SharedSystemClient.clear_system_cache()
+    memory = MemoryStore()
+    memory.embedding_fn = RandomVectors(args.dim)
+    rss_start = rss_bytes()
+
+    started = time.perf_counter()
+    batch = []
+    for row in corpus(args.docs, args.months):
+        batch.append(row)
+        if len(batch) == 1000:
+            memory.save_analyses([b[0] for b in batch], [b[1] for b in batch], [b[2] for b in batch],
+                                 [{"timestamp": b[3]} for b in batch])
+            batch = []
+    if batch:
+        memory.save_analyses([b[0] for b in batch], [b[1] for b in batch], [b[2] for b in batch],
+                             [{"timestamp": b[3]} for b in batch])
+    ingest_s = time.perf_counter() - started
+
+    def latency(where) -> float:
+        samples = []
+        for _ in range(args.queries):
+            t = time.perf_counter()
+            memory.search_similar("battery refund late delivery", 5, where=where, mode="vector")
+            samples.append(time.perf_counter() - t)
+        return round(statistics.median(samples) * 1000, 2)
+
+    since, until = parse_time_window("complaints in the last month")
+    result = {
+        "layout": layout,
+        "docs": args.docs,
+        "ingest_docs_per_s": round(args.docs / ingest_s),
+        "search_ms_p50": latency(None),
+        "search_last_month_ms_p50": latency(memory.build_where(since=since, until=until)),
+        "rss_mb": round((rss_bytes() - rss_start) / 1e6, 1),
+        "disk_bytes": memory._disk_usage(),
+    }
+
+    memory.retention_days = args.months * 30 / 2
+    report = memory.compact()
+    result["after_retention_compact"] = {"expired": report["expired"], "disk_bytes": report["disk_after"]}
+    memory.lexical.close()
+    memory.raw.close()
+    memory.analytics.close()
+    memory.dedup.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    parser.add_argument("--out", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+    out = os.path.abspath(args.out) if args.out else None
+
+    scale = 1_000_000 / args.docs
+    results = []
+    for layout in args.layouts:
+        res = measure(layout, args)
+        results.append(res)
+        disk = sum(res["disk_bytes"].values())
+        after = sum(res["after_retention_compact"]["disk_bytes"].values())
+        print(f"🗄️ {layout:16s} disk {disk / 1e6:7.1f} MB (~{disk * scale / 1e9:.1f} GB per 1M) "
+              f"{json.dumps({k: round(v / 1e6, 1) for k, v in res['disk_bytes'].items()})} | "
+              f"RSS +{res['rss_mb']} MB | ingest {res['ingest_docs_per_s']}/s | "
+              f"search p50 {res['search_ms_p50']} ms, last month {res['search_last_month_ms_p50']} ms | "
+              f"after retention+compact {after / 1e6:.1f} MB ({res['after_retention_compact']['expired']} expired)")
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
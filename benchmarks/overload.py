@@ -0,0 +1,142 @@
+# benchmarks/overload.py
+"""
+Overload behaviour under a synthetic burst: bulk batches, single analyses
+(part of them sent by several clients at once, like a double-clicked
+button) and, right behind them, interactive chat questions, all far more
+work than the fake model can finish before clients give up.
+Runs the app twice, without limits (ADMISSION_MAX_IN_FLIGHT=0,
+REQUEST_COALESCING=0) and with the admission defaults, and reports per
+priority class: completed, rejected (429/503, how fast, with Retry-After),
+client timeouts and latency, plus the LLM calls the burst cost.
+
+    python -m benchmarks.overload --analyses 100 --batches 6 --chats 10 --latency 1.0
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import defaultdict
+
+import httpx
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.retrieval import WORDS
+from benchmarks.suite import free_port, percentile, start_app
+
+MODES = {
+    "no limits": {"ADMISSION_MAX_IN_FLIGHT": "0", "REQUEST_COALESCING": "0"},
+    "admission": {"REQUEST_COALESCING": "1"},
+}
+
+
+def _text(rng: random.Random, i: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 50))) + f". Order #{i}."
+
+
+def build_burst(args, rng: random.Random) -> list:
+    """[(delay_s, class, path, body)]: bulk and analyses at once, chat right behind."""
+    burst = []
+    for b in range(args.batches):
+        burst.append((0.0, "bulk", "/analyze/batch", {"texts": [_text(rng, 10_000 + b * 100 + k) for k in range(args.batch_size)]}))
+    for i in range(args.analyses):
+        body = {"text": _text(rng, i)}
+        copies = args.copies if rng.random() < args.duplicated else 1
+        burst += [(0.0, "analyze", "/analyze", body)] * copies
+    rng.shuffle(burst)
+    for c in range(args.chats):
+        burst.append((args.chat_after + c * 0.2, "interactive", "/memory/chat", {"question": f"What do customers say about {WORDS[c]}?"}))
+    return burst
+
+
+async def fire(base_url: str, burst: list, client_timeout: float) -> list:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=client_timeout, limits=limits) as client:
+        async def one(delay, cls, path, body):
+            await asyncio.sleep(delay)
+            started = time.perf_counter()
+            try:
+                r = await client.post(path, json=body)
+                status, retry_after = r.status_code, r.headers.get("Retry-After")
+            except httpx.TimeoutException:
+                status, retry_after = "timeout", None
+            return {"class": cls, "status": status, "ms": (time.perf_counter() - started) * 1000, "retry_after": retry_after}
+
+        return await asyncio.gather(*(one(*req) for req in burst))
+
+
+def seed_memory(base_url: str, n: int, rng: random.Random):
+    """Chat needs something to retrieve, or it answers without the model."""
+    texts = [_text(rng, 90_000 + i) for i in range(n)]
+    httpx.post(f"{base_url}/analyze/batch", json={"texts": texts}, timeout=600).raise_for_status()
+
+
+def report(name: str, results: list, llm_calls: int, elapsed: float, stats: dict):
+    print(f"\n▶ {name}: {len(results)} requests, {llm_calls} LLM calls, settled in {elapsed:.1f}s")
+    print(f"  {'class':<12}{'sent':>6}{'ok':>6}{'429':>6}{'503':>6}{'timeout':>9}"
+          f"{'p50 ok':>10}{'p95 ok':>10}{'p50 reject':>12}{'Retry-After':>13}")
+    by_class = defaultdict(list)
+    for r in results:
+        by_class[r["class"]].append(r)
+    for cls in ("interactive", "analyze", "bulk"):
+        rows = by_class[cls]
+        ok = sorted(r["ms"] for r in rows if r["status"] == 200)
+        rejected = [r for r in rows if r["status"] in (429, 503)]
+        rejected_ms = sorted(r["ms"] for r in rejected)
+        with_retry = sum(1 for r in rejected if r["retry_after"])
+        count = lambda s: sum(1 for r in rows if r["status"] == s)
+        print(f"  {cls:<12}{len(rows):>6}{len(ok):>6}{count(429):>6}{count(503):>6}{count('timeout'):>9}"
+              f"{percentile(ok, 0.5):>8.0f}ms{percentile(ok, 0.95):>8.0f}ms{percentile(rejected_ms, 0.5):>10.0f}ms"
+              f"{f'{with_retry}/{len(rejected)}':>13}")
+    others = sorted({r["status"] for r in results} - {200, 429, 503, "timeout"}, key=str)
+    if others:
+        print(f"  ⚠️ other statuses: {others}")
+    if stats:
+        print(f"  admission: {stats['admission']['outcomes']}, max queue wait {stats['admission']['max_queue_wait_ms']:.0f}ms"
+              f" | coalescing: {stats['coalescing'].get('coalesced', 0)} coalesced")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=100, help="Distinct /analyze texts in the burst")
+    parser.add_argument("--duplicated", type=float, default=0.3, help="Share of them sent by several clients at once")
+    parser.add_argument("--copies", type=int, default=3)
+    parser.add_argument("--batches", type=int, default=6, help="/analyze/batch requests (bulk)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--chats", type=int, default=10, help="/memory/chat questions arriving behind the burst")
+    parser.add_argument("--chat-after", type=float, default=0.5, help="Seconds between the burst and the first question")
+    parser.add_argument("--seed-docs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=1.0, help="Fake generation latency (s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="OLLAMA_MAX_CONCURRENCY")
+    parser.add_argument("--client-timeout", type=float, default=30.0, help="When a client gives up (s)")
+    args = parser.parse_args()
+
+    burst = build_burst(args, random.Random(7))
+    with FakeOllamaServer(port=free_port(), latency=args.latency, tokens_per_sec=1000) as server:
+        for name, env in MODES.items():
+            saved = {k: os.environ.get(k) for k in (*env, "OLLAMA_MAX_CONCURRENCY", "DEDUP")}
+            os.environ.update(env, OLLAMA_MAX_CONCURRENCY=str(args.concurrency), DEDUP="0")
+            port = free_port()
+            proc = start_app(port, server.url, tempfile.mkdtemp(prefix="overload-bench-"))
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                seed_memory(base_url, args.seed_docs, random.Random(11))
+                calls_before = server.app.state.requests
+                started = time.perf_counter()
+                results = asyncio.run(fire(base_url, burst, args.client_timeout))
+                elapsed = time.perf_counter() - started
+                stats = httpx.get(f"{base_url}/admission/stats", timeout=10).json()
+                report(name, results, server.app.state.requests - calls_before, elapsed, stats)
+            finally:
+                proc.terminate()
+                proc.wait()
+                for k, v in saved.items():
+                    if v is None:
+                        os.environ.pop(k, None)
+                    else:
+                        os.environ[k] = v
+
+
+if __name__ == "__main__":
+    main()
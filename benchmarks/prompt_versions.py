@@ -0,0 +1,108 @@
+# benchmarks/prompt_versions.py
+"""
+Prompt tokens, generated (eval) tokens and latency per analysis for each
+analysis prompt version, e.g. v1 (LLM re-extracts entities) against
+v2-compact (schema-constrained, spaCy entities merged in).
+
+    python -m benchmarks.prompt_versions --texts 20                 # fake Ollama
+    python -m benchmarks.prompt_versions --host http://127.0.0.1:11434
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+from benchmarks.fake_ollama import FakeOllamaServer
+
+WORDS = ("battery screen refund delivery late broken support account password invoice "
+         "charger app crash slow fast great terrible order shipping warranty update").split()
+ORGS = ("Acme Corp", "Globex", "Initech", "Umbrella Ltd", "Stark Industries")
+PEOPLE = ("John Smith", "Maria Garcia", "Wei Chen", "Amara Okafor")
+
+
+def synthetic_inputs(n: int, seed: int = 7) -> list:
+    """(text, spaCy-style entities) pairs."""
+    rng = random.Random(seed)
+    inputs = []
+    for _ in range(n):
+        org, person = rng.choice(ORGS), rng.choice(PEOPLE)
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120)))
+        text = f"{person} wrote to {org} support: {body}."
+        inputs.append((text, [{"text": person, "label": "PERSON"}, {"text": org, "label": "ORG"}]))
+    return inputs
+
+
+async def bench_version(version: str, inputs: list) -> dict:
+    os.environ["LLM_PROMPT_VERSION"] = version
+    from backend.services.llm_provider import OllamaService
+    from backend.utils.metrics import LLM_TOKENS
+
+    llm = OllamaService()
+    prompt_tokens, eval_tokens, latencies, invalid = [], [], [], 0
+    try:
+        for text, entities in inputs:
+            before = (LLM_TOKENS.value(kind="prompt"), LLM_TOKENS.value(kind="eval"))
+            started = time.perf_counter()
+            result = await llm.analyze_text(text, entities)
+            latencies.append(time.perf_counter() - started)
+            prompt_tokens.append(LLM_TOKENS.value(kind="prompt") - before[0])
+            eval_tokens.append(LLM_TOKENS.value(kind="eval") - before[1])
+            invalid += result["summary"].startswith("Error:")
+    finally:
+        await llm.close()
+    return {
+        "version": version,
+        "analyses": len(inputs),
+        "avg_prompt_tokens": round(statistics.mean(prompt_tokens), 1),
+        "avg_eval_tokens": round(statistics.mean(eval_tokens), 1),
+        "latency_ms_p50": round(statistics.median(latencies) * 1000, 1),
+        "latency_ms_mean": round(statistics.mean(latencies) * 1000, 1),
+        "invalid_json": invalid,
+    }
+
+
+async def bench(versions: list, inputs: list) -> list:
+    results = []
+    for version in versions:
+        res = await bench_version(version, inputs)
+        results.append(res)
+        print(f"🧾 {version:11s} prompt {res['avg_prompt_tokens']:>7} tok | generated {res['avg_eval_tokens']:>6} tok | "
+              f"p50 {res['latency_ms_p50']} ms | mean {res['latency_ms_mean']} ms | invalid JSON {res['invalid_json']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--versions", nargs="+", default=["v1", "v2-compact"])
+    parser.add_argument("--texts", type=int, default=20)
+    parser.add_argument("--host", default=None, help="Real Ollama URL; default starts the fake server")
+    parser.add_argument("--tokens-per-sec", type=float, default=20.0, help="Fake server generation speed")
+    parser.add_argument("--port", type=int, default=11503)
+    parser.add_argument("--out", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+
+    inputs = synthetic_inputs(args.texts)
+    if args.host:
+        os.environ["OLLAMA_HOST"] = args.host
+        results = asyncio.run(bench(args.versions, inputs))
+    else:
+        with FakeOllamaServer(port=args.port, latency=0.1, tokens_per_sec=args.tokens_per_sec) as server:
+            os.environ["OLLAMA_HOST"] = server.url
+            results = asyncio.run(bench(args.versions, inputs))
+
+    first = results[0]
+    for res in results[1:]:
+        print(f"📉 {res['version']} vs {first['version']}: "
+              f"{res['avg_eval_tokens'] - first['avg_eval_tokens']:+.1f} generated tokens, "
+              f"{res['latency_ms_p50'] - first['latency_ms_p50']:+.1f} ms p50")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
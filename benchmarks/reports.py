@@ -0,0 +1,135 @@
+# benchmarks/reports.py
+"""
+PDF report throughput: the old path (FPDF rendered inside the request
+handler, written to a temp file per report) vs ReportService (CPU worker
+pool, bytes in memory, content-hash cache), plus bulk PDF / zip builds.
+Also reports the worst event-loop stall, i.e. how long every other
+request on the API would have been frozen.
+
+    python -m benchmarks.reports --reports 200 --concurrency 16
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+from benchmarks.retrieval import WORDS
+
+
+def synthetic_analyses(n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(25, 60))]
+        items.append({
+            "sentiment": rng.choice(("positive", "neutral", "negative")),
+            "sentiment_score": round(rng.uniform(-1, 1), 2),
+            "summary": f"Report {i}: " + " ".join(words) + ".",
+            "topics": sorted(set(words[:3])),
+            "intent": rng.choice(("informational", "complaint", "request")),
+            "entities": [{"text": w.title(), "label": rng.choice(("ORG", "PRODUCT", "GPE"))} for w in words[:rng.randint(2, 8)]],
+        })
+    return items
+
+
+class LoopLag:
+    """Largest delay of a 10 ms ticker: how long the event loop was blocked."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.worst = 0.0
+        self._started = time.perf_counter()
+        self._task = None
+
+    def _observe(self):
+        self.worst = max(self.worst, time.perf_counter() - self._started - self.interval)
+
+    async def _tick(self):
+        while True:
+            self._started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._observe()
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._tick())
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc):
+        # A loop that never yielded never woke the ticker: count the pending tick
+        self._observe()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def _drive(fn, items: list, concurrency: int) -> dict:
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(data):
+        async with limit:
+            return await fn(data)
+
+    async with LoopLag() as lag:
+        started = time.perf_counter()
+        outputs = await asyncio.gather(*(one(d) for d in items))
+        elapsed = time.perf_counter() - started
+    return {"wall_s": elapsed, "per_s": len(items) / elapsed, "lag_ms": lag.worst * 1000, "outputs": outputs}
+
+
+def _print(label: str, stats: dict, extra: str = ""):
+    print(f"  {label:28s} {stats['wall_s']:6.2f}s  {stats['per_s']:7.1f} reports/s  "
+          f"worst loop stall {stats['lag_ms']:7.1f} ms{extra}")
+
+
+async def run(args):
+    from backend.services.report_service import ReportService
+    from backend.utils.report_generator import generate_pdf
+    from backend.utils import executors
+
+    items = synthetic_analyses(args.reports)
+    tmpdir = tempfile.mkdtemp(prefix="report-bench-")
+
+    # 1. Old path: rendered in the handler, one temp file per report (never deleted)
+    async def legacy(data):
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", dir=tmpdir)
+        temp_file.write(generate_pdf(data))
+        temp_file.close()
+        return temp_file.name
+
+    stats = await _drive(legacy, items, args.concurrency)
+    leaked = sum(os.path.getsize(p) for p in stats["outputs"])
+    _print("inline + temp files", stats, f" | {len(stats['outputs'])} temp files left ({leaked / 1e6:.1f} MB)")
+    for path in stats["outputs"]:
+        os.remove(path)
+    os.rmdir(tmpdir)
+
+    # 2. Worker pool (first call also spawns the workers: warm them up outside the timing)
+    service = ReportService()
+    await asyncio.gather(*(executors.run_cpu(generate_pdf, items[0]) for _ in range(executors.cpu_worker_count())))
+    _print(f"worker pool ({executors.cpu_worker_count()} procs), cold", await _drive(service.render, items, args.concurrency))
+    _print("worker pool, cache hits", await _drive(service.render, items, args.concurrency))
+
+    # 3. Bulk: one consolidated PDF, and a zip (cold cache, rendered in parallel)
+    started = time.perf_counter()
+    pdf = await ReportService().render_bulk(items, "pdf")
+    print(f"  {'bulk PDF':28s} {time.perf_counter() - started:6.2f}s  one file of {len(items)} analyses, {len(pdf) / 1e6:.2f} MB")
+    started = time.perf_counter()
+    archive = await ReportService().render_bulk(items, "zip")
+    print(f"  {'bulk zip':28s} {time.perf_counter() - started:6.2f}s  {len(items)} PDFs, {len(archive) / 1e6:.2f} MB")
+    print(f"  cache: {service.stats()}")
+    executors.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    print(f"📄 {args.reports} distinct reports, {args.concurrency} concurrent requests")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/retrieval.py
+"""
+Relevance and latency of memory retrieval modes over a synthetic corpus:
+dense only, hybrid (dense + BM25 + entities, RRF) and hybrid + re-rank.
+
+Each query targets one known document, either by its ticket code, by
+the organization it mentions, or by a loose bag of its words.
+
+    python -m benchmarks.retrieval --docs 2000 --queries 200 --rerank
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+WORDS = ("battery screen refund delivery late broken support account password invoice "
+         "charger app crash slow fast great terrible order shipping warranty update").split()
+ORG_PARTS = ("Bright Nova Apex Blue Iron Quantum Silver North Vertex Cedar".split(),
+             "wave labs works systems dynamics retail logistics telecom foods motors".split())
+
+
+def synthetic_corpus(n: int, seed: int = 7):
+    """Feedback texts, each with a unique ticket code and one organization name."""
+    rng = random.Random(seed)
+    orgs = [f"{a}{b.capitalize()} {c.capitalize()}" for a in ORG_PARTS[0] for b in ORG_PARTS[1] for c in ("Inc", "Ltd")]
+    docs = []
+    for i in range(n):
+        code = f"{rng.choice('ABCDEFGHKMXZ')}{rng.choice('ABCDEFGHKMXZ')}-{1000 + i}"
+        org = rng.choice(orgs)
+        words = [rng.choice(WORDS) for _ in range(rng.randint(12, 40))]
+        text = f"Ticket {code}: {' '.join(words[:6])} with {org}. {' '.join(words[6:])}."
+        docs.append({"id": f"doc-{i}", "text": text, "code": code, "org": org, "words": words})
+    return docs
+
+
+def synthetic_queries(docs: list, n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    by_org = {}
+    for d in docs:
+        by_org.setdefault(d["org"], []).append(d["id"])
+    queries = []
+    for _ in range(n):
+        d = rng.choice(docs)
+        kind = rng.choice(("code", "entity", "words"))
+        if kind == "code":
+            queries.append({"kind": kind, "query": f"what happened with ticket {d['code']}", "relevant": {d["id"]}})
+        elif kind == "entity":
+            queries.append({"kind": kind, "query": f"complaints about {d['org']}", "relevant": set(by_org[d["org"]])})
+        else:
+            queries.append({"kind": kind, "query": " ".join(rng.sample(d["words"], 6)), "relevant": {d["id"]}})
+    return queries
+
+
+def evaluate(memory, queries: list, k: int, mode: str, rerank: bool) -> dict:
+    hits, rr, latencies = [], [], []
+    per_kind = {}
+    for q in queries:
+        started = time.perf_counter()
+        ids = memory.search_similar(q["query"], n_results=k, mode=mode, rerank=rerank)["ids"][0]
+        latencies.append(time.perf_counter() - started)
+        rank = next((r for r, i in enumerate(ids, start=1) if i in q["relevant"]), None)
+        hits.append(rank is not None)
+        rr.append(1.0 / rank if rank else 0.0)
+        per_kind.setdefault(q["kind"], []).append(rank is not None)
+    latencies.sort()
+    return {
+        "mode": mode + ("+rerank" if rerank else ""),
+        f"recall@{k}": round(sum(hits) / len(hits), 3),
+        "mrr": round(sum(rr) / len(rr), 3),
+        "recall_by_kind": {kind: round(sum(v) / len(v), 3) for kind, v in per_kind.items()},
+        "latency_ms_p50": round(statistics.median(latencies) * 1000, 2),
+        "latency_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rerank", action="store_true", help="Also measure cross-encoder re-ranking")
+    parser.add_argument("--out", default=None, help="Write results as JSON")
+    args = parser.parse_args()
+    out = os.path.abspath(args.out) if args.out else None
+
+    docs = synthetic_corpus(args.docs)
+    queries = synthetic_queries(docs, args.queries)
+
+    # MemoryStore keeps everything under ./data: build the corpus in a scratch dir
+    workdir = tempfile.mkdtemp(prefix="retrieval-bench-")
+    os.chdir(workdir)
+    from backend.services.memory_store import MemoryStore
+    memory = MemoryStore()
+
+    started = time.perf_counter()
+    for i in range(0, len(docs), 256):
+        batch = docs[i:i + 256]
+        memory.save_analyses(
+            [d["text"] for d in batch],
+            [{"sentiment": "neutral", "summary": "", "intent": "informational", "entities": []} for _ in batch],
+            [d["id"] for d in batch],
+            # What spaCy would extract
+            entities=[[{"text": d["org"], "label": "ORG"}] for d in batch],
+        )
+    print(f"📥 Indexed {len(docs)} docs in {time.perf_counter() - started:.1f}s ({workdir})")
+
+    runs = [("vector", False), ("hybrid", False)] + ([("hybrid", True)] if args.rerank else [])
+    results = []
+    for mode, rerank in runs:
+        res = evaluate(memory, queries, args.k, mode, rerank)
+        results.append(res)
+        print(f"🔎 {res['mode']:15s} recall@{args.k} {res[f'recall@{args.k}']:.3f} | MRR {res['mrr']:.3f} | "
+              f"p50 {res['latency_ms_p50']} ms | p95 {res['latency_ms_p95']} ms | {res['recall_by_kind']}")
+
+    base = results[0]
+    for res in results[1:]:
+        extra_ms = res["latency_ms_p50"] - base["latency_ms_p50"]
+        gain = res[f"recall@{args.k}"] - base[f"recall@{args.k}"]
+        print(f"📈 {res['mode']}: {gain:+.3f} recall for {extra_ms:+.2f} ms p50")
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
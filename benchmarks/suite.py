@@ -0,0 +1,303 @@
+# benchmarks/suite.py
+"""
+End-to-end benchmark suite: starts the FastAPI app (uvicorn subprocess, in
+a scratch data directory) against the fake Ollama server, then measures
+throughput and p50/p95/p99 latency per endpoint, concurrency level and
+memory corpus size. Results go to JSON; --compare flags regressions
+against an earlier run.
+
+    python -m benchmarks.suite --concurrency 1 4 16 --corpus 100 1000 --out runs/today.json
+    python -m benchmarks.suite --scenarios analyze search --compare runs/yesterday.json
+
+Needs the app's own dependencies (spaCy model, embedding model) installed.
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.fake_ollama import FakeOllamaServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORDS = ("battery screen refund delivery late broken support account password invoice "
+         "charger app crash slow fast great terrible order shipping warranty update").split()
+QUESTIONS = ("What are the main complaints?", "What do customers say about delivery?",
+             "Any problems with the battery?", "How is support rated?")
+REPORT = {
+    "sentiment": "negative", "sentiment_score": -0.6, "summary": "Battery drains too fast.",
+    "topics": ["battery"], "intent": "complaint", "entities": [{"text": "Acme", "label": "ORG"}],
+}
+
+
+# --- Inputs ---
+
+def feedback_text(rng: random.Random, tag: str) -> str:
+    return f"Ticket {tag}: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 60))) + "."
+
+
+def make_pdf(pages: int, tag: str, rng: random.Random) -> bytes:
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_font("Helvetica", size=11)
+    for _ in range(pages):
+        pdf.add_page()
+        pdf.multi_cell(0, 6, f"{tag}\n" + "\n".join(feedback_text(rng, tag) for _ in range(12)))
+    return bytes(pdf.output())
+
+
+def make_docx(paragraphs: int, tag: str, rng: random.Random) -> bytes:
+    import docx
+    document = docx.Document()
+    document.add_paragraph(tag)
+    for _ in range(paragraphs):
+        document.add_paragraph(feedback_text(rng, tag))
+    buf = io.BytesIO()
+    document.save(buf)
+    return buf.getvalue()
+
+
+def scenarios(rng: random.Random, run_id: str) -> dict:
+    """name -> builder(i) returning the request as (method, path, httpx kwargs). Each request is unique (no cache hits)."""
+    def unique(i):
+        return f"{run_id}-{i}-{rng.randrange(10**9)}"
+
+    return {
+        "analyze": lambda i: ("POST", "/analyze", {"json": {"text": feedback_text(rng, unique(i))}}),
+        "file_pdf_1p": lambda i: ("POST", "/analyze/file", {"files": {"file": ("b.pdf", make_pdf(1, unique(i), rng), "application/pdf")}}),
+        "file_pdf_20p": lambda i: ("POST", "/analyze/file", {"files": {"file": ("b.pdf", make_pdf(20, unique(i), rng), "application/pdf")}}),
+        "file_docx_200": lambda i: ("POST", "/analyze/file", {"files": {"file": ("b.docx", make_docx(200, unique(i), rng), "application/octet-stream")}}),
+        "search": lambda i: ("POST", "/memory/search", {"json": {"query": rng.choice(QUESTIONS), "n_results": 5}}),
+        "chat": lambda i: ("POST", "/memory/chat", {"json": {"question": rng.choice(QUESTIONS)}}),
+        "report_pdf": lambda i: ("POST", "/report/pdf", {"json": REPORT}),
+    }
+
+# Scenarios whose cost depends on how much is stored in memory
+CORPUS_DEPENDENT = {"search", "chat"}
+
+
+# --- App lifecycle ---
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port: int, ollama_url: str, workdir: str, timeout: float = 600):
+    env = {
+        **os.environ,
+        "OLLAMA_HOST": ollama_url,
+        "STARTUP_MODE": "blocking",
+        "PYTHONPATH": os.pathsep.join(p for p in (REPO_ROOT, os.environ.get("PYTHONPATH")) if p),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"❌ App exited during startup (code {proc.returncode}).")
+        try:
+            health = httpx.get(f"http://127.0.0.1:{port}/", timeout=2).json()
+            if health["status"] == "ready":
+                return proc
+            if health["status"] == "degraded":
+                proc.terminate()
+                raise SystemExit(f"❌ App started degraded: {health['components']}")
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise SystemExit("❌ App did not become ready in time.")
+
+
+# --- Load generation ---
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))]
+
+
+async def run_level(base_url: str, requests: list, concurrency: int) -> dict:
+    """Sends the prebuilt requests with `concurrency` requests in flight."""
+    queue = asyncio.Queue()
+    for req in requests:
+        queue.put_nowait(req)
+    latencies, errors = [], {}
+
+    async def worker(client):
+        while not queue.empty():
+            method, path, kwargs = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                res = await client.request(method, path, **kwargs)
+                if res.status_code < 400:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors[str(res.status_code)] = errors.get(str(res.status_code), 0) + 1
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda s: round(s * 1000, 1)
+    return {
+        "requests": len(requests),
+        "ok": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "mean_ms": ms(statistics.mean(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+    }
+
+
+async def fill_corpus(base_url: str, target: int, current: int, rng: random.Random, run_id: str) -> int:
+    """Grows memory to `target` analyses through /analyze/batch, then waits for the write buffer."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=600) as client:
+        while current < target:
+            n = min(500, target - current)
+            texts = [feedback_text(rng, f"corpus-{run_id}-{current + i}") for i in range(n)]
+            (await client.post("/analyze/batch", json={"texts": texts})).raise_for_status()
+            current += n
+        while (await client.get("/memory/buffer")).json()["pending"]:
+            await asyncio.sleep(0.2)
+    return current
+
+
+# --- Comparison ---
+
+def compare(previous: dict, current: dict, tolerance: float) -> list:
+    """Rows whose p95 got slower or throughput dropped by more than `tolerance` (fraction)."""
+    key = lambda r: (r["scenario"], r["corpus"], r["concurrency"])
+    before = {key(r): r for r in previous["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = before.get(key(row))
+        if not old or not old["ok"] or not row["ok"]:
+            continue
+        p95_change = (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] if old["p95_ms"] else 0.0
+        rps_change = (row["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] if old["throughput_rps"] else 0.0
+        print(f"   {row['scenario']:14s} corpus {row['corpus']:>6} c={row['concurrency']:<3} "
+              f"p95 {old['p95_ms']:>9} -> {row['p95_ms']:>9} ms ({p95_change:+.0%}) | "
+              f"rps {old['throughput_rps']:>7} -> {row['throughput_rps']:>7} ({rps_change:+.0%})")
+        if p95_change > tolerance or rps_change < -tolerance:
+            regressions.append(row)
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=None, help="Default: all")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--corpus", type=int, nargs="+", default=[100, 1000], help="Memory sizes to test at")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per scenario and concurrency level")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Ollama time to first token (s)")
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default=None, help="Write results as JSON")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to diff against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p95/throughput change before failing")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    run_id = datetime.now().strftime("%H%M%S")
+    builders = scenarios(rng, run_id)
+    selected = args.scenarios or list(builders)
+    unknown = set(selected) - set(builders)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}. Choose from: {', '.join(builders)}")
+
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix="bench-suite-")
+    port = free_port()
+    with FakeOllamaServer(port=free_port(), latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                          prompt_tokens_per_sec=args.prompt_tokens_per_sec) as ollama:
+        print(f"🚀 Starting app on :{port} (data in {workdir}) ...")
+        started = time.perf_counter()
+        app = start_app(port, ollama.url, workdir)
+        report["meta"]["startup_s"] = round(time.perf_counter() - started, 2)
+        base_url = f"http://127.0.0.1:{port}"
+        stored = 0
+        try:
+            for i, corpus in enumerate(sorted(args.corpus)):
+                # Corpus fill is setup, not measurement: make the fake model instant meanwhile
+                ollama.app.state.latency, ollama.app.state.tokens_per_sec = 0.0, 1e6
+                stored = asyncio.run(fill_corpus(base_url, corpus, stored, rng, run_id))
+                ollama.app.state.latency, ollama.app.state.tokens_per_sec = args.latency, args.tokens_per_sec
+
+                for name in selected:
+                    # Corpus-independent scenarios only need measuring once
+                    if i > 0 and name not in CORPUS_DEPENDENT:
+                        continue
+                    # One unmeasured request pays for lazy imports/model loads
+                    asyncio.run(run_level(base_url, [builders[name](-1)], 1))
+                    for concurrency in args.concurrency:
+                        requests = [builders[name](n) for n in range(args.requests)]
+                        res = asyncio.run(run_level(base_url, requests, concurrency))
+                        row = {"scenario": name, "corpus": corpus, "concurrency": concurrency, **res}
+                        report["results"].append(row)
+                        errors = f" | errors {res['errors']}" if res["errors"] else ""
+                        print(f"📊 {name:14s} corpus {corpus:>6} c={concurrency:<3} {res['throughput_rps']:>7} req/s | "
+                              f"p50 {res['p50_ms']:>8} | p95 {res['p95_ms']:>8} | p99 {res['p99_ms']:>8} ms{errors}")
+        finally:
+            app.terminate()
+            app.wait(timeout=30)
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"🔍 Comparing with {args.compare} (commit {previous['meta'].get('git_commit')}):")
+        regressions = compare(previous, report, args.tolerance)
+        if regressions:
+            raise SystemExit(f"❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}.")
+        print("✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import streamlit as st
+import pandas as pd
 import requests
+import json
+import time
 
 # 1. SETUP
 st.set_page_config(page_title="AI Insight Studio", layout="wide", page_icon="🧠")
@@ -36,6 +39,58 @@ def highlight_entities(text, entities):
         processed = processed.replace(word, html)
     return processed
 
+def busy_message(retry_after):
+    return f"The analyzer is busy right now, please try again in {retry_after} s."
+
+def stream_answer(question, meta):
+    """Yields answer tokens from the streaming chat endpoint as they arrive."""
+    with requests.post(f"{API_URL}/memory/chat/stream", json={"question": question}, stream=True, timeout=(5, 300)) as res:
+        if res.status_code in (429, 503) and "Retry-After" in res.headers:
+            raise RuntimeError(busy_message(res.headers["Retry-After"]))
+        res.raise_for_status()
+        for line in res.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if "token" in event:
+                yield event["token"]
+            elif "retry_after" in event:
+                raise RuntimeError(busy_message(event["retry_after"]))
+            elif "error" in event:
+                raise RuntimeError(event["error"])
+            elif event.get("done"):
+                meta.update(event)
+
+def run_file_job(uploaded_file):
+    """
+    Submits the file as a background job and polls it, so a long analysis
+    doesn't depend on one HTTP connection staying open. Returns (data, error).
+    """
+    files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
+    sub = requests.post(f"{API_URL}/jobs/analyze/file", files=files, timeout=120)
+    if sub.status_code != 202:
+        return None, f"Error {sub.status_code}: {sub.text}"
+
+    job_id = sub.json()["job_id"]
+    bar = st.progress(0.0, text="Queued...")
+    while True:
+        try:
+            job = requests.get(f"{API_URL}/jobs/{job_id}", timeout=10).json()
+        except requests.RequestException:
+            time.sleep(2)  # backend restarting: the job is persisted, keep polling
+            continue
+        if job["status"] == "queued":
+            bar.progress(0.0, text=f"Queued (position {job.get('queue_position')})...")
+        elif job["status"] == "running":
+            bar.progress(job["progress"], text=f"Analyzing... {job['progress']:.0%}")
+        elif job["status"] == "done":
+            bar.empty()
+            return job["result"], None
+        else:
+            bar.empty()
+            return None, f"Job {job['status']}: {job.get('error') or ''}"
+        time.sleep(1)
+
 # 4. APP STRUCTURE
 st.title("🧠 AI Insight Studio")
 
@@ -54,7 +109,7 @@ with st.sidebar:
     analyze_btn = st.button("✨ Analyze Now", type="primary", use_container_width=True)
 
 # --- TABS FOR MODES ---
-tab1, tab2 = st.tabs(["📊 New Analysis", "💬 Chat with Data"])
+tab1, tab2, tab3 = st.tabs(["📊 New Analysis", "💬 Chat with Data", "📈 Dashboard"])
 
 # === TAB 1: ANALYSIS LOGIC ===
 with tab1:
@@ -64,15 +119,20 @@ with tab1:
         else:
             with st.spinner("🤖 Analyzing..."):
                 try:
-                    # Determine Endpoint
+                    # Determine Endpoint (files run as background jobs)
+                    data, error = None, None
                     if uploaded_file:
-                        files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-                        response = requests.post(f"{API_URL}/analyze/file", files=files)
+                        data, error = run_file_job(uploaded_file)
                     else:
-                        response = requests.post(f"{API_URL}/analyze", json={"text": user_input})
+                        response = requests.post(f"{API_URL}/analyze", json={"text": user_input}, timeout=300)
+                        if response.status_code == 200:
+                            data = response.json()
+                        elif response.status_code in (429, 503) and "Retry-After" in response.headers:
+                            error = busy_message(response.headers["Retry-After"])
+                        else:
+                            error = f"Error {response.status_code}: {response.text}"
 
-                    if response.status_code == 200:
-                        data = response.json()
+                    if data:
                         st.toast("Analysis Complete!", icon="✅")
 
                         # Metrics
@@ -111,7 +171,7 @@ with tab1:
                         with t_raw:
                             st.json(data)
                     else:
-                        st.error(f"Error {response.status_code}: {response.text}")
+                        st.error(error)
 
                 except Exception as e:
                     st.error(f"Connection Failed: {e}")
@@ -136,14 +196,80 @@ with tab2:
             st.markdown(prompt)
 
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    res = requests.post(f"{API_URL}/memory/chat", json={"question": prompt})
-                    if res.status_code == 200:
-                        ans = res.json()["answer"]
-                        st.markdown(ans)
-                        st.session_state.messages.append({"role": "assistant", "content": ans})
-                    else:
-                        st.error("Backend Error")
-                except Exception as e:
-                    st.error(f"Connection Failed: {e}")
\ No newline at end of file
+            try:
+                # Tokens are rendered as soon as the model produces them
+                meta = {}
+                ans = st.write_stream(stream_answer(prompt, meta))
+                st.session_state.messages.append({"role": "assistant", "content": ans})
+                if meta.get("ttft_ms") is not None:
+                    st.caption(f"First token in {meta['ttft_ms'] / 1000:.1f}s · total {meta['total_ms'] / 1000:.1f}s")
+            except requests.HTTPError:
+                st.error("Backend Error")
+            except Exception as e:
+                st.error(f"Connection Failed: {e}")
+
+# === TAB 3: DASHBOARD (precomputed aggregates, no LLM) ===
+with tab3:
+    st.header("📈 Memory Dashboard")
+    st.caption("Counts over every analysis in memory, served from precomputed aggregates.")
+
+    f1, f2, f3 = st.columns(3)
+    period = f1.selectbox("Period", ["last 7 days", "last 30 days", "this month", "last month", "this year", "all time"], index=1)
+    bucket = f2.selectbox("Group by", ["day", "week", "month"])
+    intent_filter = f3.selectbox("Intent", ["all", "complaint", "informational"])
+
+    params = {"bucket": bucket, "top": 10}
+    if period != "all time":
+        params["period"] = period
+    if intent_filter != "all":
+        params["intent"] = intent_filter
+
+    try:
+        response = requests.get(f"{API_URL}/memory/stats", params=params, timeout=30)
+        if response.status_code != 200:
+            st.error(f"Error {response.status_code}: {response.text}")
+        elif not response.json()["total"]:
+            st.info("No analyses stored for this period yet.")
+        else:
+            stats = response.json()
+            total = stats["total"]
+            negative = stats["by_sentiment"].get("negative", 0)
+
+            # Metrics
+            c1, c2, c3, c4 = st.columns(4)
+            with c1:
+                st.markdown(f'<div class="metric-card"><h4>Analyses</h4><h2>{total}</h2></div>', unsafe_allow_html=True)
+            with c2:
+                st.markdown(f'<div class="metric-card"><h4>Negative</h4><h2 style="color:#e74c3c">{negative / total:.0%}</h2></div>', unsafe_allow_html=True)
+            with c3:
+                mean = stats["score"]["mean"]
+                st.markdown(f'<div class="metric-card"><h4>Avg Score</h4><h2>{mean if mean is not None else "-"}</h2></div>', unsafe_allow_html=True)
+            with c4:
+                top_intent = max(stats["by_intent"], key=stats["by_intent"].get)
+                st.markdown(f'<div class="metric-card"><h4>Top Intent</h4><h3 style="color:#3498db">{top_intent}</h3></div>', unsafe_allow_html=True)
+
+            st.subheader("Sentiment over time")
+            st.bar_chart(pd.DataFrame(stats["timeline"]).set_index("bucket").fillna(0))
+
+            cl, cr = st.columns(2)
+            with cl:
+                st.subheader("Sentiment by intent")
+                st.bar_chart(pd.DataFrame(stats["intent_by_sentiment"]).T.fillna(0))
+            with cr:
+                st.subheader("Score distribution")
+                if stats["score"]["histogram"]:
+                    hist = pd.DataFrame(stats["score"]["histogram"])
+                    hist["range"] = hist["from"].map(lambda v: f"{v:+.1f}")
+                    st.bar_chart(hist.set_index("range")["count"])
+                else:
+                    st.caption("No sentiment scores in this period.")
+
+            ct, ce = st.columns(2)
+            with ct:
+                st.subheader("Top topics")
+                st.dataframe(pd.DataFrame(stats["top_topics"]), hide_index=True, use_container_width=True)
+            with ce:
+                st.subheader("Top entities")
+                st.dataframe(pd.DataFrame(stats["top_entities"]), hide_index=True, use_container_width=True)
+    except Exception as e:
+        st.error(f"Connection Failed: {e}")
@@ -0,0 +1,71 @@
+# tests/conftest.py
+import os
+import hashlib
+
+import numpy as np
+import pytest
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.suite import free_port
+
+TUNING_PREFIXES = (
+    "OLLAMA_", "ADMISSION_", "REQUEST_COALESCING", "MEMORY_", "EMBEDDING_", "ANALYSIS_CACHE_", "CHAT_", "DEDUP",
+)
+
+
+@pytest.fixture(autouse=True)
+def default_tuning(monkeypatch):
+    """Every test starts from the built-in defaults, whatever the shell exports."""
+    for name in list(os.environ):
+        if name.startswith(TUNING_PREFIXES):
+            monkeypatch.delenv(name)
+
+
+@pytest.fixture
+def fake_ollama():
+    """Starts fake Ollama servers (create_app's keyword arguments); all stopped after the test."""
+    servers = []
+
+    def start(**kwargs):
+        server = FakeOllamaServer(port=free_port(), **kwargs).__enter__()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
+
+
+class BagOfWordsEmbedder:
+    """Stands in for the embedding model: hashed word counts, L2-normalised (same words, same vector)."""
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            v = np.zeros(64, dtype=np.float32)
+            for word in text.lower().split():
+                v[int(hashlib.md5(word.strip(".,!?").encode()).hexdigest(), 16) % 64] += 1.0
+            vectors.append(v / (np.linalg.norm(v) or 1.0))
+        return vectors
+
+
+@pytest.fixture
+def open_memory(tmp_path, monkeypatch):
+    """
+    Opens MemoryStores on a throwaway ./data directory: the real Chroma and
+    SQLite stores, with BagOfWordsEmbedder instead of a downloaded model.
+    """
+    from chromadb.api.client import SharedSystemClient
+    from backend.services import embeddings
+    from backend.services.memory_store import MemoryStore
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(embeddings, "_load_backend", lambda name, model: BagOfWordsEmbedder())
+
+    def open_store():
+        # Chroma caches clients by path, and every test's path is ./data/chroma_db
+        SharedSystemClient.clear_system_cache()
+        return MemoryStore()
+
+    yield open_store
+    SharedSystemClient.clear_system_cache()
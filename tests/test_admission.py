@@ -0,0 +1,284 @@
+# tests/test_admission.py
+import asyncio
+
+import pytest
+
+from backend.core.exceptions import Overloaded
+from backend.services.admission import AdmissionController, SingleFlight, PRIORITY, PRIORITIES
+from backend.services.llm_pool import LLMPool
+
+
+def controller(monkeypatch, limit: int = 1, **env) -> AdmissionController:
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    return AdmissionController(limit)
+
+
+# --- Admission control ---
+
+def test_free_slots_go_to_the_most_urgent_waiter(monkeypatch):
+    admission = controller(monkeypatch)
+    order = []
+
+    async def scenario():
+        await admission.admit("analyze")  # holds the only slot
+
+        async def waiter(cls):
+            await admission.admit(cls)
+            order.append(cls)
+            admission.release(cls)
+
+        tasks = []
+        for cls in ("bulk", "analyze", "interactive"):
+            tasks.append(asyncio.create_task(waiter(cls)))
+            await asyncio.sleep(0)  # queued in this order
+        admission.release("analyze")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == ["interactive", "analyze", "bulk"]
+
+
+def test_bulk_keeps_headroom_for_interactive_requests(monkeypatch):
+    admission = controller(monkeypatch, limit=4)  # bulk may hold 2 of 4 slots
+
+    async def scenario():
+        await admission.admit("bulk")
+        await admission.admit("bulk")
+        third = asyncio.create_task(admission.admit("bulk"))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(admission.admit("interactive"), timeout=1)
+        assert not third.done()
+        admission.release("bulk")
+        await asyncio.wait_for(third, timeout=1)
+
+    asyncio.run(scenario())
+    assert admission.stats()["in_flight"] == {"interactive": 1, "analyze": 0, "bulk": 2}
+
+
+def test_full_queue_sheds_less_urgent_work_then_rejects_with_retry_after(monkeypatch):
+    admission = controller(monkeypatch, ADMISSION_MAX_QUEUE=1)
+
+    async def scenario():
+        await admission.admit("analyze")
+        bulk = asyncio.create_task(admission.admit("bulk"))
+        await asyncio.sleep(0)
+        chat = asyncio.create_task(admission.admit("interactive"))  # takes the bulk request's place
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await bulk
+        with pytest.raises(Overloaded) as rejected:
+            await admission.admit("analyze")  # nothing less urgent left to shed
+        admission.release("analyze")
+        await asyncio.wait_for(chat, timeout=1)
+        return shed.value, rejected.value
+
+    shed, rejected = asyncio.run(scenario())
+    assert (shed.status_code, rejected.status_code) == (503, 429)
+    assert shed.retry_after >= 1 and rejected.retry_after >= 1
+    assert admission.stats()["outcomes"] == {"admitted": 2, "shed": 1, "queue_full": 1}
+
+
+def test_check_rejects_up_front_only_when_the_request_could_not_queue(monkeypatch):
+    admission = controller(monkeypatch, ADMISSION_MAX_QUEUE=0)
+
+    async def scenario():
+        admission.check("interactive")  # a free slot: fine
+        await admission.admit("interactive")
+        with pytest.raises(Overloaded) as rejected:
+            admission.check("interactive")
+        return rejected.value
+
+    assert asyncio.run(scenario()).status_code == 429
+
+
+def test_request_that_outlives_its_deadline_gets_503(monkeypatch):
+    admission = controller(monkeypatch, ADMISSION_DEADLINE_ANALYZE=0.05)
+
+    async def scenario():
+        await admission.admit("bulk")
+        with pytest.raises(Overloaded) as expired:
+            await admission.admit("analyze")
+        admission.release("bulk")
+        # The expired waiter left the queue: the next request gets the slot at once
+        await asyncio.wait_for(admission.admit("analyze"), timeout=1)
+        return expired.value
+
+    expired = asyncio.run(scenario())
+    assert expired.status_code == 503 and expired.retry_after >= 1
+    stats = admission.stats()
+    assert stats["outcomes"]["deadline"] == 1
+    assert sum(stats["queued"].values()) == 0
+    assert stats["in_flight"] == {"interactive": 0, "analyze": 1, "bulk": 0}
+
+
+def test_client_that_goes_away_leaves_no_waiter_behind(monkeypatch):
+    admission = controller(monkeypatch)
+
+    async def scenario():
+        await admission.admit("analyze")
+        waiter = asyncio.create_task(admission.admit("bulk"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        admission.release("analyze")
+
+    asyncio.run(scenario())
+    stats = admission.stats()
+    assert sum(stats["queued"].values()) == 0 and sum(stats["in_flight"].values()) == 0
+
+
+def test_a_waiter_that_already_gave_up_is_not_shed(monkeypatch):
+    admission = controller(monkeypatch, ADMISSION_MAX_QUEUE=1)
+
+    async def scenario():
+        await admission.admit("analyze")
+        bulk = asyncio.create_task(admission.admit("bulk"))
+        await asyncio.sleep(0)
+        # Its deadline fired, but the waiter hasn't run to leave the queue yet
+        admission._queue[-1][3].cancel()
+        chat = asyncio.create_task(admission.admit("interactive"))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.CancelledError):
+            await bulk
+        admission.release("analyze")
+        await asyncio.wait_for(chat, timeout=1)
+
+    asyncio.run(scenario())
+    stats = admission.stats()
+    assert "shed" not in stats["outcomes"]
+    assert sum(stats["queued"].values()) == 0
+
+
+def test_slot_sets_the_priority_the_llm_pool_sees(monkeypatch):
+    admission = controller(monkeypatch)
+
+    async def scenario():
+        async with admission.slot("interactive"):
+            inside = PRIORITY.get()
+        return inside, PRIORITY.get()
+
+    assert asyncio.run(scenario()) == (PRIORITIES["interactive"], PRIORITIES["analyze"])
+
+
+def test_llm_pool_serves_interactive_requests_first(fake_ollama):
+    server = fake_ollama(latency=0.3, tokens_per_sec=1000)
+    done = []
+
+    async def scenario():
+        pool = LLMPool([(server.url, "mistral", 1)], timeout=10)
+
+        async def ask(cls):
+            PRIORITY.set(PRIORITIES[cls])  # each task runs in its own context copy
+            await pool.chat(messages=[{"role": "user", "content": cls}])
+            done.append(cls)
+
+        try:
+            first = asyncio.create_task(ask("analyze"))  # takes the only slot
+            await asyncio.sleep(0.05)
+            rest = []
+            for cls in ("bulk", "bulk", "analyze", "interactive"):
+                rest.append(asyncio.create_task(ask(cls)))
+                await asyncio.sleep(0.01)
+            await asyncio.gather(first, *rest)
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
+    assert done == ["analyze", "interactive", "analyze", "bulk", "bulk"]
+
+
+# --- Coalescing ---
+
+def test_identical_in_flight_requests_share_one_generation(fake_ollama):
+    server = fake_ollama(latency=0.2, tokens_per_sec=1000)
+    flights = SingleFlight()
+
+    async def scenario():
+        pool = LLMPool([(server.url, "mistral", 4)], timeout=10)
+
+        async def ask():
+            response = await pool.chat(messages=[{"role": "user", "content": "What broke?"}])
+            return response["message"]["content"]
+
+        try:
+            return await asyncio.gather(*(flights.do(("/memory/chat", "what broke?"), ask) for _ in range(5)))
+        finally:
+            await pool.close()
+
+    answers = asyncio.run(scenario())
+    assert len(answers) == 5 and len(set(answers)) == 1
+    assert server.app.state.requests == 1
+    stats = flights.stats()
+    assert (stats["executed"], stats["coalesced"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_coalesced_callers_share_the_error():
+    flights = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("model unavailable")
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_a_caller_leaving_does_not_cancel_the_shared_run():
+    flights = SingleFlight()
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(flights.do("key", work))
+        await started.wait()
+        second = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_coalescing_can_be_turned_off(monkeypatch):
+    monkeypatch.setenv("REQUEST_COALESCING", "0")
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(flights.do("key", work) for _ in range(3)))
+
+    asyncio.run(scenario())
+    assert len(calls) == 3
+
+
+def test_patient_background_work_retries_instead_of_failing(monkeypatch):
+    admission = controller(monkeypatch, ADMISSION_MAX_QUEUE=0)
+
+    async def scenario():
+        await admission.admit("interactive")
+        job = asyncio.create_task(admission.run("bulk", asyncio.sleep, 0, patient=True))
+        await asyncio.sleep(0.05)
+        assert not job.done()  # turned away (429), backing off
+        admission.release("interactive")
+        await asyncio.wait_for(job, timeout=3)
+
+    asyncio.run(scenario())
+    assert admission.stats()["outcomes"]["queue_full"] >= 1
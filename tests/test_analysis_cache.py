@@ -0,0 +1,66 @@
+# tests/test_analysis_cache.py
+import time
+
+import pytest
+
+from backend.services.analysis_cache import AnalysisCache
+
+RESULT = {"sentiment": "positive", "sentiment_score": 0.8, "summary": "Fast shipping.",
+          "topics": ["shipping"], "intent": "praise", "entities": []}
+
+
+@pytest.fixture
+def open_cache(tmp_path, monkeypatch):
+    """Opens AnalysisCaches on the same throwaway SQLite file (env set before each open)."""
+    monkeypatch.setenv("ANALYSIS_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    caches = []
+
+    def open_one(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        caches.append(AnalysisCache())
+        return caches[-1]
+
+    yield open_one
+    for cache in caches:
+        cache.close()
+
+
+def test_key_ignores_whitespace_and_unicode_form_but_not_model_or_prompt():
+    key = AnalysisCache.make_key("Café  service\nwas great", "llama3", "v2")
+    assert AnalysisCache.make_key("  Café service was great ", "llama3", "v2") == key
+    assert AnalysisCache.make_key("Café service was great", "mistral", "v2") != key
+    assert AnalysisCache.make_key("Café service was great", "llama3", "v3") != key
+    assert AnalysisCache.make_key("Café service was bad", "llama3", "v2") != key
+
+
+def test_memory_hit_then_disk_hit_after_restart(open_cache):
+    cache = open_cache()
+    key = AnalysisCache.make_key("Fast shipping, thanks!", "llama3", "v2")
+    assert cache.get(key) is None
+    cache.put(key, RESULT)
+    assert cache.get(key) == RESULT
+
+    reopened = open_cache()
+    assert reopened.get(key) == RESULT  # from SQLite, now promoted to memory
+    assert reopened.get(key) == RESULT
+    assert (cache.stats()["hits_memory"], cache.stats()["misses"]) == (1, 1)
+    assert (reopened.stats()["hits_disk"], reopened.stats()["hits_memory"]) == (1, 1)
+
+
+def test_memory_tier_is_bounded_lru(open_cache):
+    cache = open_cache(ANALYSIS_CACHE_MEMORY_ITEMS=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, {**RESULT, "summary": key})
+    assert cache.stats()["memory_items"] == 2
+    assert cache.get("a")["summary"] == "a"  # evicted from memory, still on disk
+    assert cache.stats()["hits_disk"] == 1
+
+
+def test_expired_entries_are_misses(open_cache, monkeypatch):
+    cache = open_cache(ANALYSIS_CACHE_TTL=60)
+    cache.put("k", RESULT)
+    later = time.time() + 120
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,38 @@
+# tests/test_analysis_plan.py
+import pytest
+
+from backend.services.analysis_plan import LLM_FIELDS, AnalysisPlan
+
+
+def test_default_plan_runs_everything_and_saves():
+    plan = AnalysisPlan()
+    assert plan.full and plan.memory and not plan.fast
+    assert plan.fields == ("entities", *LLM_FIELDS)
+    assert plan.needs_llm and not plan.partial_llm
+    assert AnalysisPlan(["fast"]).full and AnalysisPlan(["memory", "fast"]).fast
+
+
+def test_entities_only_skips_the_llm_and_memory():
+    plan = AnalysisPlan(["entities"])
+    assert plan.fields == ("entities",)
+    assert not plan.needs_llm and not plan.partial_llm and not plan.memory
+
+
+def test_partial_llm_asks_only_for_the_requested_fields():
+    plan = AnalysisPlan(["sentiment", "entities"])
+    assert plan.fields == ("entities", "sentiment", "sentiment_score")
+    assert plan.llm_fields == ("sentiment", "sentiment_score")
+    assert plan.partial_llm and plan.signature == "sentiment,sentiment_score"
+    assert not plan.wants_text and AnalysisPlan(["topics"]).wants_text
+    assert AnalysisPlan(["summary", "memory"]).memory
+
+
+def test_project_keeps_the_requested_fields_and_cluster():
+    full = {"entities": [], "sentiment": "Positive", "sentiment_score": 0.9, "summary": "s",
+            "topics": ["t"], "intent": "Praise", "cluster_id": "c1"}
+    assert AnalysisPlan(["intent"]).project(full) == {"intent": "Praise", "cluster_id": "c1"}
+
+
+def test_unknown_module_is_rejected():
+    with pytest.raises(ValueError, match="bogus"):
+        AnalysisPlan(["sentiment", "bogus"])
@@ -0,0 +1,71 @@
+# tests/test_analytics.py
+from datetime import datetime, timezone
+
+from backend.services.analytics import DAY, AnalyticsStore
+from backend.utils.query_parser import parse_time_window
+
+
+def _at(*date) -> float:
+    return datetime(*date, tzinfo=timezone.utc).timestamp()
+
+
+def _analysis(sentiment, intent, score, topics):
+    return {"sentiment": sentiment, "intent": intent, "sentiment_score": score, "topics": topics}
+
+
+def _seed(store):
+    # One row a day from 2026-01-20 to 2026-04-10: spans two whole months and two partial ones
+    days = [_at(2026, 1, 20) + d * DAY for d in range(81)]
+    store.upsert(
+        [f"r{d}" for d in range(len(days))],
+        [_analysis("negative" if d % 3 == 0 else "positive", "Complaint" if d % 3 == 0 else "praise",
+                   -0.8 if d % 3 == 0 else 0.6, ["delivery"] if d % 2 else ["price", "delivery"])
+         for d in range(len(days))],
+        days,
+        [[{"text": "Acme Corp", "label": "ORG"}] if d % 5 == 0 else [] for d in range(len(days))],
+    )
+    return days
+
+
+def test_rollups_match_a_plain_count_across_month_edges(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "analytics.sqlite3"))
+    days = _seed(store)
+    since, until = _at(2026, 1, 25), _at(2026, 4, 5)
+    inside = [d for d in range(len(days)) if since <= days[d] < until]
+
+    summary = store.summary(since, until, bucket="month")
+    assert summary["total"] == len(inside)
+    assert summary["by_sentiment"] == {"negative": sum(1 for d in inside if d % 3 == 0),
+                                       "positive": sum(1 for d in inside if d % 3)}
+    assert summary["by_intent"]["complaint"] == summary["by_sentiment"]["negative"]
+    assert {t["topic"]: t["count"] for t in summary["top_topics"]} == {
+        "delivery": len(inside), "price": sum(1 for d in inside if d % 2 == 0)}
+    assert summary["top_entities"] == [{"entity": "acme corp", "label": "ORG", "count": sum(1 for d in inside if d % 5 == 0)}]
+    assert sum(b["count"] for b in summary["score"]["histogram"]) == len(inside)
+    assert [b["bucket"] for b in summary["timeline"]] == ["2026-01", "2026-02", "2026-03", "2026-04"]
+    store.close()
+
+
+def test_resaves_and_deletions_replace_their_contribution(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "analytics.sqlite3"))
+    store.upsert(["a", "b"], [_analysis("negative", "complaint", -0.5, ["late"])] * 2, [_at(2026, 3, 3)] * 2)
+    store.upsert(["a"], [_analysis("positive", "praise", 0.9, ["fast"])], [_at(2026, 3, 3)])
+    summary = store.summary()
+    assert summary["total"] == 2 and summary["by_sentiment"] == {"negative": 1, "positive": 1}
+    assert summary["score"]["mean"] == 0.2
+    assert store.delete(["b", "missing"]) == 1
+    summary = store.summary(sentiment="Negative")
+    assert summary["total"] == 0 and summary["top_topics"] == []
+    assert store.summary(bucket="week")["timeline"] == [{"bucket": "2026-03-02", "positive": 1}]
+    store.close()
+
+
+def test_windows_are_whole_utc_days(tmp_path):
+    now = _at(2026, 3, 10, 1, 30)
+    since, until = parse_time_window("what happened yesterday?", now, tz=timezone.utc)
+    assert (since, until) == (_at(2026, 3, 9), _at(2026, 3, 10))
+    store = AnalyticsStore(str(tmp_path / "analytics.sqlite3"))
+    store.upsert(["late-evening", "just-after-midnight"], [_analysis("neutral", None, None, [])] * 2,
+                 [_at(2026, 3, 9, 23, 59), _at(2026, 3, 10, 0, 5)])
+    assert store.summary(since, until)["total"] == 1
+    store.close()
@@ -0,0 +1,45 @@
+# tests/test_context_builder.py
+from backend.services.context_builder import ContextBuilder
+from backend.utils.chunker import estimate_tokens
+
+FILLER = "The rest of the visit went as expected and there is little else to report here."
+
+
+def builder(monkeypatch, **env) -> ContextBuilder:
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    return ContextBuilder()
+
+
+def test_context_stays_within_the_token_budget(monkeypatch):
+    context = builder(monkeypatch, CHAT_CONTEXT_TOKENS=100)
+    documents = [f"Review {i}: the checkout page crashed when paying with card number {i}." for i in range(20)]
+    text, stats = context.build("checkout crashed", documents, [{"sentiment": "negative"}] * 20)
+    assert 0 < stats["context_tokens"] <= 100
+    assert stats["documents"] == stats["passages"] < 20
+    assert text.startswith("[1] (negative)\nReview 0:")
+
+
+def test_long_document_contributes_its_summary_and_relevant_passages(monkeypatch):
+    context = builder(monkeypatch, CHAT_CONTEXT_TOKENS=80, CHAT_PASSAGE_TOKENS=40)
+    relevant = "The battery died after two hours of light use, which is unacceptable."
+    long_doc = "\n".join([FILLER] * 4 + [relevant] + [FILLER] * 4)
+    text, stats = context.build("how long does the battery last", [long_doc],
+                                [{"summary": "Battery life complaint.", "sentiment": "negative"}])
+    assert estimate_tokens(long_doc) > 80
+    assert stats["summaries"] == 1 and stats["passages"] >= 1 and stats["context_tokens"] <= 80
+    assert "Summary: Battery life complaint." in text and relevant in text
+    assert text.index("Summary:") < text.index(relevant)
+
+
+def test_near_duplicate_passages_are_dropped(monkeypatch):
+    context = builder(monkeypatch)
+    doc = "The courier left the parcel in the rain and it was soaked through."
+    text, stats = context.build("courier", [doc, doc + "!", "Support refunded me quickly."], [{}, {}, {}])
+    assert stats["documents"] == 2 and text.count("courier left the parcel") == 1
+
+
+def test_no_budget_passes_whole_documents(monkeypatch):
+    context = builder(monkeypatch, CHAT_CONTEXT_TOKENS=0)
+    text, stats = context.build("anything", ["first", "second"], [{}, {}])
+    assert text == "first\n\nsecond" and stats["summaries"] == 0 and stats["documents"] == 2
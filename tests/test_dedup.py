@@ -0,0 +1,64 @@
+# tests/test_dedup.py
+import asyncio
+
+import numpy as np
+
+from backend.services.dedup import DedupIndex, guard, normalize, signature
+
+ANALYSIS = {"sentiment": "negative", "sentiment_score": -0.6, "summary": "Delivery was late.",
+            "topics": ["delivery"], "intent": "complaint"}
+ORIGINAL = "My order arrived two days late and the box was damaged, very disappointing service."
+TYPO = "My order arrived two days late and the box was damaged - very dissapointing service!"
+
+
+def _vector(text: str):
+    # Same words, same direction: near-duplicates pass the cosine check
+    v = np.zeros(16, dtype=np.float32)
+    v[len(normalize(text).split()) % 16] = 1.0
+    return v
+
+
+def test_guard_keeps_negations_and_numbers():
+    assert guard("The app works") != guard("The app never works")
+    assert guard("It doesn't work") == guard("It does not work") == "not"
+    assert guard("Refund took 2 days") != guard("Refund took 20 days")
+    assert (signature(ORIGINAL) == signature(ORIGINAL.upper() + "!")).all()
+
+
+def test_near_duplicate_matches_but_negated_or_renumbered_text_does_not(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.sqlite3"))
+    index.add_clusters(["c1"], [ORIGINAL], [ANALYSIS], [index.probe(ORIGINAL, _vector(ORIGINAL))])
+
+    match = index.match(index.probe(TYPO, _vector(ORIGINAL)))
+    assert match["cluster_id"] == "c1" and match["route"] == "lexical" and match["analysis"] == ANALYSIS
+    negated = ORIGINAL.replace("arrived", "never arrived")
+    assert index.match(index.probe(negated, _vector(ORIGINAL))) is None
+    renumbered = ORIGINAL.replace("two days", "12 days")
+    assert index.match(index.probe(renumbered, _vector(ORIGINAL))) is None
+    index.close()
+
+
+def test_group_links_duplicates_within_one_batch(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.sqlite3"))
+    texts = [ORIGINAL, "Completely unrelated praise for the friendly support team.", TYPO]
+    probes = [index.probe(text, _vector(ORIGINAL)) for text in texts]
+    assert index.group(probes) == [None, None, 0]
+    index.close()
+
+
+def test_find_duplicates_queries_the_vector_store_once_per_call(open_memory):
+    memory = open_memory()
+    _, probes = memory.find_duplicates([ORIGINAL])
+    memory.save_analyses([ORIGINAL], [ANALYSIS], ["c1"])
+    memory.add_clusters(["c1"], [ORIGINAL], [ANALYSIS], probes)
+
+    queries = []
+    query = memory._query
+    memory._query = lambda embeddings, *args, **kwargs: queries.append(len(embeddings)) or query(embeddings, *args, **kwargs)
+    texts = [TYPO, "Completely unrelated praise for the friendly support team.", ORIGINAL]
+    matches, probes = memory.find_duplicates(texts)
+    asyncio.run(memory.close())
+
+    assert queries == [3]
+    assert [m and m["cluster_id"] for m in matches] == ["c1", None, "c1"]
+    assert len(probes) == 3
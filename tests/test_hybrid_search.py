@@ -0,0 +1,54 @@
+# tests/test_hybrid_search.py
+import asyncio
+
+from backend.services.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from backend.services.memory_store import MemoryStore
+
+
+def test_rrf_favours_documents_several_retrievers_agree_on():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "b"], ["c"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["c", "b", "a"]
+    assert fused[0][1] == 1 / 63 + 1 / 61 + 1 / 61
+    assert reciprocal_rank_fusion([]) == []
+
+
+def test_bm25_keeps_codes_whole_and_entities_match_exactly(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.sqlite3"))
+    index.upsert(
+        ["r1", "r2", "r3"],
+        ["Refund for order AB-1234 never arrived", "Order AB-9999 was fine", "Great coffee at the Berlin store"],
+        [[{"text": "AB-1234", "label": "PRODUCT"}], [], [{"text": "Berlin", "label": "GPE"}]],
+    )
+    assert index.search_bm25("where is AB-1234?") == ["r1"]
+    assert index.search_bm25("the of and") == []
+    assert index.search_entities("anything from berlin lately") == ["r3"]
+    index.upsert(["r3"], ["Great coffee at the Munich store"], [[{"text": "Munich", "label": "GPE"}]])
+    assert index.search_entities("berlin") == [] and index.search_bm25("munich") == ["r3"]
+    index.delete(["r1"])
+    assert index.search_bm25("AB-1234") == [] and len(index) == 2
+    index.close()
+
+
+def test_hybrid_search_fuses_retrievers_and_keeps_the_filter(open_memory):
+    memory = open_memory()
+    texts = [
+        "Refund for order AB-1234 still missing after two weeks",
+        "Refund took two weeks but support was kind",
+        "Missing refund, support never answered",
+        "Delivery was fast and the packaging was nice",
+    ]
+    sentiments = ["negative", "neutral", "negative", "positive"]
+    memory.save_analyses(
+        texts,
+        [{"sentiment": s, "summary": None, "topics": [], "intent": None} for s in sentiments],
+        ["code", "kind", "missing", "fast"],
+        entities=[[{"text": "AB-1234", "label": "PRODUCT"}], [], [], []],
+    )
+
+    hybrid = memory.search_similar("AB-1234", n_results=2, mode="hybrid")
+    assert hybrid["ids"][0][0] == "code" and hybrid["documents"][0][0] == texts[0]
+    # Lexical hits go through the metadata filter too
+    filtered = memory.search_similar("AB-1234 refund", n_results=4, mode="hybrid",
+                                     where=MemoryStore.build_where(sentiment="neutral"))
+    assert filtered["ids"][0] == ["kind"]
+    asyncio.run(memory.close())
@@ -0,0 +1,68 @@
+# tests/test_job_queue.py
+import asyncio
+
+import pytest
+
+from backend.services.job_queue import JobQueue
+
+
+@pytest.fixture
+def make_queue(tmp_path, monkeypatch):
+    monkeypatch.setenv("JOBS_DB_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setenv("JOB_UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setenv("JOB_WORKERS", "1")
+    return JobQueue
+
+
+async def _until_finished(jobs: JobQueue, job_ids: list, timeout: float = 5.0):
+    async def poll():
+        while any(jobs.get(j)["status"] in ("queued", "running") for j in job_ids):
+            await asyncio.sleep(0.02)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_jobs_run_and_report_progress(make_queue):
+    async def double(payload, progress):
+        progress(0.5)
+        return {"value": payload["value"] * 2}
+
+    async def scenario():
+        jobs = make_queue({"double": double})
+        await jobs.start()
+        try:
+            job_id = jobs.submit("double", {"value": 21})
+            await _until_finished(jobs, [job_id])
+            return jobs.get(job_id)
+        finally:
+            await jobs.stop()
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "done" and job["progress"] == 1.0
+    assert job["result"] == {"value": 42}
+
+
+def test_failing_job_is_marked_failed_and_the_worker_keeps_going(make_queue):
+    async def boom(payload, progress):
+        raise ValueError("bad input")
+
+    async def ok(payload, progress):
+        return {"ok": True}
+
+    async def scenario():
+        handlers = {"boom": boom, "ok": ok, "gone": ok}
+        jobs = make_queue(handlers)
+        gone = jobs.submit("gone", {})
+        del handlers["gone"]  # fails before the handler runs, outside its error handling
+        failed = jobs.submit("boom", {})
+        done = jobs.submit("ok", {})
+        await jobs.start()
+        try:
+            await _until_finished(jobs, [gone, failed, done])
+            return [jobs.get(j) for j in (gone, failed, done)]
+        finally:
+            await jobs.stop()
+
+    gone, failed, done = asyncio.run(scenario())
+    assert gone["status"] == "failed" and "Internal error" in gone["error"]
+    assert failed["status"] == "failed" and failed["error"] == "bad input"
+    assert done["status"] == "done"
@@ -0,0 +1,126 @@
+# tests/test_llm_pool.py
+import asyncio
+
+import pytest
+
+from backend.services.llm_pool import LLMPool
+from benchmarks.fake_ollama import FAKE_ANSWER
+
+MESSAGES = [{"role": "user", "content": "What do customers complain about?"}]
+
+
+def test_concurrency_is_capped_at_the_backend_slots(fake_ollama):
+    server = fake_ollama(latency=0.2, tokens_per_sec=1000)
+
+    async def scenario():
+        pool = LLMPool([(server.url, "mistral", 2)], timeout=10)
+        try:
+            return await asyncio.gather(*(pool.chat(messages=MESSAGES) for _ in range(6)))
+        finally:
+            await pool.close()
+
+    responses = asyncio.run(scenario())
+    assert all(r["message"]["content"] == FAKE_ANSWER for r in responses)
+    assert server.app.state.requests == 6
+    assert server.app.state.max_in_flight == 2
+
+
+def test_failing_backend_fails_over_and_is_ejected_until_healthy(fake_ollama):
+    bad = fake_ollama(latency=0.01, tokens_per_sec=1000)
+    good = fake_ollama(latency=0.01, tokens_per_sec=1000)
+    bad.app.state.fail = True
+
+    async def scenario():
+        pool = LLMPool([(bad.url, "mistral", 2), (good.url, "mistral", 2)], timeout=10)
+        try:
+            for _ in range(6):
+                response = await pool.chat(messages=MESSAGES)
+                assert response["message"]["content"] == FAKE_ANSWER
+            ejected = not pool.backends[0].healthy
+            bad.app.state.fail = False
+            healthy = await pool.check_all()
+            return pool.backends, ejected, healthy
+        finally:
+            await pool.close()
+
+    (bad_backend, good_backend), ejected, healthy = asyncio.run(scenario())
+    # Ejected after OLLAMA_EJECT_AFTER=2 failures: no traffic after that
+    assert ejected
+    assert bad_backend.failures == 2
+    assert good.app.state.requests == 6
+    assert healthy == 2 and bad_backend.healthy
+
+
+def test_every_backend_down_raises_the_last_error(fake_ollama):
+    server = fake_ollama(latency=0.01)
+    server.app.state.fail = True
+
+    async def scenario():
+        pool = LLMPool([(server.url, "mistral", 1)], timeout=10)
+        try:
+            await pool.chat(messages=MESSAGES)
+        finally:
+            await pool.close()
+
+    with pytest.raises(Exception):
+        asyncio.run(scenario())
+
+
+# --- Streaming ---
+
+def test_slow_reader_does_not_count_against_the_timeout(fake_ollama):
+    server = fake_ollama(latency=0.05, tokens_per_sec=100)
+
+    async def scenario():
+        pool = LLMPool([(server.url, "mistral", 1)], timeout=0.5)
+        parts = []
+        try:
+            async for part in pool.stream_chat(messages=MESSAGES):
+                parts.append(part)
+                await asyncio.sleep(0.1)  # the whole stream takes well over the timeout
+        finally:
+            await pool.close()
+        return parts, pool.backends[0]
+
+    parts, backend = asyncio.run(scenario())
+    assert "".join(p["message"]["content"] for p in parts) == FAKE_ANSWER
+    assert parts[-1]["done"]
+    assert backend.in_flight == 0 and backend.failures == 0
+
+
+def test_closing_a_stream_early_frees_the_slot(fake_ollama):
+    server = fake_ollama(latency=0.05, tokens_per_sec=50)
+
+    async def scenario():
+        pool = LLMPool([(server.url, "mistral", 1)], timeout=10)
+        try:
+            stream = pool.stream_chat(messages=MESSAGES)
+            await anext(stream)
+            held = pool.backends[0].in_flight
+            await stream.aclose()
+            return held, pool.backends[0].in_flight
+        finally:
+            await pool.close()
+
+    assert asyncio.run(scenario()) == (1, 0)
+
+
+def test_stream_dropped_midway_counts_as_a_backend_failure(fake_ollama):
+    server = fake_ollama(latency=0.05, tokens_per_sec=100)
+    server.app.state.drop_after = 3
+
+    async def scenario():
+        pool = LLMPool([(server.url, "mistral", 1)], timeout=10)
+        parts = []
+        try:
+            with pytest.raises(Exception):
+                async for part in pool.stream_chat(messages=MESSAGES):
+                    parts.append(part)
+        finally:
+            await pool.close()
+        return parts, pool.backends[0]
+
+    parts, backend = asyncio.run(scenario())
+    # Part of the answer was out, so no failover: the error reaches the caller
+    assert len(parts) == 3
+    assert backend.failures == 1 and backend.in_flight == 0
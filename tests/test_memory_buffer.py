@@ -0,0 +1,67 @@
+# tests/test_memory_buffer.py
+import time
+import asyncio
+import threading
+
+ANALYSIS = {"sentiment": "negative", "sentiment_score": -0.5, "summary": "Battery drains fast.",
+            "topics": ["battery"], "intent": "complaint"}
+
+
+def _texts(n: int, start: int = 0) -> list:
+    return [f"Complaint number {i}: the battery drains within an hour." for i in range(start, start + n)]
+
+
+def test_enqueued_rows_are_flushed_in_batches(open_memory, monkeypatch):
+    monkeypatch.setenv("MEMORY_FLUSH_SIZE", "4")
+    memory = open_memory()
+
+    async def scenario():
+        await memory.start()
+        texts = _texts(10)
+        await memory.enqueue_analyses(texts, [ANALYSIS] * len(texts), [f"id-{i}" for i in range(10)])
+        await memory.flush()
+        count = memory.count()
+        await memory.close()
+        return count
+
+    assert asyncio.run(scenario()) == 10
+    assert memory.buffer_stats["flushed"] == 10 and memory.buffer_stats["flushes"] >= 3
+
+
+def test_close_during_a_slow_flush_persists_every_row(open_memory, monkeypatch):
+    monkeypatch.setenv("MEMORY_FLUSH_SIZE", "4")
+    memory = open_memory()
+    save = memory.save_analyses
+    flushing = threading.Event()
+    outcomes = []
+
+    def slow_save(*args):
+        flushing.set()
+        time.sleep(0.3)  # close() arrives while this batch is being written
+        outcomes.append(save(*args))
+        return outcomes[-1]
+
+    memory.save_analyses = slow_save
+
+    async def scenario():
+        await memory.start()
+        first = _texts(4)
+        await memory.enqueue_analyses(first, [ANALYSIS] * 4, [f"id-{i}" for i in range(4)])  # a full batch: flushes now
+        while not flushing.is_set():
+            await asyncio.sleep(0.01)
+        rest = _texts(3, start=4)
+        await memory.enqueue_analyses(rest, [ANALYSIS] * 3, [f"id-{i}" for i in range(4, 7)])
+        await memory.close()
+
+    asyncio.run(scenario())
+    # Every batch was written before the side stores closed
+    assert outcomes == [True, True]
+    assert memory.buffer_stats["flushed"] == 7 and memory.buffer_stats["failed"] == 0
+    ids = [f"id-{i}" for i in range(7)]
+    reopened = open_memory()
+    try:
+        assert reopened.count() == 7
+        assert reopened.lexical.known(ids) == set(ids)
+        assert reopened.analytics.known(ids) == set(ids)
+    finally:
+        asyncio.run(reopened.close())
@@ -0,0 +1,74 @@
+# tests/test_memory_filters.py
+import time
+import asyncio
+
+import chromadb
+
+from backend.services.memory_store import LEGACY_COLLECTION, MemoryStore
+from backend.utils.query_parser import parse_question_filters, parse_time_window
+
+DAY = 86400
+NOW = time.time()
+
+
+def _analysis(sentiment: str, intent: str) -> dict:
+    return {"sentiment": sentiment, "sentiment_score": 0.0, "summary": None, "topics": [], "intent": intent}
+
+
+def test_build_where_combines_only_the_given_filters():
+    assert MemoryStore.build_where() is None
+    assert MemoryStore.build_where(sentiment="Negative") == {"sentiment": "negative"}
+    assert MemoryStore.build_where(intent=" Complaint ", since=10, until=20) == {"$and": [
+        {"intent": "complaint"}, {"timestamp": {"$gte": 10.0}}, {"timestamp": {"$lte": 20.0}},
+    ]}
+
+
+def test_search_filters_by_metadata_and_time_inside_the_index(open_memory):
+    memory = open_memory()
+    texts = ["The courier lost my parcel again", "The courier was quick and polite", "Old courier complaint about a lost parcel"]
+    memory.save_analyses(
+        texts,
+        [_analysis("negative", "Complaint"), _analysis("positive", "Praise"), _analysis("negative", "Complaint")],
+        ["new-bad", "new-good", "old-bad"],
+        [{"timestamp": NOW}, {"timestamp": NOW}, {"timestamp": NOW - 30 * DAY}],
+    )
+    search = lambda where: memory.search_similar("courier lost parcel", n_results=5, where=where, mode="vector")["ids"][0]
+
+    assert set(search(None)) == {"new-bad", "new-good", "old-bad"}
+    assert set(search(MemoryStore.build_where(sentiment="negative"))) == {"new-bad", "old-bad"}
+    assert search(MemoryStore.build_where(intent="complaint", since=NOW - 7 * DAY)) == ["new-bad"]
+    assert search(MemoryStore.build_where(until=NOW - 7 * DAY)) == ["old-bad"]
+    stored = memory._get(["new-bad"])["metadatas"][0]
+    assert isinstance(stored["timestamp"], float) and stored["intent"] == "complaint"
+    asyncio.run(memory.close())
+
+
+def test_legacy_uuid_timestamps_are_migrated_once(open_memory):
+    from chromadb.api.client import SharedSystemClient
+
+    # A store written before epoch timestamps: the 'timestamp' field held a uuid
+    legacy = chromadb.PersistentClient(path="./data/chroma_db").get_or_create_collection(LEGACY_COLLECTION, embedding_function=None)
+    legacy.add(ids=["a", "b"], documents=["first old review", "second old review"],
+               embeddings=[[1.0] + [0.0] * 63, [0.0, 1.0] + [0.0] * 62],
+               metadatas=[{"sentiment": "neutral", "timestamp": "0c5e3f9e-uuid"}, {"sentiment": "neutral", "timestamp": "9d1b-uuid"}])
+    SharedSystemClient.clear_system_cache()
+
+    before = time.time()
+    memory = open_memory()
+    collection = memory._partition(LEGACY_COLLECTION)
+    timestamps = [m["timestamp"] for m in collection.get(include=["metadatas"])["metadatas"]]
+    assert all(isinstance(t, float) and before - DAY < t <= time.time() for t in timestamps)
+    assert collection.metadata["timestamp_format"] == "epoch"
+    assert memory.search_similar("old review", n_results=5, where=MemoryStore.build_where(since=before - DAY), mode="vector")["ids"][0]
+    asyncio.run(memory.close())
+
+
+def test_chat_questions_imply_filters():
+    now = 1_700_000_000.0  # a Tuesday, 22:13 UTC
+    assert parse_time_window("anything from the past 3 days?", now) == (now - 3 * DAY, None)
+    assert parse_time_window("what happened?", now) == (None, None)
+    since, until = parse_time_window("complaints yesterday", now)
+    assert until - since == DAY and since < now - DAY < until
+    filters = parse_question_filters("Any negative complaints last week?", now)
+    assert (filters["intent"], filters["sentiment"]) == ("complaint", "negative")
+    assert filters["until"] - filters["since"] == 7 * DAY
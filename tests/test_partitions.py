@@ -0,0 +1,74 @@
+# tests/test_partitions.py
+import asyncio
+from datetime import datetime, timezone
+
+from backend.services.memory_store import MemoryStore, _narrow_where, partition_range
+
+ANALYSIS = {"sentiment": "neutral", "summary": None, "topics": [], "intent": None}
+
+
+def _at(*date) -> float:
+    return datetime(*date, tzinfo=timezone.utc).timestamp()
+
+
+NOW = _at(2026, 10, 15)
+ROWS = {"jan": _at(2026, 1, 10), "jul-early": _at(2026, 7, 2), "jul-late": _at(2026, 7, 28), "oct": _at(2026, 10, 14)}
+
+
+def _save(memory):
+    memory.save_analyses([f"Parcel review written in {name}" for name in ROWS], [ANALYSIS] * len(ROWS), list(ROWS),
+                         [{"timestamp": ts} for ts in ROWS.values()])
+
+
+def test_rows_land_in_month_partitions_and_searches_skip_other_months(open_memory, monkeypatch):
+    monkeypatch.setenv("MEMORY_PARTITION", "month")
+    memory = open_memory()
+    _save(memory)
+    assert [name for name, _ in memory.partitions()] == ["analysis_2026_01", "analysis_2026_07", "analysis_2026_10"]
+    assert [name for name, _ in memory.partitions(since=_at(2026, 7, 20))] == ["analysis_2026_07", "analysis_2026_10"]
+
+    searched = []
+    fanout = memory._fanout
+    memory._fanout = lambda fn, targets: searched.append([name for name, _ in targets]) or fanout(fn, targets)
+    where = MemoryStore.build_where(since=_at(2026, 7, 20))
+    result = memory.search_similar("parcel review", n_results=5, where=where, mode="vector")
+    assert searched == [["analysis_2026_07", "analysis_2026_10"]]
+    assert set(result["ids"][0]) == {"jul-late", "oct"}
+    assert memory.count() == 4
+    asyncio.run(memory.close())
+
+
+def test_time_clauses_a_whole_month_satisfies_are_dropped():
+    october = partition_range("analysis_2026_10")
+    where = MemoryStore.build_where(sentiment="negative", since=_at(2026, 9, 1))
+    assert _narrow_where(where, october) == {"sentiment": "negative"}
+    partial = MemoryStore.build_where(since=_at(2026, 10, 10))
+    assert _narrow_where(partial, october) == partial
+    assert partition_range("analysis_history") is None
+
+
+def test_retention_drops_expired_months_whole_and_trims_the_boundary_month(open_memory, monkeypatch):
+    monkeypatch.setenv("MEMORY_PARTITION", "month")
+    monkeypatch.setenv("MEMORY_RETENTION_DAYS", "100")  # cutoff: 2026-07-07
+    memory = open_memory()
+    _save(memory)
+    dropped = []
+    delete_collection = memory.client.delete_collection
+    memory.client.delete_collection = lambda name: dropped.append(name) or delete_collection(name)
+
+    assert memory.apply_retention(now=NOW) == 2
+    assert dropped == ["analysis_2026_01"]
+    assert [name for name, _ in memory.partitions()] == ["analysis_2026_07", "analysis_2026_10"]
+    assert set(memory._get(list(ROWS))["ids"]) == {"jul-late", "oct"}
+    assert memory.lexical.known(list(ROWS)) == {"jul-late", "oct"}
+    assert memory.apply_retention(now=NOW) == 0
+    asyncio.run(memory.close())
+
+
+def test_unpartitioned_store_expires_rows_by_timestamp(open_memory, monkeypatch):
+    monkeypatch.setenv("MEMORY_RETENTION_DAYS", "100")
+    memory = open_memory()
+    _save(memory)
+    assert memory.apply_retention(now=NOW) == 2
+    assert set(memory._get(list(ROWS))["ids"]) == {"jul-late", "oct"}
+    asyncio.run(memory.close())